@@ -0,0 +1,26 @@
+# benchmarks/baseline_chunking.py
+#
+# The app's original cleaner and fixed-character chunker, kept only as the
+# baseline the benchmarks compare the streaming cleaner and the token-aware
+# chunker (Helpers/chunking.py) against. Nothing in src/ uses them.
+#
+#   from baseline_chunking import chunk_text, clean_for_mvp
+import re
+
+_DATE_STAMP = re.compile(r"\d{1,2}/\d{1,2}/\d{2,4},? ?\d{1,2}:\d{2} ?[APM]{2}")
+_PAGE_FOOTER = re.compile(r"Page \d+ of \d+")
+_DISALLOWED = re.compile(r"[^\w\s.,?!:;/=&%\-]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def clean_for_mvp(text):
+    text = _DATE_STAMP.sub(" ", text)
+    text = _PAGE_FOOTER.sub(" ", text)
+    text = _DISALLOWED.sub("", text)
+    text = _WHITESPACE.sub(" ", text)
+    lines = [line.strip() for line in text.split("\n") if len(line.strip().split()) > 3]
+    return "\n".join(lines)
+
+
+def chunk_text(text, chunk_size):
+    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
@@ -0,0 +1,80 @@
+# benchmarks/chunking_throughput.py
+#
+# Chunking throughput on synthetic MOM-style documents: the old fixed-character
+# chunker versus the token-aware sentence chunker (which also counts tokens).
+#
+#   python benchmarks/chunking_throughput.py --sizes-mb 1 5 20
+import argparse
+import json
+import pathlib
+import random
+import sys
+import time
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from baseline_chunking import chunk_text  # noqa: E402
+from Helpers.chunking import get_encoder, iter_clean, iter_token_chunks  # noqa: E402
+
+SENTENCES = [
+    "Employers must buy medical insurance with coverage of at least $60,000 per year for the MDW.",
+    "The security bond of $5,000 is required for each non-Malaysian helper.",
+    "Your helper must go for a six-monthly medical examination with a Singapore-registered doctor.",
+    "Apply for the work permit within 7 days of receiving the In-Principle Approval (IPA).",
+    "First-time employers must attend the Employers' Orientation Programme before applying.",
+    "The monthly levy is payable by the 17th of each month through GIRO.",
+    "Check the MDW's employment history at https://www.mom.gov.sg/eservices before hiring.",
+]
+
+
+def synthetic_pages(size_mb: float, page_chars: int = 3000, seed: int = 7):
+    rng = random.Random(seed)
+    remaining = int(size_mb * 1_000_000)
+    while remaining > 0:
+        parts, length = [], 0
+        while length < page_chars:
+            sentence = rng.choice(SENTENCES)
+            parts.append(sentence)
+            length += len(sentence) + 1
+        page = " ".join(parts)
+        remaining -= len(page)
+        yield page
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunking throughput benchmark")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 5])
+    parser.add_argument("--chunk-chars", type=int, default=300)
+    parser.add_argument("--chunk-tokens", type=int, default=200)
+    parser.add_argument("--overlap-tokens", type=int, default=30)
+    args = parser.parse_args()
+
+    get_encoder()  # exclude the one-off BPE load from the timings
+    for size in args.sizes_mb:
+        pages = list(synthetic_pages(size))
+        pieces = list(iter_clean(pages))
+        text = " ".join(pieces)
+
+        start = time.perf_counter()
+        char_chunks = chunk_text(text, args.chunk_chars)
+        char_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        token_chunks = list(iter_token_chunks(pieces, args.chunk_tokens, args.overlap_tokens))
+        token_seconds = time.perf_counter() - start
+
+        mb = len(text) / 1_000_000
+        print(json.dumps({
+            "size_mb": round(mb, 2),
+            "char_chunker": {"chunks": len(char_chunks), "mb_per_sec": round(mb / char_seconds, 1)},
+            "token_chunker": {
+                "chunks": len(token_chunks),
+                "mb_per_sec": round(mb / token_seconds, 2),
+                "tokens": sum(c["token_count"] for c in token_chunks),
+            },
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/concurrent_sessions.py
+#
+# Load test for the shared OpenAI client. Many simulated Streamlit sessions each
+# ask a few questions (one query embedding + one chat completion per question)
+# against a local HTTP/1.1 stub that charges a one-off setup delay per new TCP
+# connection, standing in for the TLS handshake to the real API. Compares the
+# old behaviour (a fresh client per session) with one pooled client per process,
+# and reports per-request p50/p95 latency and how many connections were opened.
+#
+#   python benchmarks/concurrent_sessions.py --sessions 50 --questions 3 --handshake 0.1
+import argparse
+import json
+import pathlib
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from stub_openai import StubOpenAIHandler, start_stub
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from Helpers.settings import make_openai_client  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run(mode: str, base_url: str, sessions: int, questions: int, concurrency: int, max_connections: int):
+    shared = None
+    if mode == "shared":
+        shared = make_openai_client("stub", base_url=base_url, max_connections=max_connections, max_keepalive=max_connections)
+    latencies = []
+    lock = threading.Lock()
+
+    def session(n):
+        client = shared or openai.OpenAI(api_key="stub", base_url=base_url)
+        for q in range(questions):
+            for call in (
+                lambda: client.embeddings.create(model="stub", input=[f"question {n}-{q}"]),
+                lambda: client.chat.completions.create(model="stub", messages=[{"role": "user", "content": "hi"}]),
+            ):
+                started = time.perf_counter()
+                call()
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+    StubOpenAIHandler.connections = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(session, range(sessions)))
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "connections": StubOpenAIHandler.connections,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "wall_s": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-session vs shared OpenAI client load test")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=25, help="sessions active at once")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per request")
+    parser.add_argument("--handshake", type=float, default=0.1, help="stub seconds per new connection")
+    parser.add_argument("--max-connections", type=int, default=32)
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency, handshake=args.handshake)
+
+    for mode in ("per-session", "shared"):
+        print(json.dumps(run(mode, base_url, args.sessions, args.questions, args.concurrency, args.max_connections)))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
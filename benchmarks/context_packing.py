@@ -0,0 +1,127 @@
+# benchmarks/context_packing.py
+#
+# Prompt size with and without the context packer (Helpers/context_packer.py).
+# Synthetic policy documents go through the real chunker (token windows with
+# sentence overlap) and the in-process NumPy index, with the boilerplate and
+# re-issued documents that real MOM uploads carry. For each question the
+# fixed top-10 join is compared with pack_context at several token budgets:
+# prompt tokens, chunks kept, and whether the chunk holding the asked fact
+# survived. The stub embedding hashes words, so similarities are only
+# indicative; completion latency and cost scale with the prompt tokens shown.
+#
+#   python benchmarks/context_packing.py --docs 12 --budgets 600 1200 2000
+import argparse
+import json
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+sys.path.insert(0, str(PROJECT_ROOT / "benchmarks"))
+
+from stub_openai import stub_embedding  # noqa: E402
+from Helpers.context_packer import pack_context  # noqa: E402
+from Helpers.index_janitor import IndexJanitor, NamespaceRegistry  # noqa: E402
+from Helpers.ingest_pipeline import IngestionPipeline, build_document_entry  # noqa: E402
+from Helpers.prompt_builder import build_messages  # noqa: E402
+from Helpers.qa_engine import count_tokens, index_documents, needs_indexing, retrieve_chunks  # noqa: E402
+from Helpers.vector_backend import NumpyClient  # noqa: E402
+
+FACTS = [
+    ("What is the security bond amount for a helper?", "The security bond for each helper is {n} dollars."),
+    ("How much is the monthly levy?", "The monthly levy payable through GIRO is {n} dollars."),
+    ("When is the medical examination due?", "The medical examination is due every {n} months after arrival."),
+    ("How many rest days must a helper get?", "A helper must receive {n} rest days each month."),
+    ("How long is the settling-in programme?", "The settling-in programme lasts {n} hours in the first week."),
+    ("What is the minimum age of an employer?", "An employer must be at least {n} years old to apply."),
+]
+BOILERPLATE = (
+    "This document is issued by the Ministry of Manpower for general information only. "
+    "Employers should refer to https://www.mom.gov.sg for the latest requirements. "
+    "The information may change without notice and does not replace the Employment of Foreign Manpower Act. "
+)
+SUBJECTS = ["The employer", "The helper", "The employment agency", "The insurer", "The clinic", "The applicant",
+            "The household", "The caregiver"]
+ACTIONS = ["must submit", "should keep", "may request", "is required to show", "can update", "will receive",
+           "has to renew", "needs to sign"]
+OBJECTS = ["the work permit card", "the medical report", "the insurance policy", "the salary records",
+           "the rest day schedule", "the passport copy", "the approval letter", "the upkeep receipts"]
+QUALIFIERS = ["before the helper arrives", "within two weeks", "through the eService", "at the service centre",
+              "when asked by an officer", "every year", "after a change of address", "using Singpass"]
+
+
+def filler_sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(words) for words in (SUBJECTS, ACTIONS, OBJECTS, QUALIFIERS)) + "."
+
+
+def make_document(rng: random.Random, fact: str) -> str:
+    paragraphs = [BOILERPLATE]
+    for _ in range(6):
+        paragraphs.append(" ".join(filler_sentence(rng) for _ in range(4)))
+    paragraphs.insert(rng.randrange(2, len(paragraphs)), fact)
+    paragraphs.append(BOILERPLATE)
+    return "\n".join(paragraphs)
+
+
+def build_index(args, workdir: str):
+    rng = random.Random(args.seed)
+    embed = lambda texts: [stub_embedding(text) for text in texts]  # noqa: E731
+    janitor = IndexJanitor(
+        lambda path: NumpyClient(None), workdir, "doc_chunks", NamespaceRegistry(str(pathlib.Path(workdir) / "namespaces.sqlite3"))
+    )
+    state, questions = {"uploaded_docs": []}, []
+    for d in range(args.docs):
+        question, template = FACTS[d % len(FACTS)]
+        fact = template.format(n=rng.randint(2, 9000))
+        text = make_document(rng, fact)
+        # Every third document is also uploaded as a re-issued copy with a new date line
+        versions = [text] + ([f"Revised edition {d}.\n{text}"] if d % 3 == 0 else [])
+        for v, version in enumerate(versions):
+            chunks, doc_hash = IngestionPipeline(iter([version])).start().result()
+            state["uploaded_docs"].append(build_document_entry(f"doc{d}-{v}.txt", chunks, doc_hash))
+        questions.append((question, fact))
+    needs_indexing(state, janitor)
+    index_documents(state, embed, janitor)
+    return state, janitor, questions
+
+
+def measure(label: str, contexts: list, facts: list, dropped: list = ()) -> dict:
+    prompts = [
+        sum(count_tokens(message["content"])
+            for message in build_messages(question, "\n\n".join(text for _, text, _, _ in chunks) or None))
+        for (question, _), chunks in zip(facts, contexts)
+    ]
+    found = [any(fact in text for _, text, _, _ in chunks) for (_, fact), chunks in zip(facts, contexts)]
+    return {
+        "context": label,
+        "prompt_tokens_mean": round(statistics.mean(prompts), 1),
+        "prompt_tokens_max": max(prompts),
+        "chunks_mean": round(statistics.mean(len(chunks) for chunks in contexts), 2),
+        "fact_kept": round(sum(found) / len(found), 3),
+        **{f"dropped_{reason}": sum(counts[reason] for counts in dropped) for reason in (dropped[0] if dropped else ())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens with the fixed top-10 join vs the context packer")
+    parser.add_argument("--docs", type=int, default=12)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[600, 1200, 2000])
+    parser.add_argument("--mode", choices=("hybrid", "vector", "lexical"), default="hybrid")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    state, janitor, facts = build_index(args, tempfile.mkdtemp(prefix="context-packing-"))
+    state["retrieval_mode"] = args.mode
+    candidates = [retrieve_chunks(state, janitor, question, stub_embedding(question)) for question, _ in facts]
+    print(json.dumps({"documents": len(state["uploaded_docs"]), "chunks": len(state["all_chunks"]), "mode": args.mode}))
+    print(json.dumps(measure("top-10 join", candidates, facts)))
+    for budget in args.budgets:
+        packed, dropped = zip(*(pack_context(chunks, budget) for chunks in candidates))
+        print(json.dumps(measure(f"packed {budget}", packed, facts, dropped)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/embedding_throughput.py
+#
+# Offline benchmark for the batched embedding pipeline. Starts a local stub of
+# the OpenAI /v1/embeddings endpoint (fixed latency per request, optional
+# tokens-per-minute limit answered with 429s) and reports chunks/sec at
+# several concurrency levels.
+#
+#   python benchmarks/embedding_throughput.py --chunks 3000 --latency 0.25
+import argparse
+import json
+import pathlib
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from Helpers.embedding_pipeline import TokenRateLimiter, embed_concurrently, estimate_tokens  # noqa: E402
+
+DIMENSIONS = 8
+
+
+class StubEmbeddingHandler(BaseHTTPRequestHandler):
+    latency = 0.2
+    tokens_per_minute = None
+    _window = [0.0, 0]
+    _lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        inputs = body["input"]
+        tokens = sum(estimate_tokens(t) for t in inputs)
+
+        if self.tokens_per_minute:
+            with self._lock:
+                now = time.monotonic()
+                if now - self._window[0] >= 60:
+                    self._window[:] = [now, 0]
+                over = self._window[1] + tokens > self.tokens_per_minute
+                if not over:
+                    self._window[1] += tokens
+            if over:
+                self.send_response(429)
+                self.send_header("retry-after", "0.5")
+                self.end_headers()
+                return
+
+        time.sleep(self.latency)
+        data = [
+            {"index": i, "embedding": [float(len(t) % 7)] * DIMENSIONS, "object": "embedding"}
+            for i, t in enumerate(inputs)
+        ]
+        payload = json.dumps({"data": data, "usage": {"prompt_tokens": tokens}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StubRateLimitError(Exception):
+    status_code = 429
+
+
+def http_embed_batch(url: str):
+    def embed(texts):
+        request = urllib.request.Request(
+            url,
+            data=json.dumps({"model": "stub", "input": texts}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return [item["embedding"] for item in json.loads(response.read())["data"]]
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise StubRateLimitError() from e
+            raise
+    return embed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding pipeline throughput benchmark")
+    parser.add_argument("--chunks", type=int, default=3000)
+    parser.add_argument("--chunk-chars", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds per request")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--server-tpm", type=int, default=None, help="stub tokens-per-minute limit")
+    args = parser.parse_args()
+
+    StubEmbeddingHandler.latency = args.latency
+    StubEmbeddingHandler.tokens_per_minute = args.server_tpm
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubEmbeddingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/embeddings"
+
+    texts = [f"chunk {i} " + "x" * args.chunk_chars for i in range(args.chunks)]
+    results = []
+    for workers in args.workers:
+        start = time.perf_counter()
+        vectors = embed_concurrently(
+            texts,
+            http_embed_batch(url),
+            max_workers=workers,
+            batch_size=args.batch_size,
+            limiter=TokenRateLimiter(),
+        )
+        elapsed = time.perf_counter() - start
+        assert len(vectors) == len(texts)
+        results.append({"workers": workers, "seconds": round(elapsed, 3), "chunks_per_sec": round(len(texts) / elapsed, 1)})
+
+    server.shutdown()
+    for row in results:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
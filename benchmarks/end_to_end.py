@@ -0,0 +1,312 @@
+# benchmarks/end_to_end.py
+#
+# Offline end-to-end benchmark of the upload and Q&A logic, run headless against
+# the stub OpenAI server (benchmarks/stub_openai.py). Generates synthetic
+# MOM-style PDF, DOCX and TXT documents of increasing size and times each stage:
+# extraction, the baseline clean_for_mvp and chunk_text (baseline_chunking.py),
+# then the app's own token chunker, streaming ingestion pipeline, vector
+# indexing (qa_engine.index_documents) and answering (qa_engine.answer_question).
+#
+# Prints one JSON line per (stage, format, pages) with p50/p95/p99 latency and
+# throughput. --output saves the report; --baseline compares p95s against a
+# saved report and exits non-zero on regressions beyond --tolerance.
+#
+#   python benchmarks/end_to_end.py --sizes 2 10 50 --docs 3 --output e2e.json
+#   python benchmarks/end_to_end.py --baseline e2e.json --tolerance 0.25
+import argparse
+import io
+import json
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import chromadb
+
+from baseline_chunking import chunk_text, clean_for_mvp
+from stub_openai import start_stub
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from Helpers import extraction  # noqa: E402
+from Helpers.answer_cache import AnswerCache  # noqa: E402
+from Helpers.chunking import (  # noqa: E402
+    DEFAULT_CHUNK_TOKENS,
+    DEFAULT_OVERLAP_TOKENS,
+    get_encoder,
+    iter_clean,
+    iter_token_chunks,
+)
+from Helpers.embedding_cache import EmbeddingCache  # noqa: E402
+from Helpers.embedding_pipeline import TokenRateLimiter  # noqa: E402
+from Helpers.index_janitor import IndexJanitor, NamespaceRegistry  # noqa: E402
+from Helpers.ingest_pipeline import IngestionPipeline, build_document_entry  # noqa: E402
+from Helpers.lexical_index import BM25Index  # noqa: E402
+from Helpers.qa_engine import answer_question, index_documents, needs_indexing  # noqa: E402
+from Helpers.settings import make_embedder, make_openai_client  # noqa: E402
+
+FORMATS = ("pdf", "docx", "txt")
+LINES_PER_PAGE = 45
+LEGACY_CHUNK_CHARS = 1000
+SENTENCES = [
+    "Employers must buy a security bond of $5,000 for each non-Malaysian helper before the Work Permit is issued.",
+    "The In-Principle Approval (IPA) letter should be given to the helper before she leaves her home country.",
+    "The monthly levy is $300, or $60 with a concession, and is deducted by GIRO on the 17th of every month.",
+    "Helpers must pass a six-monthly medical examination that screens for pregnancy and infectious diseases.",
+    "First-time employers must attend the Employers' Orientation Programme before applying for a Work Permit.",
+    "Your helper is entitled to at least one rest day every week, or compensation in lieu of that rest day.",
+    "Medical insurance must cover at least $60,000 per year for inpatient care and day surgery.",
+    "Apply and pay online at https://www.mom.gov.sg/passes-and-permits/work-permit-for-foreign-domestic-worker.",
+    "An employment agency must be licensed by MOM and may charge a placement fee of up to two months of salary.",
+    "Employers must provide acceptable accommodation with adequate shelter, food and privacy for the helper.",
+]
+QUESTIONS = [
+    "How much is the security bond for a helper?",
+    "When is the monthly levy for a domestic helper deducted?",
+    "What medical insurance does my helper need?",
+    "How many rest days does a domestic worker get?",
+]
+
+
+# ------------------------------
+# Synthetic corpus
+# ------------------------------
+def synthetic_pages(pages: int, rng: random.Random) -> list:
+    """Pages of MOM-style prose with the date stamps and footers clean_for_mvp strips."""
+    out = []
+    for page in range(pages):
+        lines = [f"{rng.randint(1, 28)}/{rng.randint(1, 12)}/25, {rng.randint(1, 12)}:{rng.randint(10, 59)} PM Work Permit for MDW"]
+        while len(lines) < LINES_PER_PAGE - 1:
+            sentence = rng.choice(SENTENCES)
+            lines.extend(sentence[i:i + 90] for i in range(0, len(sentence), 90))
+        lines.append(f"Page {page + 1} of {pages}")
+        out.append(lines)
+    return out
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: list) -> bytes:
+    """A minimal text-only PDF (Helvetica, one content stream per page)."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(pages: list) -> bytes:
+    import docx
+    document = docx.Document()
+    for lines in pages:
+        for line in lines:
+            document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def make_document(filetype: str, pages: int, rng: random.Random) -> bytes:
+    content = synthetic_pages(pages, rng)
+    if filetype == "pdf":
+        return make_pdf(content)
+    if filetype == "docx":
+        return make_docx(content)
+    return "\n".join(line for lines in content for line in lines).encode("utf-8")
+
+
+# ------------------------------
+# Measurement
+# ------------------------------
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)   # key -> [seconds]
+        self.items = defaultdict(int)      # key -> units processed
+        self.units = {}
+
+    def time(self, key, fn, items: int = 1, unit: str = "docs"):
+        started = time.perf_counter()
+        result = fn()
+        self.add(key, time.perf_counter() - started, items, unit)
+        return result
+
+    def add(self, key, seconds: float, items: int = 1, unit: str = "docs"):
+        self.samples[key].append(seconds)
+        self.items[key] += items
+        self.units[key] = unit
+
+    def report(self) -> list:
+        rows = []
+        for (stage, filetype, pages), samples in self.samples.items():
+            total = sum(samples)
+            rows.append({
+                "stage": stage,
+                "format": filetype,
+                "pages": pages,
+                "n": len(samples),
+                "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                "p95_ms": round(percentile(samples, 95) * 1000, 3),
+                "p99_ms": round(percentile(samples, 99) * 1000, 3),
+                "throughput": round(self.items[(stage, filetype, pages)] / total, 2) if total else None,
+                "unit": f"{self.units[(stage, filetype, pages)]}/s",
+            })
+        return rows
+
+
+def run(args) -> list:
+    server, base_url = start_stub(latency=args.latency, token_delay=args.token_delay)
+    workdir = tempfile.mkdtemp(prefix="e2e-bench-")
+    client = make_openai_client("stub", base_url=base_url)
+    embed = make_embedder(
+        client,
+        cache=EmbeddingCache(os.path.join(workdir, "embeddings.sqlite3")),
+        limiter=TokenRateLimiter(10 ** 9),
+    )
+    janitor = IndexJanitor(
+        lambda path: chromadb.PersistentClient(path=path),
+        os.path.join(workdir, "chroma"),
+        "doc_chunks",
+        NamespaceRegistry(os.path.join(workdir, "namespaces.sqlite3")),
+    )
+    # Unique questions and a threshold above 1 keep every answer on the uncached path
+    answer_cache = AnswerCache(os.path.join(workdir, "answers.sqlite3"), similarity_threshold=1.01)
+
+    get_encoder()  # load the BPE ranks before timing anything
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    question_no = 0
+    for filetype in args.formats:
+        for pages in args.sizes:
+            for doc_no in range(args.docs):
+                data = make_document(filetype, pages, rng)
+                key = lambda stage: (stage, filetype, pages)  # noqa: E731
+
+                def extract():
+                    _, page_iter = extraction.open_pages(io.BytesIO(data), filetype, parallel=args.parallel)
+                    return list(page_iter)
+
+                extracted = recorder.time(key("extract"), extract, pages, "pages")
+                text = "\n".join(extracted)
+                cleaned = recorder.time(key("clean_for_mvp"), lambda: clean_for_mvp(text), pages, "pages")
+                chunks = recorder.time(key("chunk_text"), lambda: chunk_text(cleaned, LEGACY_CHUNK_CHARS), pages, "pages")
+                assert chunks
+                recorder.time(
+                    key("token_chunks"),
+                    lambda: list(iter_token_chunks(iter_clean(extracted), DEFAULT_CHUNK_TOKENS, DEFAULT_OVERLAP_TOKENS)),
+                    pages,
+                    "pages",
+                )
+
+                def ingest():
+                    page_count, page_iter = extraction.open_pages(io.BytesIO(data), filetype, parallel=args.parallel)
+                    pipeline = IngestionPipeline(page_iter, embed_fn=embed, total_pages=page_count).start()
+                    return pipeline.result()
+
+                doc_chunks, doc_hash = recorder.time(key("ingest"), ingest, pages, "pages")
+                entry = build_document_entry(f"bench-{filetype}-{pages}-{doc_no}.{filetype}", doc_chunks, doc_hash)
+
+                state = {"uploaded_docs": [entry], "lexical_index": BM25Index(), "stream_answers": True}
+
+                def index():
+                    if needs_indexing(state, janitor):
+                        index_documents(state, embed, janitor)
+
+                recorder.time(key("index"), index, len(entry["chunks"]), "chunks")
+
+                for question in QUESTIONS[:args.questions]:
+                    question_no += 1
+                    started = time.perf_counter()
+                    result = answer_question(
+                        state, f"{question} (case {question_no})", client, embed, answer_cache, janitor
+                    )
+                    recorder.add(key("question"), time.perf_counter() - started, 1, "questions")
+                    assert result["status"] == "answered", result
+                    for stage, seconds in result["stages"].items():
+                        recorder.add(key(f"question.{stage}"), seconds, 1, "questions")
+                    if "ttft" in state["last_answer_timing"]:
+                        recorder.add(key("question.ttft"), state["last_answer_timing"]["ttft"], 1, "questions")
+
+    server.shutdown()
+    return recorder.report()
+
+
+def compare(rows: list, baseline_path: str, tolerance: float) -> list:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["stage"], r["format"], r["pages"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for row in rows:
+        before = baseline.get((row["stage"], row["format"], row["pages"]))
+        if before and before["p95_ms"] > 0 and row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append({
+                "stage": row["stage"], "format": row["format"], "pages": row["pages"],
+                "baseline_p95_ms": before["p95_ms"], "p95_ms": row["p95_ms"],
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end upload and Q&A benchmark")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 10, 50], help="pages per document")
+    parser.add_argument("--docs", type=int, default=3, help="documents per format and size")
+    parser.add_argument("--questions", type=int, default=len(QUESTIONS), help="questions per document")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per API request")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="stub seconds per streamed token")
+    parser.add_argument("--parallel", action="store_true", help="extract PDF pages in parallel")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the full report as JSON")
+    parser.add_argument("--baseline", help="report from a previous run to compare p95s against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown vs baseline")
+    args = parser.parse_args()
+
+    rows = run(args)
+    for row in rows:
+        print(json.dumps(row))
+
+    report = {"config": vars(args), "results": rows}
+    if args.baseline:
+        report["regressions"] = compare(rows, args.baseline, args.tolerance)
+        for regression in report["regressions"]:
+            print(json.dumps({"regression": regression}))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
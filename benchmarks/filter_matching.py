@@ -0,0 +1,68 @@
+# benchmarks/filter_matching.py
+#
+# Compares the compiled keyword matcher with the previous per-keyword substring
+# scan, at the shipped list size and with the lists grown synthetically.
+#
+#   python benchmarks/filter_matching.py --scales 1 10 50
+import argparse
+import json
+import pathlib
+import sys
+import timeit
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from Helpers.filters import INAPPROPRIATE_CATEGORIES, RELEVANT_CATEGORIES, KeywordMatcher  # noqa: E402
+
+QUESTIONS = [
+    "Show me how to apply for a domestic helper in Singapore.",
+    "Provide the link to hire a helper for elderly care at home.",
+    "Where can I apply for a nanny or confinement helper online?",
+    "What documents do I need to renew my passport?",
+    "How much is the monthly levy after the concession ends?",
+    "Can my helper share a bedroom with my toddler?",
+]
+
+
+def substring_scan(question, keywords):
+    question = question.lower()
+    return any(keyword in question for keyword in keywords)
+
+
+def grown(categories: dict, scale: int) -> dict:
+    # Extra made-up keywords that never match, to show cost as the lists grow
+    return {
+        name: keywords + [f"{k} variant{i}" for i in range(scale - 1) for k in keywords]
+        for name, keywords in categories.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword filter micro-benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        relevant = grown(RELEVANT_CATEGORIES, scale)
+        inappropriate = grown(INAPPROPRIATE_CATEGORIES, scale)
+        relevant_flat = [k for keywords in relevant.values() for k in keywords]
+        inappropriate_flat = [k for keywords in inappropriate.values() for k in keywords]
+        relevance, safety = KeywordMatcher(relevant), KeywordMatcher(inappropriate)
+
+        legacy = timeit.timeit(
+            lambda: [(substring_scan(q, relevant_flat), substring_scan(q, inappropriate_flat)) for q in QUESTIONS],
+            number=args.number,
+        )
+        compiled = timeit.timeit(lambda: [(relevance.match(q), safety.match(q)) for q in QUESTIONS], number=args.number)
+        per_call = args.number * len(QUESTIONS)
+        print(json.dumps({
+            "keywords": len(relevant_flat) + len(inappropriate_flat),
+            "substring_us_per_question": round(legacy / per_call * 1e6, 2),
+            "compiled_us_per_question": round(compiled / per_call * 1e6, 2),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/index_churn.py
+#
+# Simulates a long-running deployment: every round a few sessions upload new
+# documents into the shared Chroma collection while older ones go idle. Runs the
+# same workload with and without the index janitor and prints the on-disk size,
+# live vector count and scoped query p95 after each round. The TTL is compressed
+# to one round so the effect shows within a short run.
+#
+#   python benchmarks/index_churn.py --rounds 20 --docs-per-round 5 --chunks-per-doc 200
+import argparse
+import json
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+import chromadb
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from Helpers.index_janitor import IndexJanitor, NamespaceRegistry, directory_size  # noqa: E402
+from Helpers.indexer import add_in_batches, make_chunk_id, scope_filter  # noqa: E402
+
+DIMENSIONS = 256
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def random_vectors(rng, n):
+    return [[rng.random() for _ in range(DIMENSIONS)] for _ in range(n)]
+
+
+def run(use_janitor: bool, args) -> list:
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="index-churn-")
+    chroma_path = str(pathlib.Path(workdir) / "chroma")
+    janitor = IndexJanitor(
+        lambda path: chromadb.PersistentClient(path=path), chroma_path, "doc_chunks", NamespaceRegistry(str(pathlib.Path(workdir) / "namespaces.sqlite3")),
+        ttl_seconds=args.ttl,
+    )
+    active, rows = [], []
+    for round_no in range(args.rounds):
+        new_docs = []
+        for d in range(args.docs_per_round):
+            doc_hash = f"{round_no:04d}{d:04d}".ljust(64, "0")
+            ids = [make_chunk_id(doc_hash, i * 100, i * 100 + 100) for i in range(args.chunks_per_doc)]
+            add_in_batches(
+                janitor.collection(),
+                ids,
+                [f"chunk {i} of {doc_hash}" for i in range(args.chunks_per_doc)],
+                random_vectors(rng, len(ids)),
+                [{"doc_hash": doc_hash, "token_count": 20} for _ in ids],
+            )
+            janitor.registry.register({doc_hash: len(ids)})
+            new_docs.append(doc_hash)
+        # Sessions from the previous round are still around; older ones have left
+        active = active[-args.docs_per_round:] + new_docs
+
+        report = {}
+        if use_janitor:
+            time.sleep(args.ttl * 1.5)
+            janitor.registry.touch(active)
+            report = janitor.run_once()
+
+        collection = janitor.collection()
+        latencies = []
+        for _ in range(args.queries):
+            scope = {key: [] for key in rng.sample(active, min(3, len(active)))}
+            started = time.perf_counter()
+            collection.query(query_embeddings=random_vectors(rng, 1), n_results=10, where=scope_filter(scope))
+            latencies.append((time.perf_counter() - started) * 1000)
+        rows.append({
+            "janitor": use_janitor,
+            "round": round_no,
+            "vectors": collection.count(),
+            "disk_mb": round(directory_size(chroma_path) / 1e6, 2),
+            "query_p95_ms": round(percentile(latencies, 95), 2),
+            "compacted": report.get("compacted", False),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector index growth with and without the janitor")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--docs-per-round", type=int, default=5)
+    parser.add_argument("--chunks-per-doc", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--ttl", type=float, default=0.2, help="seconds; one round of idleness")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    for use_janitor in (False, True):
+        for row in run(use_janitor, args):
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/prompt_caching.py
+#
+# Provider prefix-cache hits for the old single-message prompt (question
+# first) against the system-message layout of Helpers/prompt_builder.py.
+# A session asks every question about the synthetic uploads of
+# benchmarks/context_packing.py, then follow-ups worded differently, which the
+# answer cache misses. In the "retrieved" scenario the follow-ups run their own
+# retrieval; the stub embedding is noisy enough that rewording often changes
+# the chunks. In "same-chunks" they reuse the original question's chunks, as
+# paraphrases mostly do with real embeddings. Each request goes through
+# qa_engine.get_completion to the stub, which reports cached_tokens the way
+# OpenAI's prefix cache does; the usage recorded in timing is what is summed.
+#
+#   python benchmarks/prompt_caching.py --docs 12 --budget 1200
+import argparse
+import json
+import pathlib
+import sys
+import tempfile
+
+import openai
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+sys.path.insert(0, str(PROJECT_ROOT / "benchmarks"))
+
+from context_packing import build_index  # noqa: E402
+from stub_openai import StubOpenAIHandler, start_stub, stub_embedding  # noqa: E402
+from Helpers.context_packer import pack_context  # noqa: E402
+from Helpers.prompt_builder import SYSTEM_PROMPT, build_messages  # noqa: E402
+from Helpers.qa_engine import format_context, get_completion, retrieve_chunks  # noqa: E402
+
+FOLLOW_UPS = ["Could you repeat: {question}", "{question} Please include the official link."]
+# gpt-4o-mini input price per million tokens; cached input is billed at half
+INPUT_PRICE = 0.15
+CACHED_INPUT_PRICE = 0.075
+
+
+def question_first_messages(question: str, context: str = None) -> list:
+    """The previous layout: one user message, the question ahead of the instructions and context."""
+    return [{"role": "user", "content": f"The user asked:\n{question}\n\n{SYSTEM_PROMPT}\n\nDocument content:\n{context}"}]
+
+
+def run(scenario: str, layout: str, make_messages, client, requests: list) -> dict:
+    StubOpenAIHandler.prefixes.clear()
+    prompt = cached = 0
+    for question, context in requests:
+        timing = {}
+        get_completion(client, make_messages(question, context), timing=timing)
+        prompt += timing["prompt_tokens"]
+        cached += timing["cached_tokens"]
+    return {
+        "scenario": scenario,
+        "layout": layout,
+        "requests": len(requests),
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "cached_share": round(cached / prompt, 3),
+        "input_cost_usd": round(((prompt - cached) * INPUT_PRICE + cached * CACHED_INPUT_PRICE) / 1e6, 6),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefix-cache hits: question-first prompt vs system-message layout")
+    parser.add_argument("--docs", type=int, default=12)
+    parser.add_argument("--budget", type=int, default=1200, help="context token budget")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    state, janitor, facts = build_index(args, tempfile.mkdtemp(prefix="prompt-caching-"))
+    questions = list(dict.fromkeys(question for question, _ in facts))
+
+    def context_for(question: str) -> str:
+        chunks, _ = pack_context(retrieve_chunks(state, janitor, question, stub_embedding(question)), args.budget)
+        return format_context(chunks)
+
+    originals = [(question, context_for(question)) for question in questions]
+    scenarios = {
+        "retrieved": originals + [
+            (follow_up, context_for(follow_up))
+            for template in FOLLOW_UPS for follow_up in (template.format(question=q) for q in questions)
+        ],
+        "same-chunks": originals + [
+            (template.format(question=question), context) for template in FOLLOW_UPS for question, context in originals
+        ],
+    }
+
+    server, base_url = start_stub(latency=0.0)
+    client = openai.OpenAI(api_key="stub", base_url=base_url)
+    for scenario, requests in scenarios.items():
+        for layout, make_messages in (("question-first", question_first_messages),
+                                      ("system-context-question", build_messages)):
+            print(json.dumps(run(scenario, layout, make_messages, client, requests)))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
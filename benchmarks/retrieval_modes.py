@@ -0,0 +1,112 @@
+# benchmarks/retrieval_modes.py
+#
+# Offline relevance/latency comparison of vector-only, lexical-only (BM25) and
+# hybrid (reciprocal rank fusion) retrieval. The "vector" side uses a stub
+# embedding (hashed character trigrams), so absolute relevance numbers are only
+# indicative; the point is exact-term queries (form codes, "IPA", "security
+# bond") that dense retrieval tends to rank below similar-sounding prose.
+#
+#   python benchmarks/retrieval_modes.py --chunks 2000 --queries 200
+import argparse
+import hashlib
+import json
+import math
+import pathlib
+import random
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from Helpers.lexical_index import BM25Index, reciprocal_rank_fusion  # noqa: E402
+
+DIMENSIONS = 128
+TOPICS = [
+    "submit the security bond of $5,000 before the work permit is issued",
+    "the In-Principle Approval (IPA) letter must be given to the helper before arrival",
+    "pay the monthly levy of $300 through GIRO by the 17th of each month",
+    "the six-monthly medical examination screens for pregnancy and infectious diseases",
+    "first-time employers attend the Employers' Orientation Programme online",
+    "the helper must receive at least one rest day every week",
+]
+
+
+def stub_embedding(text: str) -> list:
+    vector = [0.0] * DIMENSIONS
+    text = f"  {text.lower()}  "
+    for i in range(len(text) - 2):
+        digest = hashlib.blake2b(text[i:i + 3].encode(), digest_size=4).digest()
+        vector[int.from_bytes(digest, "little") % DIMENSIONS] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def build_corpus(n: int, rng: random.Random):
+    chunks = []
+    for i in range(n):
+        topic = rng.choice(TOPICS)
+        chunks.append({
+            "chunk_id": f"c{i}",
+            "text": f"Use form MDW-{i:05d} when you {topic}. Keep a copy of form MDW-{i:05d} for your records.",
+        })
+    return chunks
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector vs lexical vs hybrid retrieval benchmark")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    chunks = build_corpus(args.chunks, rng)
+    vectors = {c["chunk_id"]: stub_embedding(c["text"]) for c in chunks}
+    index = BM25Index()
+    index.add_document("corpus", chunks)
+
+    targets = rng.sample(range(args.chunks), min(args.queries, args.chunks))
+    queries = [(f"Which steps apply to form MDW-{i:05d}?", f"c{i}") for i in targets]
+
+    def vector_search(query):
+        q = stub_embedding(query)
+        scored = sorted(vectors.items(), key=lambda item: -sum(a * b for a, b in zip(q, item[1])))
+        return [chunk_id for chunk_id, _ in scored[:args.k]]
+
+    def lexical_search(query):
+        return [chunk_id for chunk_id, _ in index.search(query, args.k)]
+
+    def hybrid_search(query):
+        fused = reciprocal_rank_fusion([vector_search(query), lexical_search(query)])
+        return [chunk_id for chunk_id, _ in fused[:args.k]]
+
+    for mode, search in (("vector", vector_search), ("lexical", lexical_search), ("hybrid", hybrid_search)):
+        latencies, hits, reciprocal_ranks = [], 0, []
+        for query, relevant in queries:
+            start = time.perf_counter()
+            ranked = search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if relevant in ranked:
+                hits += 1
+                reciprocal_ranks.append(1 / (ranked.index(relevant) + 1))
+            else:
+                reciprocal_ranks.append(0.0)
+        print(json.dumps({
+            "mode": mode,
+            f"recall@{args.k}": round(hits / len(queries), 3),
+            "mrr": round(statistics.mean(reciprocal_ranks), 3),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+        }))
+
+
+if __name__ == "__main__":
+    main()
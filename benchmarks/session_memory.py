@@ -0,0 +1,106 @@
+# benchmarks/session_memory.py
+#
+# Per-session memory with N large documents, with chunk text held in session
+# state (the old layout) versus spans into the shared chunk store. Each mode
+# runs in a fresh subprocess: documents are ingested once through the real
+# pipeline, then every simulated session gets its own copy of the uploaded_docs
+# entries (as if it had uploaded the files itself), its all_chunks list and its
+# BM25 index. Prints RSS after each session and the average growth per session.
+#
+#   python benchmarks/session_memory.py --docs 3 --pages 300 --sessions 10
+import argparse
+import json
+import os
+import pathlib
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+WORDS = (
+    "employer helper permit levy bond insurance medical examination security deposit "
+    "application renewal approval salary rest day accommodation agency transfer"
+).split()
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def make_pages(rng, pages: int, lines: int = 45) -> list:
+    return [
+        "\n".join(" ".join(rng.choice(WORDS) for _ in range(12)) + "." for _ in range(lines))
+        for _ in range(pages)
+    ]
+
+
+def run_mode(mode: str, args):
+    # read_chunk_text() resolves spans through the default store, so point it at a scratch directory
+    os.environ["CHUNK_STORE_PATH"] = tempfile.mkdtemp(prefix="chunk-store-")
+    from Helpers.chunk_store import get_chunk_store
+    from Helpers.ingest_pipeline import IngestionPipeline, build_document_entry
+    from Helpers.lexical_index import BM25Index
+
+    rng = random.Random(args.seed)
+    store = get_chunk_store() if mode == "store" else None
+
+    entries = []
+    for doc_no in range(args.docs):
+        pipeline = IngestionPipeline(iter(make_pages(rng, args.pages)), store=store).start()
+        chunks, doc_hash = pipeline.result()
+        entries.append(build_document_entry(f"doc-{doc_no}.pdf", chunks, doc_hash, store))
+        del pipeline, chunks
+    # The shared ingest output stands in for the upload itself; each session below
+    # gets fresh copies of everything it would hold
+    serialized = json.dumps(entries)
+    del entries
+
+    baseline = rss_mb()
+    sessions = []
+    for session_no in range(1, args.sessions + 1):
+        state = {"uploaded_docs": json.loads(serialized), "lexical_index": BM25Index()}
+        state["all_chunks"] = [chunk for doc in state["uploaded_docs"] for chunk in doc["chunks"]]
+        for doc in state["uploaded_docs"]:
+            state["lexical_index"].add_document(doc["doc_hash"], doc["chunks"])
+        sessions.append(state)
+        print(json.dumps({"mode": mode, "sessions": session_no, "rss_mb": round(rss_mb(), 1)}), flush=True)
+    print(json.dumps({
+        "mode": mode,
+        "docs": args.docs,
+        "pages": args.pages,
+        "chunks_per_session": len(sessions[0]["all_chunks"]),
+        "baseline_rss_mb": round(baseline, 1),
+        "per_session_mb": round((rss_mb() - baseline) / args.sessions, 2),
+    }), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-session RSS with chunk text inline vs in the chunk store")
+    parser.add_argument("--docs", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=300, help="pages per document")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mode", choices=("inline", "store"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args)
+        return
+    for mode in ("inline", "store"):
+        subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--docs", str(args.docs), "--pages", str(args.pages),
+             "--sessions", str(args.sessions), "--seed", str(args.seed)],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
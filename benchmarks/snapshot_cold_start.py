@@ -0,0 +1,128 @@
+# benchmarks/snapshot_cold_start.py
+#
+# Cold start of a new replica serving the shared corpus: re-embedding every
+# chunk through the (stub) embedding API versus installing a snapshot exported
+# from the same corpus. Each path ends with the first corpus query, so the
+# totals are time to first answerable question. --latency and --tpm model the
+# embedding API; the stub answers instantly otherwise. Also reports the
+# snapshot size against float32 vectors.
+#
+#   python benchmarks/snapshot_cold_start.py --docs 20 --pages 50 --latency 0.3
+import argparse
+import json
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+import chromadb
+
+from stub_openai import start_stub
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+WORKDIR = pathlib.Path(tempfile.mkdtemp(prefix="snapshot-cold-start-"))
+# read_chunk_text() resolves spans through the default store
+os.environ["CHUNK_STORE_PATH"] = str(WORKDIR / "chunk_store")
+
+from Helpers.chunk_store import get_chunk_store  # noqa: E402
+from Helpers.corpus import Corpus, append_manifest, manifest_record  # noqa: E402
+from Helpers.embedding_cache import EmbeddingCache  # noqa: E402
+from Helpers.embedding_pipeline import TokenRateLimiter  # noqa: E402
+from Helpers.indexer import add_documents  # noqa: E402
+from Helpers.ingest_pipeline import IngestionPipeline, build_document_entry  # noqa: E402
+from Helpers.qa_engine import retrieve_chunks  # noqa: E402
+from Helpers.settings import make_embedder, make_openai_client  # noqa: E402
+from Helpers.snapshot import export_snapshot, install_snapshot, snapshot_paths  # noqa: E402
+
+WORDS = (
+    "employer helper permit levy bond insurance medical examination security deposit "
+    "application renewal approval salary rest day accommodation agency transfer"
+).split()
+QUESTION = "security bond for a new helper"
+
+
+def make_pages(rng, pages: int, lines: int = 45) -> list:
+    return [
+        "\n".join(" ".join(rng.choice(WORDS) for _ in range(12)) + "." for _ in range(lines))
+        for _ in range(pages)
+    ]
+
+
+def first_query(corpus, embed) -> float:
+    started = time.perf_counter()
+    retrieve_chunks({"retrieval_mode": "hybrid"}, None, QUESTION, embed([QUESTION])[0], corpus=corpus)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replica cold start: re-embedding vs installing a snapshot")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=50, help="pages per document")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub seconds per embedding request")
+    parser.add_argument("--tpm", type=int, default=1_000_000, help="embedding tokens per minute")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    store = get_chunk_store()
+    manifest = str(WORKDIR / "manifest.jsonl")
+    entries = []
+    for doc_no in range(args.docs):
+        pipeline = IngestionPipeline(iter(make_pages(rng, args.pages)), store=store).start()
+        chunks, doc_hash = pipeline.result()
+        spans = store.spans(doc_hash, chunks)
+        records = [dict(chunk, span=span) for chunk, span in zip(chunks, spans)]
+        append_manifest(manifest, manifest_record(f"doc-{doc_no}.txt", doc_hash, doc_hash, doc_hash, args.pages, records))
+        entries.append(build_document_entry(f"doc-{doc_no}.txt", records, doc_hash, store))
+
+    server, base_url = start_stub(latency=args.latency)
+    embed = make_embedder(
+        make_openai_client("stub", base_url=base_url),
+        cache=EmbeddingCache(str(WORKDIR / "embeddings.sqlite3")),
+        limiter=TokenRateLimiter(args.tpm),
+    )
+    query_embed = make_embedder(
+        make_openai_client("stub", base_url=base_url),
+        cache=EmbeddingCache(str(WORKDIR / "query_embeddings.sqlite3")),
+        limiter=TokenRateLimiter(args.tpm),
+    )
+
+    # Replica without a snapshot: every chunk goes through the embedding API
+    started = time.perf_counter()
+    client = chromadb.PersistentClient(path=str(WORKDIR / "reembed_chroma"))
+    corpus = Corpus(client, manifest)
+    embedded = add_documents(corpus.collection(), entries, {}, embed)
+    reembed = time.perf_counter() - started
+    reembed_query = first_query(corpus, query_embed)
+
+    snapshot_dir = str(WORKDIR / "snapshot")
+    info = export_snapshot(corpus, snapshot_dir, "stub")
+
+    # Replica with a snapshot: verify, build the local index from the float16 vectors
+    started = time.perf_counter()
+    install_snapshot(snapshot_dir, lambda path: chromadb.PersistentClient(path=path), str(WORKDIR / "snapshots"))
+    paths = snapshot_paths(str(WORKDIR / "snapshots"), info["version"])
+    snapshot_corpus = Corpus(chromadb.PersistentClient(path=paths["index"]), paths["manifest"])
+    install = time.perf_counter() - started
+    install_query = first_query(snapshot_corpus, query_embed)
+    server.shutdown()
+
+    snapshot_bytes = sum(f.stat().st_size for f in pathlib.Path(snapshot_dir).rglob("*") if f.is_file())
+    print(json.dumps({
+        "documents": args.docs,
+        "chunks": info["chunks"],
+        "embedded_chunks": embedded,
+        "reembed_seconds": round(reembed + reembed_query, 2),
+        "snapshot_install_seconds": round(install + install_query, 2),
+        "speedup": round((reembed + reembed_query) / (install + install_query), 1),
+        "snapshot_mb": round(snapshot_bytes / 1e6, 2),
+        "float32_vectors_mb": round(info["chunks"] * info["dimensions"] * 4 / 1e6, 2),
+        "float16_vectors_mb": round(os.path.getsize(paths["embeddings"]) / 1e6, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/stub_openai.py
+#
+# Local stand-in for the OpenAI API used by the offline benchmarks. Serves
+# /v1/embeddings (deterministic hashed bag-of-words vectors, so retrieval still
+# ranks related text together) and /v1/chat/completions (plain or SSE streamed)
+# over keep-alive HTTP/1.1, with configurable request latency, per-token delay
+# and a one-off setup delay per new connection. Chat usage counts prompt words
+# as tokens and reports cached_tokens the way OpenAI's prefix cache does: the
+# longest previously seen prefix, from 1024 tokens in 128-token steps.
+#
+#   server, base_url = start_stub(latency=0.05)
+#   client = openai.OpenAI(api_key="stub", base_url=base_url)
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIMENSIONS = 256
+ANSWER = (
+    "Apply through the MOM eService at https://www.mom.gov.sg/passes-and-permits/work-permit-for-foreign-domestic-worker "
+    "after checking employer eligibility, then buy the security bond and medical insurance before the helper arrives."
+)
+_WORD = re.compile(r"\w+")
+PREFIX_CACHE_MIN_TOKENS = 1024
+PREFIX_CACHE_STEP = 128
+
+
+def stub_embedding(text: str) -> list:
+    vector = [0.0] * DIMENSIONS
+    for word in _WORD.findall(text.lower()):
+        digest = hashlib.blake2b(word.encode(), digest_size=4).digest()
+        vector[int.from_bytes(digest, "little") % DIMENSIONS] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True
+    latency = 0.05
+    token_delay = 0.0
+    handshake = 0.0
+    connections = 0
+    requests = 0
+    prefixes = set()
+    _lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self._lock:
+            type(self).connections += 1
+        time.sleep(self.handshake)
+
+    def _send_json(self, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chat_usage(self, body: dict, completion_tokens: int) -> dict:
+        words = [word for message in body["messages"] for word in [message["role"], *_WORD.findall(message["content"])]]
+        digest, keys = hashlib.blake2b(digest_size=16), {}
+        for i, word in enumerate(words, 1):
+            digest.update(word.encode() + b"\0")
+            if i >= PREFIX_CACHE_MIN_TOKENS and i % PREFIX_CACHE_STEP == 0:
+                keys[i] = digest.digest()
+        with self._lock:
+            cached = max((i for i, key in keys.items() if key in self.prefixes), default=0)
+            self.prefixes.update(keys.values())
+        return {
+            "prompt_tokens": len(words),
+            "completion_tokens": completion_tokens,
+            "total_tokens": len(words) + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self._lock:
+            type(self).requests += 1
+        time.sleep(self.latency)
+        if self.path.endswith("/embeddings"):
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            self._send_json({
+                "object": "list",
+                "model": body["model"],
+                "data": [{"index": i, "object": "embedding", "embedding": stub_embedding(t)} for i, t in enumerate(inputs)],
+                "usage": {"prompt_tokens": 8 * len(inputs), "total_tokens": 8 * len(inputs)},
+            })
+        elif body.get("stream"):
+            self._stream_completion(body)
+        else:
+            self._send_json({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": ANSWER}}],
+                "usage": self._chat_usage(body, len(ANSWER.split())),
+            })
+
+    def _stream_completion(self, body: dict):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(data: str):
+            payload = f"data: {data}\n\n".encode()
+            self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+            self.wfile.flush()
+
+        for word in ANSWER.split(" "):
+            time.sleep(self.token_delay)
+            send(json.dumps({
+                "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            send(json.dumps({
+                "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": body["model"], "choices": [],
+                "usage": self._chat_usage(body, len(ANSWER.split(" "))),
+            }))
+        send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def start_stub(latency: float = 0.05, token_delay: float = 0.0, handshake: float = 0.0):
+    """Starts the stub on a free port; returns (server, base_url). Call server.shutdown() when done."""
+    StubOpenAIHandler.latency = latency
+    StubOpenAIHandler.token_delay = token_delay
+    StubOpenAIHandler.handshake = handshake
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenAIHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1"
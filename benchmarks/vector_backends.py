@@ -0,0 +1,126 @@
+# benchmarks/vector_backends.py
+#
+# Chroma (PersistentClient: SQLite + HNSW) against the in-process NumPy
+# backend (Helpers/vector_backend.py) at increasing collection sizes. Every
+# (backend, size) runs in a fresh subprocess and reports the client import and
+# open time, build time (adds in the app's batch size), query latency p50/p95
+# over the whole collection and scoped to a few documents (as sessions query),
+# recall@10 against exact search, and RSS growth.
+#
+#   python benchmarks/vector_backends.py --sizes 1000 10000 100000 --dimensions 1536
+import argparse
+import json
+import os
+import pathlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+CHUNKS_PER_DOC = 200
+SCOPE_DOCS = 3
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def unit_vectors(rng, n: int, dimensions: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, dimensions), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run_backend(backend: str, size: int, args):
+    rng = np.random.default_rng(args.seed)
+    vectors = unit_vectors(rng, size, args.dimensions)
+    queries = unit_vectors(rng, args.queries, args.dimensions)
+    doc_hashes = [f"{doc:064x}" for doc in range(-(-size // CHUNKS_PER_DOC))]
+    ids = [f"{doc_hashes[i // CHUNKS_PER_DOC][-16:]}-{i}" for i in range(size)]
+    metadatas = [{"doc_hash": doc_hashes[i // CHUNKS_PER_DOC], "token_count": 200} for i in range(size)]
+    documents = [f"chunk {i}" for i in range(size)]
+    baseline = rss_mb()
+
+    started = time.perf_counter()
+    path = tempfile.mkdtemp(prefix=f"vector-{backend}-")
+    if backend == "chroma":
+        import chromadb
+        client = chromadb.PersistentClient(path=path)
+    else:
+        from Helpers.vector_backend import NumpyClient
+        client = NumpyClient(path, dtype=args.dtype)
+    collection = client.get_or_create_collection(name="doc_chunks", embedding_function=None)
+    open_seconds = time.perf_counter() - started
+
+    from Helpers.indexer import add_in_batches, scope_filter
+    started = time.perf_counter()
+    add_in_batches(collection, ids, documents, vectors, metadatas)
+    build_seconds = time.perf_counter() - started
+
+    rows = {}
+    for scoped in (False, True):
+        latencies, recalls = [], []
+        for query in queries:
+            keys = [doc_hashes[k] for k in rng.choice(len(doc_hashes), min(SCOPE_DOCS, len(doc_hashes)), replace=False)]
+            where = scope_filter({key: [] for key in keys}) if scoped else None
+            started = time.perf_counter()
+            found = collection.query(query_embeddings=[query.tolist()], n_results=10, where=where)["ids"][0]
+            latencies.append((time.perf_counter() - started) * 1000)
+            candidates = np.flatnonzero(np.isin([m["doc_hash"] for m in metadatas], keys)) if scoped else np.arange(size)
+            exact = {ids[i] for i in candidates[np.argsort(-(vectors[candidates] @ query))[:10]]}
+            recalls.append(len(exact & set(found)) / len(exact))
+        label = "scoped" if scoped else "all"
+        rows[f"{label}_p50_ms"] = round(percentile(latencies, 50), 2)
+        rows[f"{label}_p95_ms"] = round(percentile(latencies, 95), 2)
+        rows[f"{label}_recall_at_10"] = round(sum(recalls) / len(recalls), 3)
+
+    print(json.dumps({
+        "backend": backend if backend == "chroma" else f"numpy-{args.dtype}",
+        "chunks": size,
+        "dimensions": args.dimensions,
+        "open_seconds": round(open_seconds, 3),
+        "build_seconds": round(build_seconds, 2),
+        **rows,
+        "rss_growth_mb": round(rss_mb() - baseline, 1),
+    }), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy vector backend: build, query latency, memory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dtype", choices=("float32", "float16"), default="float32", help="numpy backend storage")
+    parser.add_argument("--backends", nargs="+", choices=("chroma", "numpy"), default=["chroma", "numpy"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--run", nargs=2, metavar=("BACKEND", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_backend(args.run[0], int(args.run[1]), args)
+        return
+    for size in args.sizes:
+        for backend in args.backends:
+            subprocess.run(
+                [sys.executable, __file__, "--run", backend, str(size), "--dimensions", str(args.dimensions),
+                 "--queries", str(args.queries), "--dtype", args.dtype, "--seed", str(args.seed)],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,4 @@
 import streamlit as st
-import os
-import uuid
-import re
 import sys
 import pathlib
 
@@ -13,8 +10,18 @@ if str(SRC_PATH) not in sys.path:
     sys.path.insert(0, str(SRC_PATH))
 
 from Helpers.utility import check_password_multi
+from Helpers.indexer import remove_documents
+from Helpers.lexical_index import BM25Index
+from Helpers import extraction
+from Helpers.chunking import DEFAULT_CHUNK_TOKENS, DEFAULT_OVERLAP_TOKENS
+from Helpers.chunk_browser import render_chunk_browser
+from Helpers.extraction_cache import file_hash, save_upload
+from Helpers.ingest_jobs import adopt_finished_jobs, session_owner
+from Helpers.ingest_pipeline import RAW_PREVIEW_CHARS
+from Helpers.resources import get_ingest_queue, get_metrics_server, get_openai_client, make_embedder, resolve_openai_api_key
 
 st.title("MDWHire Assistant — Document Upload")
+get_metrics_server()
 
 # ✅ Check login
 if not st.session_state.get("password_correct"):
@@ -25,60 +32,78 @@ else:
 
 if "uploaded_docs" not in st.session_state:
     st.session_state["uploaded_docs"] = []
+if "lexical_index" not in st.session_state:
+    st.session_state["lexical_index"] = BM25Index()
 
 # --- Helper Functions ---
-def clean_for_mvp(text):
-    text = re.sub(r"\d{1,2}/\d{1,2}/\d{2,4},? ?\d{1,2}:\d{2} ?[APM]{2}", " ", text)
-    text = re.sub(r"Page \d+ of \d+", " ", text)
-    text = re.sub(r"[^\w\s.,?!:;/=&%\-]", "", text)
-    text = re.sub(r"\s+", " ", text)
-    lines = [line.strip() for line in text.split("\n") if len(line.strip().split()) > 3]
-    return "\n".join(lines)
-
-def chunk_text(text, chunk_size):
-    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-
-def extract_text_from_file(file, filetype):
-    text = ""
-    try:
-        if filetype == "pdf":
-            try:
-                import pdfplumber
-                with pdfplumber.open(file) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text() or ""
-                        page_text = re.sub(r"[^\x00-\x7F]+", " ", page_text)
-                        text += page_text + "\n"
-            except ImportError:
-                st.error("❌ Missing dependency: `pdfplumber`. Run `pip install pdfplumber`.")
-        elif filetype == "docx":
-            try:
-                import docx
-                doc = docx.Document(file)
-                for para in doc.paragraphs:
-                    text += para.text + "\n"
-                    for run in para.runs:
-                        if "HYPERLINK" in run._element.xml:
-                            matches = re.findall(r'https://www\\.mom\\.gov\\.sg[^\s"]+', run._element.xml)
-                            for m in matches:
-                                text += f"\n{m}\n"
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            text += cell.text + "\n"
-            except ImportError:
-                st.error("❌ Missing dependency: `python-docx`. Run `pip install python-docx`.")
-        elif filetype == "txt":
-            text = file.read().decode("utf-8")
-    except Exception as e:
-        st.error(f"❌ Failed to extract text from file: {e}")
-    return text
+job_queue = get_ingest_queue()
+owner = session_owner(st.session_state)
+
+def show_finished_jobs(finished):
+    for job in finished:
+        if job.status == "failed":
+            if isinstance(job.error, ImportError):
+                st.error(f"❌ {job.error}")
+            else:
+                st.error(f"❌ Failed to process '{job.filename}': {job.error}")
+            continue
+        if job.warning:
+            st.warning(f"⚠️ {job.warning}")
+        st.success(f"✅ '{job.filename}' processed with {len(job.entry['chunks'])} chunks.")
+
+@st.fragment(run_every=1.0)
+def show_job_progress():
+    """Polls the background jobs without blocking the page; reruns the app once they are all finished."""
+    jobs = job_queue.jobs(owner)
+    if not any(job.active for job in jobs):
+        st.rerun()
+    for job in jobs:
+        done = job.progress
+        pages_total = max(job.page_count, 1)
+        if job.status == "queued":
+            st.progress(0.0, text=f"⏳ '{job.filename}' is queued")
+        elif job.cached:
+            st.progress(1.0, text=f"⚡ '{job.filename}' was extracted before — indexing cached chunks")
+        elif job.active:
+            fraction = done["extract"] / pages_total
+            if job.pipeline is not None and job.pipeline.embed_fn is not None:
+                fraction = (fraction + done["embed"] / max(done["chunk"], 1)) / 2
+            st.progress(
+                min(fraction, 1.0),
+                text=f"⚙️ '{job.filename}': {done['extract']}/{job.page_count} pages extracted • "
+                     f"{done['chunk']} chunks • {done['embed']} embedded",
+            )
+        else:
+            st.progress(1.0, text=f"✔️ '{job.filename}' finished")
 
 # --- Upload Logic ---
-mchunksize = st.slider("Select chunk size (characters)", 100, 1000, 300, step=50)
+mchunktokens = st.slider("Select chunk size (tokens)", 50, 800, DEFAULT_CHUNK_TOKENS, step=25)
+moverlaptokens = st.slider("Chunk overlap (tokens)", 0, 200, DEFAULT_OVERLAP_TOKENS, step=10)
+pdf_backend = st.selectbox(
+    "PDF extraction backend",
+    extraction.PDF_BACKENDS,
+    index=extraction.PDF_BACKENDS.index(extraction.DEFAULT_PDF_BACKEND),
+    help="pdfium/pypdf are fastest; table-heavy pages still fall back to pdfplumber.",
+)
+parallel_extraction = st.checkbox("Extract PDF pages in parallel", value=True)
+embed_on_upload = st.checkbox(
+    "Embed chunks while uploading",
+    value=True,
+    help="Embeds and indexes documents in the background so the Q&A page is ready as soon as you get there.",
+)
+
+upload_embedder = None
+if embed_on_upload and resolve_openai_api_key():
+    st.session_state["openai_client"] = get_openai_client(st.session_state["openai_api_key"])
+    upload_embedder = make_embedder(st.session_state["openai_client"])
 
 if st.button("🗑️ Reset uploaded files"):
+    indexed = st.session_state.get("indexed_docs", {})
+    remove_documents(indexed, list(indexed))
+    job_queue.discard(owner)
     st.session_state["uploaded_docs"] = []
+    st.session_state["lexical_index"] = BM25Index()
+    st.session_state["raw_previews"] = {}
     st.success("Session memory for uploaded files has been cleared. You may re-upload now.")
 
 uploaded_files = st.file_uploader("Upload up to 3 documents (PDF, Word, TXT)", type=["pdf", "docx", "txt"], accept_multiple_files=True)
@@ -87,10 +112,17 @@ if uploaded_files:
     if len(uploaded_files) > 3:
         st.error("⚠️ You can only upload a maximum of 3 files at once.")
     else:
+        queued_hashes = {job.file_hash for job in job_queue.jobs(owner)}
+        uploaded_hashes = {doc.get("file_sha256"): doc["filename"] for doc in st.session_state["uploaded_docs"]}
         for uploaded_file in uploaded_files:
             filename = uploaded_file.name
-            if any(doc["filename"] == filename for doc in st.session_state["uploaded_docs"]):
-                st.warning(f"⏩ File '{filename}' is already uploaded.")
+            data = uploaded_file.getvalue()
+            # Uploads are identified by content, so a renamed copy is still recognised
+            digest = file_hash(data)
+            if digest in queued_hashes:
+                continue
+            if digest in uploaded_hashes:
+                st.warning(f"⏩ File '{filename}' is already uploaded (as '{uploaded_hashes[digest]}').")
                 continue
 
             ext = filename.lower().split(".")[-1]
@@ -100,53 +132,45 @@ if uploaded_files:
                 st.error(f"❌ Unsupported file type for: {filename}")
                 continue
 
-            os.makedirs("data/uploaded_files", exist_ok=True)
-            save_path = os.path.join("data", "uploaded_files", filename)
-            with open(save_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Stored under its hash: same-named files never overwrite each other
+            save_upload(data, filetype, digest=digest)
             st.success(f"📁 File '{filename}' saved.")
 
-            with st.spinner(f"🔍 Extracting text from '{filename}'..."):
-                raw_text = extract_text_from_file(uploaded_file, filetype)
-
-            if not raw_text.strip():
-                st.warning(f"⚠️ No extractable text found in '{filename}'")
-                continue
-
-            cleaned = clean_for_mvp(raw_text)
-            chunks = chunk_text(cleaned, mchunksize)
-            if not chunks or all(not c.strip() for c in chunks):
-                st.error(f"❌ No valid chunks from '{filename}'")
-                continue
-
-            file_entry = {
-                "filename": filename,
-                "chunks": [
-                    {
-                        "chunk_id": str(uuid.uuid4()),
-                        "text": chunk,
-                        "source": filename
-                    } for chunk in chunks
-                ],
-                "source": "upload"
-            }
+            # Extraction, chunking and embedding continue in the background, even if the user leaves this page
+            job_queue.submit(
+                owner,
+                filename,
+                filetype,
+                data,
+                embed_fn=upload_embedder,
+                chunk_tokens=mchunktokens,
+                overlap_tokens=moverlaptokens,
+                pdf_backend=pdf_backend,
+                parallel=parallel_extraction,
+                digest=digest,
+            )
+
+show_finished_jobs(adopt_finished_jobs(st.session_state, job_queue))
+if job_queue.pending(owner):
+    st.info("⏳ Processing continues in the background — you can go to the Q&A page now.")
+    show_job_progress()
+
+if uploaded_files or st.session_state["uploaded_docs"]:
+    if st.button("Go to Q&A Page ➡️"):
+        st.switch_page("pages/2_QA.py")
 
-            st.session_state["uploaded_docs"].append(file_entry)
-            st.success(f"✅ '{filename}' processed with {len(chunks)} chunks.")
-
-        if st.button("Go to Q&A Page ➡️"):
-            st.switch_page("pages/2_QA.py")
-
-        for uploaded_file in uploaded_files:
-            filename = uploaded_file.name
-            st.subheader("📝 Raw Extract Preview")
-            st.code(raw_text[:1500] + ("..." if len(raw_text) > 1500 else ""))
-
-        for file_entry in st.session_state["uploaded_docs"][-len(uploaded_files):]:
-            st.subheader(f"🧩 All Chunks from `{file_entry['filename']}`")
-            for chunk in file_entry["chunks"]:
-                st.markdown(f"**{chunk['chunk_id']}**")
-                st.code(chunk["text"][:1000] + ("..." if len(chunk["text"]) > 1000 else ""))
+if uploaded_files:
+    current = {uploaded_file.name for uploaded_file in uploaded_files}
+    for filename, raw_preview in st.session_state.get("raw_previews", {}).items():
+        if filename in current:
+            st.subheader(f"📝 Raw Extract Preview — `{filename}`")
+            st.code(raw_preview + ("..." if len(raw_preview) >= RAW_PREVIEW_CHARS else ""))
+
+    for file_entry in st.session_state["uploaded_docs"]:
+        if file_entry["filename"] not in current:
+            continue
+        st.subheader(f"🧩 All Chunks from `{file_entry['filename']}`")
+        render_chunk_browser(file_entry["chunks"], key=f"upload_chunks_{file_entry['doc_hash'][:16]}")
 
 # Show uploaded files
 if st.session_state["uploaded_docs"]:
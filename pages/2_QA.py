@@ -1,35 +1,41 @@
-# --- Must come before chromadb import ---
-import sys
-try:
-    import pysqlite3
-    sys.modules["sqlite3"] = pysqlite3
-except ImportError:
-    pass  # fallback to system sqlite3 if not found
-
 import streamlit as st
-import openai
-import chromadb
-from chromadb.utils import embedding_functions
-import tiktoken
-import hashlib
-import time
+import logging
 import sys
 import os
-import re
 
 # Add src folder to sys path to import helpers
 sys.path.append(os.path.abspath("src"))
-from Helpers.filters import is_question_relevant, is_question_safe
-from Helpers.prompt_builder import build_prompt
+from Helpers.chunk_browser import render_chunk_browser
+from Helpers.ingest_jobs import adopt_finished_jobs, session_owner
+from Helpers.qa_engine import (
+    CONTEXT_TOKEN_BUDGET,
+    RETRIEVAL_MODES,
+    answer_question,
+    chunk_texts,
+    index_documents,
+    needs_indexing,
+    precompute_retrievals,
+)
+from Helpers.resources import (
+    get_answer_cache,
+    get_corpus,
+    get_embedding_cache,
+    get_faq_questions,
+    get_index_janitor,
+    get_ingest_queue,
+    get_metrics_server,
+    get_openai_client,
+    get_query_embedding_cache,
+    make_embedder,
+    resolve_openai_api_key,
+    warm_query_embeddings,
+)
 #from Helpers.prompt_builder import build_prompt_from_context, build_fallback_prompt
 
 # ------------------------------
 # 🔧 Constants
 # ------------------------------
-MODEL_COMPLETION = "gpt-4o-mini"
-MODEL_EMBEDDING = "text-embedding-3-small"
-CHROMA_PATH = ".chroma"
-CHUNK_COLLECTION_NAME = "doc_chunks"
+log = logging.getLogger(__name__)
 
 QUICK_QUESTIONS = [
     "Show me how to apply for a domestic helper in Singapore.",
@@ -37,141 +43,127 @@ QUICK_QUESTIONS = [
     "Where can I apply for a nanny or confinement helper online?"
 ]
 
-# ------------------------------
-# 🧠 Utility Functions
-# ------------------------------
-def count_tokens(text, model=MODEL_COMPLETION):
-    enc = tiktoken.encoding_for_model(model)
-    return len(enc.encode(text))
-
-def get_completion(prompt, model=MODEL_COMPLETION):
-    messages = [{"role": "user", "content": prompt}]
-    response = st.session_state["openai_client"].chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=0,
-    )
-    return response.choices[0].message.content
-
-def compute_chunks_hash(chunks):
-    text_data = "".join([chunk["text"] for chunk in chunks])
-    return hashlib.md5(text_data.encode("utf-8")).hexdigest()
-
 # ------------------------------
 # 📄 Document Embedding Processing
 # ------------------------------
 def process_uploaded_documents():
-    all_chunks = []
-    for doc in st.session_state["uploaded_docs"]:
-        all_chunks.extend(doc["chunks"])
-    st.session_state["all_chunks"] = all_chunks
-
-    current_hash = compute_chunks_hash(all_chunks)
-    previous_hash = st.session_state.get("doc_chunks_hash")
-
-    if previous_hash == current_hash and st.session_state.get("embedding_built"):
+    janitor = get_index_janitor()
+    if needs_indexing(st.session_state, janitor):
+        with st.spinner("🔄 Building embeddings..."):
+            index_documents(st.session_state, make_embedder(st.session_state["openai_client"]), janitor)
+    for filename in st.session_state.pop("expired_docs", []):
+        st.warning(f"⚠️ '{filename}' expired after a long idle period. Please upload it again.")
+
+def prepare_quick_questions():
+    # Quick-start and FAQ questions are embedded once per process in the background,
+    # then retrieved once per document set, so asking them needs neither an embedding
+    # call nor a search. Until the warm-up is done (or if it failed, see the log)
+    # they are answered the regular way.
+    questions = QUICK_QUESTIONS + get_faq_questions()
+    warmup = warm_query_embeddings(tuple(questions), st.session_state["openai_client"])
+    if not warmup.done() or warmup.exception() is not None:
         return
+    try:
+        precompute_retrievals(st.session_state, get_index_janitor(), questions, get_query_embedding_cache(), active_corpus())
+    except Exception:
+        log.exception("Precomputing retrievals for the quick-start/FAQ questions failed")
 
-    with st.spinner("🔄 Building embeddings..."):
-        chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
-        embedder = embedding_functions.OpenAIEmbeddingFunction(
-            api_key=st.session_state["openai_api_key"],
-            model_name=MODEL_EMBEDDING
-        )
-        collection = chroma_client.get_or_create_collection(
-            name=CHUNK_COLLECTION_NAME,
-            embedding_function=embedder
-        )
-        texts = [c["text"] for c in all_chunks]
-        metadatas = [{"chunk_id": c["chunk_id"]} for c in all_chunks]
-        ids = [c["chunk_id"] for c in all_chunks]
-
-        if len(collection.get(ids=ids)["ids"]) > 0:
-            collection.delete(ids=ids)
-
-        collection.add(documents=texts, metadatas=metadatas, ids=ids)
-        st.session_state["collection"] = collection
-        st.session_state["embedding_built"] = True
-        st.session_state["doc_chunks_hash"] = current_hash
+@st.fragment(run_every=1.0)
+def wait_for_uploads():
+    # Reruns the page as soon as the background upload jobs have finished
+    pending = get_ingest_queue().pending(session_owner(st.session_state))
+    if not pending:
+        st.rerun()
+    st.info(f"⏳ Still processing {len(pending)} uploaded document(s): " + ", ".join(job.filename for job in pending))
 
 # ------------------------------
 # 🔑 Handle Question
 # ------------------------------
-def handle_question(question):
-    try:
-        collection = st.session_state["collection"]
-        all_chunks = st.session_state["all_chunks"]
-
-        if (
-            "question_relevance" not in st.session_state or
-            st.session_state.get("last_checked_question") != question
-        ):
-            st.session_state["question_relevance"] = is_question_relevant(question)
-            st.session_state["question_safe"] = is_question_safe(question)
-            st.session_state["last_checked_question"] = question
-
-        if not st.session_state["question_safe"]:
-            st.error("❌ Question is unsafe or inappropriate.")
-            return
-
-        if not st.session_state["question_relevance"]:
-            st.warning("⚠️ Your question is not related to MDW topics.")
-            return
-
-        with st.spinner("🔍 Searching uploaded documents..."):
-            results = collection.query(query_texts=[question], n_results=10)
-            retrieved_chunks = results["documents"][0] if results["documents"] else []
-            context = "\n\n".join(retrieved_chunks).strip()
-            token_count = count_tokens(context)
-
-        urls_found = re.findall(r"https?://www\\.mom\\.gov\\.sg[\\w\\-\\./\\?#%&=]*", context)
-        prompt = build_prompt(question, context if retrieved_chunks else None)
-        answer = get_completion(prompt)
+def render_answer_stream(chunks):
+    # Render tokens as they arrive, then hand over to the regular answer view below
+    stream_box = st.empty()
+    with stream_box.container():
+        st.markdown("### ✅ Answer")
+        answer = st.write_stream(chunks)
+    stream_box.empty()
+    return answer
 
-        st.session_state["last_answer"] = (question, answer, urls_found, token_count, retrieved_chunks)
+def active_corpus():
+    # Searched when the user opts in, and always when there is nothing uploaded to search instead
+    if corpus is not None and (st.session_state.get("use_corpus", True) or not st.session_state.get("uploaded_docs")):
+        return corpus
+    return None
 
+def handle_question(question):
+    try:
+        result = answer_question(
+            st.session_state,
+            question,
+            st.session_state["openai_client"],
+            make_embedder(st.session_state["openai_client"]),
+            get_answer_cache(),
+            get_index_janitor(),
+            render_stream=render_answer_stream,
+            searching=lambda: st.spinner("🔍 Searching uploaded documents..."),
+            corpus=active_corpus(),
+            query_cache=get_query_embedding_cache(),
+        )
     except Exception as e:
         st.error(f"⚠️ Error during question processing: {e}")
+        return
+
+    if result["status"] == "unsafe":
+        st.error("❌ Question is unsafe or inappropriate.")
+    elif result["status"] == "irrelevant":
+        st.warning("⚠️ Your question is not related to MDW topics.")
 
 # ------------------------------
 # 🚀 Start App
 # ------------------------------
 st.title("MDWHire Assistant — Q&A")
+get_metrics_server()
 st.caption("Ask about Singapore MDW policies using uploaded documents with GenAI fallback.")
 
 if not st.session_state.get("password_correct"):
     st.error("You must log in first.")
     st.stop()
 
-if "openai_client" not in st.session_state:
-    with st.spinner("🔐 Waiting for OpenAI API key..."):
-        try:
-            max_wait, interval, waited = 30, 0.2, 0
-            while waited < max_wait:
-                api_key = st.session_state.get("openai_api_key", "").strip()
-                if api_key:
-                    st.session_state["openai_client"] = openai.OpenAI(api_key=api_key)
-                    break
-                time.sleep(interval)
-                waited += interval
-            if "openai_client" not in st.session_state:
-                st.warning("OpenAI API key missing. Please log in again.")
-                st.stop()
-        except Exception as e:
-            st.error(f"OpenAI setup failed: {e}")
-            st.stop()
+api_key = resolve_openai_api_key()
+if not api_key:
+    st.warning("OpenAI API key missing. Please log in again.")
+    st.stop()
+try:
+    st.session_state["openai_client"] = get_openai_client(api_key)
+except Exception as e:
+    st.error(f"OpenAI setup failed: {e}")
+    st.stop()
+
+for job in adopt_finished_jobs(st.session_state, get_ingest_queue()):
+    if job.status == "failed":
+        st.warning(f"⚠️ '{job.filename}' could not be processed: {job.error}")
+if get_ingest_queue().pending(session_owner(st.session_state)):
+    wait_for_uploads()
 
-if not st.session_state.get("uploaded_docs"):
-    st.error("Please upload at least one document first.")
+try:
+    corpus = get_corpus()
+except Exception as e:
+    st.warning(f"⚠️ Shared corpus unavailable: {e}")
+    corpus = None
+if not st.session_state.get("uploaded_docs") and corpus is None:
+    if not get_ingest_queue().pending(session_owner(st.session_state)):
+        st.error("Please upload at least one document first.")
     st.stop()
 
 try:
-    process_uploaded_documents()
+    if st.session_state.get("uploaded_docs"):
+        process_uploaded_documents()
     st.success("✅ Assistant is ready — ask a question.")
 except Exception as e:
     st.error(f"Failed to process uploaded documents: {e}")
     st.stop()
 
+prepare_quick_questions()
+
 # ------------------------------
 # 💡 Quick-start Buttons
 # ------------------------------
@@ -200,6 +192,32 @@ for i, q in enumerate(QUICK_QUESTIONS):
 # ------------------------------
 # 📝 Ask Your Question
 # ------------------------------
+st.toggle("⚡ Stream answers as they are generated", value=True, key="stream_answers")
+st.radio(
+    "Retrieval mode",
+    RETRIEVAL_MODES,
+    horizontal=True,
+    key="retrieval_mode",
+    help="Hybrid fuses vector and BM25 keyword rankings; lexical skips the embedding call entirely.",
+)
+st.slider(
+    "📏 Context token budget",
+    min_value=400,
+    max_value=4000,
+    value=CONTEXT_TOKEN_BUDGET,
+    step=200,
+    key="context_token_budget",
+    help="Retrieved chunks that are weak matches or repeat another chunk are left out; the rest fill up to this many tokens.",
+)
+st.toggle("⏱️ Show timing breakdown", value=False, key="show_timing_breakdown")
+if corpus is not None:
+    st.toggle(
+        f"📚 Include shared corpus ({len(corpus)} documents)",
+        value=True,
+        key="use_corpus",
+        disabled=not st.session_state.get("uploaded_docs"),
+    )
+
 submitted = False
 with st.form("qa_form"):
     st.markdown("### 🔊 Ask Your Question")
@@ -212,8 +230,11 @@ with st.form("qa_form"):
 
 if submitted and question.strip():
     st.session_state["user_question"] = question
-    with st.spinner("🤖 Generating answer..."):
+    if st.session_state.get("stream_answers", True):
         handle_question(question)
+    else:
+        with st.spinner("🤖 Generating answer..."):
+            handle_question(question)
 
 # ------------------------------
 # 🧠 Show Answer
@@ -225,7 +246,38 @@ if last and isinstance(last, tuple) and len(last) == 5:
         st.markdown(f"### 🖊️ Question\n{question}")
         st.markdown("### ✅ Answer")
         st.markdown(answer)
-        st.caption(f"📎 Used {len(retrieved_chunks)} chunks • Approx. {token_count} tokens")
+        cache_note = {
+            "exact": " • ⚡ Cached answer",
+            "similar": " • ⚡ Cached answer (similar question)",
+        }.get(st.session_state.get("last_answer_cache"), "")
+        st.caption(f"📎 Used {len(retrieved_chunks)} chunks • Approx. {token_count} tokens{cache_note}")
+        timing = st.session_state.get("last_answer_timing")
+        if timing and "total" in timing:
+            first_token = f"first token {timing['ttft']:.2f}s • " if "ttft" in timing else ""
+            st.caption(f"⏱️ {first_token}total {timing['total']:.2f}s")
+
+        trace = st.session_state.get("last_answer_trace")
+        if st.session_state.get("show_timing_breakdown") and trace:
+            st.markdown("#### ⏱️ Timing Breakdown")
+            st.table([
+                {"stage": stage, "ms": round(seconds * 1000, 1)} for stage, seconds in trace["stages"].items()
+            ])
+            tokens = trace["tokens"]
+            if tokens:
+                st.caption(
+                    f"🔢 {tokens['prompt']} prompt ({tokens.get('cached', 0)} cached) + "
+                    f"{tokens['completion']} completion tokens ({tokens['model']})"
+                )
+            embedding_requests = trace["counts"].get("embedding_requests", 0)
+            st.caption(f"🧠 {embedding_requests} embedding API call(s) for this question")
+            if trace["counts"].get("precomputed_retrievals"):
+                st.caption("💡 Retrieval was precomputed for this question")
+            counts = trace["counts"]
+            if "dropped_duplicate" in counts:
+                st.caption(
+                    f"✂️ Left out {counts['dropped_below_cutoff']} weak, {counts['dropped_duplicate']} duplicate "
+                    f"and {counts['dropped_over_budget']} over-budget chunk(s)"
+                )
 
         if urls:
             st.markdown("#### 🔗 MOM Links Found in Document Context")
@@ -233,7 +285,7 @@ if last and isinstance(last, tuple) and len(last) == 5:
                 st.markdown(f"{i+1}. {u}")
 
         with st.expander("📖 Sample Document Snippets", expanded=False):
-            for i, chunk in enumerate(retrieved_chunks[:3]):
+            for i, chunk in enumerate(chunk_texts(st.session_state, retrieved_chunks[:3], corpus)):
                 st.markdown(f"**Chunk {i+1}**")
                 st.code(chunk[:500])
     except Exception:
@@ -246,11 +298,28 @@ else:
 # ------------------------------
 with st.expander("ℹ️ Upload Details", expanded=False):
     try:
-        st.metric("📃 Total Document Chunks", len(st.session_state["all_chunks"]))
+        st.metric("📃 Total Document Chunks", len(st.session_state.get("all_chunks", [])))
+        if corpus is not None:
+            st.caption(f"📚 Shared corpus: {len(corpus)} documents • {len(corpus.lexical_index.chunks)} chunks")
+        cache_stats = get_embedding_cache().stats()
+        st.caption(
+            f"🗄️ Embedding cache: {cache_stats['entries']} vectors • "
+            f"{cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate)"
+        )
+        query_stats = get_query_embedding_cache().stats()
+        st.caption(
+            f"💡 Query embeddings: {query_stats['entries']} cached questions • "
+            f"{query_stats['hits']} hits / {query_stats['misses']} misses"
+        )
+        index_stats = get_index_janitor().stats()
+        st.caption(
+            f"🧹 Vector index: {index_stats['vectors']} vectors in {index_stats['namespaces']} documents • "
+            f"{index_stats['disk_bytes'] / 1e6:.1f} MB on disk • "
+            f"idle documents expire after {index_stats['ttl_seconds'] / 3600:g} h"
+        )
         st.markdown("### 📃 All Uploaded Chunks")
-        for chunk in st.session_state["all_chunks"]:
-            st.markdown(f"**{chunk['source']}** — `{chunk['chunk_id']}`")
-            st.code(chunk["text"][:1000] + ("..." if len(chunk["text"]) > 1000 else ""))
+        render_chunk_browser(st.session_state.get("all_chunks", []), key="qa_chunks")
     except Exception:
         st.warning("⚠️ Unable to show chunk details.")
 
@@ -0,0 +1,132 @@
+# src/Helpers/answer_cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+# Answers are shared across sessions in SQLite and scoped by (document set hash,
+# model, prompt version, retrieval settings), so a new upload, prompt change or
+# different retrieval mode / context budget never serves an answer built otherwise.
+# Inside a scope a question hits either exactly (after normalisation) or through a
+# query embedding whose cosine similarity clears the configured threshold.
+
+DEFAULT_ANSWER_CACHE_PATH = os.path.join("data", "cache", "answers.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5_000
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalise_question(question: str) -> str:
+    question = _PUNCTUATION.sub(" ", question.lower())
+    return _WHITESPACE.sub(" ", question).strip()
+
+
+def _scope(doc_hash: str, model: str, prompt_version: str, retrieval: str) -> str:
+    return hashlib.sha256(f"{doc_hash}|{model}|{prompt_version}|{retrieval}".encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    def __init__(self, path: str = DEFAULT_ANSWER_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                scope TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding BLOB,
+                payload TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (scope, question)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers (last_used)")
+
+    def get_exact(self, question: str, doc_hash: str, model: str, prompt_version: str, retrieval: str = ""):
+        scope = _scope(doc_hash, model, prompt_version, retrieval)
+        with self._lock:
+            self._expire()
+            row = self._conn.execute(
+                "SELECT payload FROM answers WHERE scope = ? AND question = ?",
+                (scope, normalise_question(question)),
+            ).fetchone()
+            if row is None:
+                return None
+            self._touch(scope, normalise_question(question))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def get_similar(self, query_embedding, doc_hash: str, model: str, prompt_version: str, retrieval: str = ""):
+        """Returns the payload of the most similar cached question above the threshold, or None."""
+        scope = _scope(doc_hash, model, prompt_version, retrieval)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question, embedding, payload FROM answers WHERE scope = ? AND embedding IS NOT NULL",
+                (scope,),
+            ).fetchall()
+            if rows:
+                matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob, _ in rows])
+                query = np.asarray(query_embedding, dtype=np.float32)
+                scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    self._touch(scope, rows[best][0])
+                    self.similar_hits += 1
+                    return json.loads(rows[best][2])
+            self.misses += 1
+            return None
+
+    def put(self, question: str, doc_hash: str, model: str, prompt_version: str, payload: dict, query_embedding=None,
+            retrieval: str = ""):
+        now = time.time()
+        blob = None if query_embedding is None else np.asarray(query_embedding, dtype=np.float32).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (scope, question, embedding, payload, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (_scope(doc_hash, model, prompt_version, retrieval), normalise_question(question), blob, json.dumps(payload), now, now),
+            )
+            self._evict()
+
+    def _touch(self, scope: str, question: str):
+        self._conn.execute(
+            "UPDATE answers SET last_used = ? WHERE scope = ? AND question = ?", (time.time(), scope, question)
+        )
+
+    def _expire(self):
+        self._conn.execute("DELETE FROM answers WHERE created < ?", (time.time() - self.ttl_seconds,))
+
+    def _evict(self):
+        self._expire()
+        overflow = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM answers WHERE rowid IN (SELECT rowid FROM answers ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "similar_hits": self.similar_hits, "misses": self.misses}
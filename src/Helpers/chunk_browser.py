@@ -0,0 +1,54 @@
+# src/Helpers/chunk_browser.py
+import streamlit as st
+
+from Helpers.chunk_store import read_chunk_text
+
+# Chunk previews for the upload and Q&A pages. Nothing is rendered until the
+# user asks for it, and then only one page of chunks; the browser runs as a
+# fragment, so paging and searching rerun just this widget, not the whole page.
+
+PAGE_SIZES = (10, 25, 50, 100)
+PREVIEW_CHARS = 1000
+
+
+def search_chunks(chunks: list, query: str) -> list:
+    """Chunks whose text, source or id contains every word of query (case-insensitive)."""
+    words = query.lower().split()
+    if not words:
+        return chunks
+    return [
+        chunk for chunk in chunks
+        if all(word in f"{read_chunk_text(chunk)} {chunk.get('source', '')} {chunk['chunk_id']}".lower() for word in words)
+    ]
+
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
+
+
+@st.fragment
+def render_chunk_browser(chunks: list, key: str, label: str = "chunks"):
+    if not st.toggle(f"🔍 Browse {len(chunks)} {label}", value=False, key=f"{key}_open"):
+        return
+
+    search_col, size_col = st.columns([3, 1])
+    query = search_col.text_input("Search chunks", key=f"{key}_query", placeholder="Words to find in chunk text")
+    page_size = size_col.selectbox("Per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    matches = search_chunks(chunks, query)
+    pages = page_count(len(matches), page_size)
+    # A new search or page size can leave the remembered page out of range
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    start = (page - 1) * page_size
+    shown = matches[start:start + page_size]
+    if not shown:
+        st.caption("No chunks match this search.")
+        return
+    st.caption(f"Showing {start + 1}–{start + len(shown)} of {len(matches)} matching chunks")
+    for chunk in shown:
+        st.markdown(f"**{chunk.get('source', '')}** — `{chunk['chunk_id']}`")
+        text = read_chunk_text(chunk)
+        st.code(text[:PREVIEW_CHARS] + ("..." if len(text) > PREVIEW_CHARS else ""))
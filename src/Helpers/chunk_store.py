@@ -0,0 +1,131 @@
+# src/Helpers/chunk_store.py
+import collections
+import functools
+import mmap
+import os
+import threading
+import uuid
+
+# Cleaned document text lives once on disk, named by its sha256 (the doc_hash
+# the ingestion pipeline already computes), and is read back through mmap so
+# every session shares the same page-cache copy. Session state keeps chunk
+# dicts with only ids, byte spans and token counts; `read_chunk_text` loads
+# the text when it is actually needed (embedding, BM25, prompting, display).
+# Chunk dicts that still carry "text" (benchmarks, older sessions) are used as-is.
+
+DEFAULT_STORE_PATH = os.getenv("CHUNK_STORE_PATH", os.path.join("data", "chunk_store"))
+MAX_OPEN_DOCUMENTS = 64
+
+
+class DocumentWriter:
+    """Streams a document's cleaned pieces to a temp file; commit() files it under its hash."""
+
+    def __init__(self, store: "ChunkStore"):
+        self.store = store
+        self._tmp = os.path.join(store.root, "tmp", f"{uuid.uuid4().hex}.txt")
+        os.makedirs(os.path.dirname(self._tmp), exist_ok=True)
+        self._file = open(self._tmp, "wb")
+
+    def write(self, text: str):
+        self._file.write(text.encode("utf-8"))
+
+    def commit(self, doc_hash: str) -> str:
+        path = self.store.path(doc_hash)
+        if self._file.closed:
+            return path
+        self._file.close()
+        if os.path.exists(path):
+            # Same content already stored (re-upload, or another session); the new
+            # mtime tells the janitor it is in use again
+            os.remove(self._tmp)
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp, path)
+        return path
+
+    def discard(self):
+        if not self._file.closed:
+            self._file.close()
+            os.remove(self._tmp)
+
+
+class ChunkStore:
+    def __init__(self, root: str = DEFAULT_STORE_PATH, max_open: int = MAX_OPEN_DOCUMENTS):
+        self.root = root
+        self.max_open = max_open
+        self._maps = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, doc_hash: str) -> str:
+        return os.path.join(self.root, doc_hash[:2], f"{doc_hash}.txt")
+
+    def has(self, doc_hash: str) -> bool:
+        return os.path.exists(self.path(doc_hash))
+
+    def writer(self) -> DocumentWriter:
+        return DocumentWriter(self)
+
+    def remove(self, doc_hash: str, unused_since: float = None) -> bool:
+        """Deletes a stored document, unless it was written after unused_since."""
+        path = self.path(doc_hash)
+        with self._lock:
+            try:
+                if unused_since is not None and os.path.getmtime(path) >= unused_since:
+                    return False
+                os.remove(path)
+            except FileNotFoundError:
+                return False
+            mapped = self._maps.pop(doc_hash, None)
+            if mapped is not None:
+                mapped.close()
+        return True
+
+    def _map(self, doc_hash: str):
+        # Called with self._lock held: eviction closes maps, so a map is only
+        # used while the lock keeps it open
+        mapped = self._maps.get(doc_hash)
+        if mapped is not None:
+            self._maps.move_to_end(doc_hash)
+            return mapped
+        with open(self.path(doc_hash), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[doc_hash] = mapped
+        if len(self._maps) > self.max_open:
+            self._maps.popitem(last=False)[1].close()
+        return mapped
+
+    def _bytes(self, doc_hash: str, start: int = None, end: int = None) -> bytes:
+        # The slice is a copy, so it stays valid after the lock is released
+        with self._lock:
+            return self._map(doc_hash)[start:end]
+
+    def read(self, doc_hash: str, start: int, end: int) -> str:
+        return self._bytes(doc_hash, start, end).decode("utf-8")
+
+    def spans(self, doc_hash: str, chunks: list) -> list:
+        """Byte (start, end) of each chunk's char offsets into the stored document."""
+        data = self._bytes(doc_hash)
+        if data.isascii():
+            return [(chunk["start"], chunk["end"]) for chunk in chunks]
+        text = data.decode("utf-8")
+        # Walk the offsets in order, encoding each stretch of text once
+        positions = sorted({p for chunk in chunks for p in (chunk["start"], chunk["end"])})
+        byte_at, previous, total = {}, 0, 0
+        for position in positions:
+            total += len(text[previous:position].encode("utf-8"))
+            byte_at[position] = total
+            previous = position
+        return [(byte_at[chunk["start"]], byte_at[chunk["end"]]) for chunk in chunks]
+
+
+@functools.lru_cache(maxsize=None)
+def get_chunk_store(root: str = DEFAULT_STORE_PATH) -> ChunkStore:
+    return ChunkStore(root)
+
+
+def read_chunk_text(chunk: dict) -> str:
+    if "text" in chunk:
+        return chunk["text"]
+    start, end = chunk["span"]
+    return get_chunk_store().read(chunk["doc_hash"], start, end)
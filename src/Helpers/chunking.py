@@ -0,0 +1,132 @@
+# src/Helpers/chunking.py
+import functools
+import re
+
+_DATE_STAMP = re.compile(r"\d{1,2}/\d{1,2}/\d{2,4},? ?\d{1,2}:\d{2} ?[APM]{2}")
+_PAGE_FOOTER = re.compile(r"Page \d+ of \d+")
+_DISALLOWED = re.compile(r"[^\w\s.,?!:;/=&%\-]")
+_WHITESPACE = re.compile(r"\s+")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+TOKENIZER_MODEL = "gpt-4o-mini"
+# Bump when cleaning or chunking output changes, so cached extractions are not reused
+CLEANER_VERSION = "1"
+CHUNKER_VERSION = "1"
+DEFAULT_CHUNK_TOKENS = 200
+DEFAULT_OVERLAP_TOKENS = 30
+
+
+def clean_page(text: str) -> str:
+    text = _DATE_STAMP.sub(" ", text)
+    text = _PAGE_FOOTER.sub(" ", text)
+    text = _DISALLOWED.sub("", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def iter_clean(pages):
+    """Streaming clean_for_mvp (the baseline in benchmarks/baseline_chunking.py): yields cleaned
+    pieces whose " "-join equals clean_for_mvp("\\n".join(pages)) (up to date stamps or footers
+    split across a page break)."""
+    held, words = [], 0
+    for page in pages:
+        piece = clean_page(page)
+        if not piece:
+            continue
+        if words > 3:
+            yield piece
+            continue
+        # clean_for_mvp drops documents of three words or fewer, so hold back until we know
+        held.append(piece)
+        words += len(piece.split())
+        if words > 3:
+            yield from held
+            held = []
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(model: str = TOKENIZER_MODEL):
+    # encoding_for_model loads the BPE ranks from disk; do it once per process
+    import tiktoken
+    return tiktoken.encoding_for_model(model)
+
+
+def count_tokens(text: str, model: str = TOKENIZER_MODEL) -> int:
+    return len(get_encoder(model).encode_ordinary(text))
+
+
+def _iter_sentences(pieces):
+    """Yields (start, end, text) for each sentence of the " "-join of pieces."""
+    buffer, base, first = "", 0, True
+    for piece in pieces:
+        buffer += piece if first else " " + piece
+        first = False
+        pos = 0
+        # The trailing sentence stays buffered until a break after it is seen
+        for match in _SENTENCE_BREAK.finditer(buffer):
+            yield base + pos, base + match.start(), buffer[pos:match.start()]
+            pos = match.end()
+        buffer = buffer[pos:]
+        base += pos
+    if buffer.strip():
+        yield base, base + len(buffer), buffer
+
+
+def _split_long(start: int, text: str, tokens: int, max_tokens: int, encoder):
+    """Cuts a sentence longer than max_tokens at word boundaries."""
+    chars_per_token = len(text) / tokens
+    pos = 0
+    while pos < len(text):
+        target = max(1, int(max_tokens * chars_per_token))
+        while True:
+            cut = len(text) if pos + target >= len(text) else text.rfind(" ", pos + 1, pos + target + 1)
+            if cut <= pos:
+                cut = min(len(text), pos + target)
+            part_tokens = len(encoder.encode_ordinary(text[pos:cut]))
+            if part_tokens <= max_tokens or target == 1:
+                break
+            target = max(1, int(target * 0.8))
+        yield start + pos, start + cut, text[pos:cut], part_tokens
+        pos = cut + 1 if cut < len(text) and text[cut] == " " else cut
+
+
+def iter_token_chunks(pieces, max_tokens: int = DEFAULT_CHUNK_TOKENS, overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+                      model: str = TOKENIZER_MODEL):
+    """Packs whole sentences of the " "-join of pieces into chunks of at most max_tokens.
+
+    Yields dicts with start/end offsets into the joined text, the chunk text and its
+    token count (the sum of its sentences' counts). Consecutive chunks share up to
+    overlap_tokens worth of trailing sentences. Cleaned text has no paragraph breaks
+    left, so sentence ends are the only boundaries; over-long sentences are cut
+    between words.
+    """
+    encoder = get_encoder(model)
+    window, total = [], 0
+
+    def emit():
+        parts = []
+        for i, (start, end, text, _) in enumerate(window):
+            parts.append(text)
+            if i + 1 < len(window):
+                # Whitespace in cleaned text is always single spaces
+                parts.append(" " * (window[i + 1][0] - end))
+        return {"start": window[0][0], "end": window[-1][1], "text": "".join(parts), "token_count": total}
+
+    for start, end, text in _iter_sentences(pieces):
+        tokens = len(encoder.encode_ordinary(text))
+        units = [(start, end, text, tokens)] if tokens <= max_tokens else _split_long(start, text, tokens, max_tokens, encoder)
+        for unit in units:
+            if window and total + unit[3] > max_tokens:
+                yield emit()
+                tail, tail_tokens = [], 0
+                for previous in reversed(window):
+                    if tail_tokens + previous[3] > overlap_tokens:
+                        break
+                    tail.insert(0, previous)
+                    tail_tokens += previous[3]
+                window, total = tail, tail_tokens
+                while window and total + unit[3] > max_tokens:
+                    total -= window.pop(0)[3]
+            window.append(unit)
+            total += unit[3]
+    if window:
+        yield emit()
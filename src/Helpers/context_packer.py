@@ -0,0 +1,72 @@
+# src/Helpers/context_packer.py
+import re
+
+# Retrieval returns a fixed number of candidates whatever their quality, and
+# neighbouring chunks repeat each other's overlap sentences. pack_context keeps
+# the candidates whose similarity is close to the best match, drops ones that
+# mostly repeat a chunk already kept, and stops at a token budget, summing the
+# token counts stored with each chunk instead of re-tokenizing the prompt.
+
+DEFAULT_TOKEN_BUDGET = 1200
+# Cosine similarity floor, and how far below the best candidate a chunk may fall
+MIN_SIMILARITY = 0.2
+SIMILARITY_MARGIN = 0.15
+# Share of a chunk's word shingles already present in a kept chunk. Chunk
+# overlap sentences alone stay well below this; re-uploaded or re-issued
+# documents and repeated boilerplate pages come close to 1
+DUPLICATE_OVERLAP = 0.8
+SHINGLE_WORDS = 4
+
+_WORD = re.compile(r"\w+")
+
+
+def similarity_from_distance(distance: float) -> float:
+    """Cosine similarity from the squared L2 distance between unit vectors."""
+    return 1.0 - distance / 2.0
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def overlap(a: set, b: set) -> float:
+    """Containment of the smaller shingle set in the larger one."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def pack_context(candidates, token_budget: int = DEFAULT_TOKEN_BUDGET, min_similarity: float = MIN_SIMILARITY,
+                 similarity_margin: float = SIMILARITY_MARGIN, duplicate_overlap: float = DUPLICATE_OVERLAP):
+    """Selects chunks from candidates, best first; returns (kept, dropped).
+
+    candidates are [(chunk_id, text, token_count, similarity)] in ranking order,
+    with similarity None for keyword-only matches (those skip the cutoff). kept
+    holds the selected tuples in the same order; dropped counts the rest by
+    reason: "below_cutoff", "duplicate" and "over_budget". The top candidate is
+    always kept, so a question never loses its best match to the cutoff or budget.
+    """
+    similarities = [similarity for _, _, _, similarity in candidates if similarity is not None]
+    cutoff = max(min_similarity, max(similarities) - similarity_margin) if similarities else None
+    kept, kept_shingles = [], []
+    dropped = {"below_cutoff": 0, "duplicate": 0, "over_budget": 0}
+    used = 0
+    for candidate in candidates:
+        _, text, tokens, similarity = candidate
+        if kept and cutoff is not None and similarity is not None and similarity < cutoff:
+            dropped["below_cutoff"] += 1
+            continue
+        candidate_shingles = shingles(text)
+        if any(overlap(candidate_shingles, seen) >= duplicate_overlap for seen in kept_shingles):
+            dropped["duplicate"] += 1
+            continue
+        if kept and used + tokens > token_budget:
+            dropped["over_budget"] += 1
+            continue
+        kept.append(candidate)
+        kept_shingles.append(candidate_shingles)
+        used += tokens
+    return kept, dropped
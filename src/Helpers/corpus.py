@@ -0,0 +1,97 @@
+# src/Helpers/corpus.py
+import hashlib
+import json
+import os
+
+from Helpers.indexer import make_chunk_id
+from Helpers.lexical_index import BM25Index
+
+# A shared corpus is built offline by src/ingest.py into its own vector
+# collection, next to a JSONL manifest with one line per indexed document. The
+# manifest is also the ingest checkpoint. Sessions query the corpus read-only
+# alongside their own uploads, so it costs them no indexing time; chunk text is
+# read from the chunk store like for uploads.
+
+DEFAULT_MANIFEST_PATH = os.path.join("data", "corpus", "manifest.jsonl")
+DEFAULT_CORPUS_ROOT = os.path.join("data", "documents")
+CORPUS_COLLECTION_NAME = "corpus_chunks"
+
+
+def read_manifest(path: str = DEFAULT_MANIFEST_PATH) -> list:
+    """Manifest records in file order; a torn last line (interrupted run) is ignored."""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def append_manifest(path: str, record: dict):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def manifest_record(path: str, file_sha256: str, key: str, doc_hash: str, page_count: int, chunks: list) -> dict:
+    """chunks are dicts with start/end (char offsets), span (bytes) and token_count."""
+    return {
+        "path": path,
+        "file_sha256": file_sha256,
+        "extraction_key": key,
+        "doc_hash": doc_hash,
+        "page_count": page_count,
+        # [start, end, span start, span end, token count] per chunk, as in the extraction cache
+        "chunks": [[chunk["start"], chunk["end"], *chunk["span"], chunk["token_count"]] for chunk in chunks],
+    }
+
+
+def corpus_entry(record: dict) -> dict:
+    """The uploaded_docs-style entry for one manifest record."""
+    doc_hash = record["doc_hash"]
+    return {
+        "filename": record["path"],
+        "doc_hash": doc_hash,
+        "chunks": [
+            {
+                "chunk_id": make_chunk_id(doc_hash, start, end),
+                "doc_hash": doc_hash,
+                "span": (span_start, span_end),
+                "token_count": tokens,
+                "source": record["path"],
+            }
+            for start, end, span_start, span_end, tokens in record["chunks"]
+        ],
+        "source": "corpus",
+    }
+
+
+class Corpus:
+    """Read-only view of an ingested corpus: its documents, BM25 index and vector collection."""
+
+    def __init__(self, client, manifest_path: str = DEFAULT_MANIFEST_PATH,
+                 collection_name: str = CORPUS_COLLECTION_NAME):
+        self.client = client
+        self.collection_name = collection_name
+        # The same content found under several paths is kept once
+        records = {record["doc_hash"]: record for record in reversed(read_manifest(manifest_path))}
+        self.records = list(reversed(list(records.values())))
+        self.documents = [corpus_entry(record) for record in self.records]
+        self.lexical_index = BM25Index()
+        for doc in self.documents:
+            self.lexical_index.add_document(doc["doc_hash"], doc["chunks"])
+        # Part of the answer-cache scope, so answers are not reused across corpus rebuilds
+        self.version = hashlib.md5("\n".join(doc["doc_hash"] for doc in self.documents).encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def collection(self):
+        return self.client.get_or_create_collection(name=self.collection_name, embedding_function=None)
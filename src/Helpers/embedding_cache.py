@@ -0,0 +1,146 @@
+# src/Helpers/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from Helpers import metrics
+
+DEFAULT_CACHE_PATH = os.path.join("data", "cache", "embeddings.sqlite3")
+DEFAULT_MAX_ENTRIES = 200_000
+_SQL_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(vector) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> list:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class EmbeddingCache:
+    """On-disk embedding store keyed by (model, sha256(text)) with LRU eviction."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)")
+
+    def get_many(self, model: str, texts: list) -> list:
+        """Returns one vector per text, or None where the cache has no entry."""
+        hashes = [text_hash(t) for t in texts]
+        found = {}
+        with self._lock:
+            unique = list(dict.fromkeys(hashes))
+            for i in range(0, len(unique), _SQL_BATCH):
+                batch = unique[i:i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                found.update({h: _unpack(blob) for h, blob in rows})
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+
+            results = [found.get(h) for h in hashes]
+            hit_count = sum(r is not None for r in results)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, model: str, texts: list, vectors: list):
+        now = time.time()
+        rows = [(model, text_hash(t), _pack(v), now) for t, v in zip(texts, vectors)]
+        with self._lock:
+            # Takes the write lock up front, so a busy database fails here rather than
+            # mid-batch; anything that fails after BEGIN is rolled back, or the open
+            # transaction would make every later BEGIN on this connection fail
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._evict()
+
+    def _evict(self):
+        size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.size(),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def embed_with_cache(texts: list, model: str, embed_fn, cache: EmbeddingCache) -> list:
+    """Embeds texts, calling embed_fn only for cache misses (each unique text once)."""
+    vectors = cache.get_many(model, texts)
+    missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+    hits = sum(v is not None for v in vectors)
+    metrics.METRICS.inc("embedding_cache_hits_total", hits, "Embedding cache hits", model=model)
+    metrics.METRICS.inc("embedding_cache_misses_total", len(texts) - hits, "Embedding cache misses", model=model)
+    metrics.count("embedding_cache_hits", hits)
+    metrics.count("embedding_cache_misses", len(texts) - hits)
+    if missing:
+        new_vectors = embed_fn(missing)
+        cache.put_many(model, missing, new_vectors)
+        fresh = dict(zip(missing, new_vectors))
+        vectors = [v if v is not None else fresh[t] for t, v in zip(texts, vectors)]
+    return vectors
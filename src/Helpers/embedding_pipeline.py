@@ -0,0 +1,144 @@
+# src/Helpers/embedding_pipeline.py
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Helpers import metrics
+
+# Limits for text-embedding-3-small: 2048 inputs and ~300k tokens per request.
+# Smaller batches keep several requests in flight without long tail latency.
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_BATCH_TOKENS = 60_000
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+DEFAULT_MAX_RETRIES = 6
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; good enough for batching and rate limiting
+    return max(1, len(text) // 4)
+
+
+def make_batches(texts: list, batch_size: int = DEFAULT_BATCH_SIZE, batch_tokens: int = DEFAULT_BATCH_TOKENS):
+    """Yields (start, end) index ranges bounded by item count and estimated tokens."""
+    start, tokens = 0, 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if i > start and (i - start >= batch_size or tokens + cost > batch_tokens):
+            yield start, i
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        yield start, len(texts)
+
+
+class TokenRateLimiter:
+    """Token bucket for tokens-per-minute limits, with adaptive rate on 429s."""
+
+    def __init__(self, tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE):
+        self.capacity = tokens_per_minute
+        self.max_rate = tokens_per_minute / 60.0
+        self.rate = self.max_rate
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: int):
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def slow_down(self):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.rate * 0.5, self.max_rate / 16)
+            self._tokens = 0.0
+
+    def speed_up(self):
+        with self._lock:
+            self.rate = min(self.rate * 1.1, self.max_rate)
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def _retry_after(exc: Exception):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _embed_with_backoff(texts, embed_batch_fn, limiter, max_retries):
+    limiter.acquire(sum(estimate_tokens(t) for t in texts))
+    for attempt in range(max_retries + 1):
+        try:
+            vectors = embed_batch_fn(texts)
+            limiter.speed_up()
+            return vectors
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == max_retries:
+                raise
+            limiter.slow_down()
+            delay = _retry_after(e) or min(30.0, 0.5 * 2 ** attempt)
+            time.sleep(delay * (1 + random.random() * 0.25))
+
+
+def embed_concurrently(
+    texts: list,
+    embed_batch_fn,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    limiter: TokenRateLimiter = None,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> list:
+    """Embeds texts in batches across a bounded worker pool; vectors keep input order."""
+    if not texts:
+        return []
+    limiter = limiter or TokenRateLimiter()
+    ranges = list(make_batches(texts, batch_size, batch_tokens))
+    vectors = [None] * len(texts)
+
+    def run(bounds):
+        start, end = bounds
+        vectors[start:end] = _embed_with_backoff(texts[start:end], embed_batch_fn, limiter, max_retries)
+
+    if len(ranges) == 1 or max_workers <= 1:
+        for bounds in ranges:
+            run(bounds)
+    else:
+        # Each batch runs in a copy of the caller's context so the active trace still counts its requests
+        contexts = [contextvars.copy_context() for _ in ranges]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(ranges))) as pool:
+            # list() re-raises the first failed batch
+            list(pool.map(lambda context, bounds: context.run(run, bounds), contexts, ranges))
+    return vectors
+
+
+def openai_embed_batch(client, model: str):
+    def embed(texts):
+        response = client.embeddings.create(model=model, input=texts)
+        tokens = response.usage.total_tokens if response.usage else 0
+        metrics.METRICS.inc("embedding_requests_total", 1, "Embedding API requests", model=model)
+        metrics.METRICS.inc("embedding_inputs_total", len(texts), "Texts sent to the embedding API", model=model)
+        metrics.METRICS.inc("embedding_tokens_total", tokens, "Embedding API token usage", model=model)
+        metrics.count("embedding_requests")
+        metrics.count("embedding_tokens", tokens)
+        return [item.embedding for item in response.data]
+    return embed
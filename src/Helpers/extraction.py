@@ -0,0 +1,176 @@
+# src/Helpers/extraction.py
+import importlib
+import io
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# "pdfium" and "pypdf" are much faster than pdfplumber; pages that look like
+# tables are still re-extracted with pdfplumber, which keeps cell layout better.
+PDF_BACKENDS = ("pdfium", "pypdf", "pdfplumber")
+DEFAULT_PDF_BACKEND = "pdfium"
+
+# Bump when extraction output changes, so cached extractions are not reused
+EXTRACTOR_VERSION = "1"
+
+# Below this many pages the process pool start-up costs more than it saves
+# (spawned workers each import the extraction backends, about a second in all)
+PARALLEL_MIN_PAGES = 64
+
+# Workers are spawned, not forked: the parent runs Streamlit, Chroma and HTTP
+# client threads, and forking while one of them holds a lock can deadlock the
+# child. Spawned workers import this module fresh, so the worker function stays top-level.
+_POOL_CONTEXT = "spawn"
+
+_NON_ASCII = re.compile(r"[^\x00-\x7F]+")
+
+
+def _require(module: str, package: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise ImportError(f"Missing dependency: `{package}`. Run `pip install {package}`.") from e
+
+
+def _looks_tabular(text: str) -> bool:
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) < 8:
+        return False
+    short = sum(len(line.split()) <= 3 for line in lines)
+    return short / len(lines) >= 0.6
+
+
+def _pdfplumber_pages(data: bytes, indices) -> list:
+    pdfplumber = _require("pdfplumber", "pdfplumber")
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in indices]
+
+
+def _pdfium_pages(data: bytes, indices) -> list:
+    pdfium = _require("pypdfium2", "pypdfium2")
+    pdf = pdfium.PdfDocument(data)
+    try:
+        pages = []
+        for i in indices:
+            page = pdf[i]
+            textpage = page.get_textpage()
+            pages.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return pages
+    finally:
+        pdf.close()
+
+
+def _pypdf_pages(data: bytes, indices) -> list:
+    pypdf = _require("pypdf", "pypdf")
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in indices]
+
+
+_PAGE_EXTRACTORS = {
+    "pdfplumber": _pdfplumber_pages,
+    "pdfium": _pdfium_pages,
+    "pypdf": _pypdf_pages,
+}
+
+
+def pdf_page_count(data: bytes, backend: str = DEFAULT_PDF_BACKEND) -> int:
+    if backend == "pdfium":
+        pdf = _require("pypdfium2", "pypdfium2").PdfDocument(data)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    if backend == "pypdf":
+        return len(_require("pypdf", "pypdf").PdfReader(io.BytesIO(data)).pages)
+    with _require("pdfplumber", "pdfplumber").open(io.BytesIO(data)) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_page_range(data: bytes, start: int, end: int, backend: str = DEFAULT_PDF_BACKEND) -> list:
+    """Extracts pages [start, end) in order; runs in worker processes, so keep it top-level."""
+    pages = _PAGE_EXTRACTORS[backend](data, range(start, end))
+    if backend != "pdfplumber":
+        tabular = [i for i, text in enumerate(pages) if _looks_tabular(text)]
+        if tabular:
+            redone = _pdfplumber_pages(data, [start + i for i in tabular])
+            for i, text in zip(tabular, redone):
+                pages[i] = text
+    return [_NON_ASCII.sub(" ", text) for text in pages]
+
+
+def page_ranges(page_count: int, parts: int) -> list:
+    size = max(1, -(-page_count // parts))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def iter_pdf_pages(data: bytes, backend: str = DEFAULT_PDF_BACKEND, parallel: bool = True, max_workers: int = None, page_count: int = None):
+    """Yields page texts in page order, extracting ahead on a process pool when parallel."""
+    if backend not in _PAGE_EXTRACTORS:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+    if page_count is None:
+        page_count = pdf_page_count(data, backend)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if not parallel or max_workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+        for start, end in page_ranges(page_count, max(1, page_count // 8)):
+            yield from extract_pdf_page_range(data, start, end, backend)
+        return
+
+    # A few ranges per worker evens out pages that are slower than others; at most
+    # that many are in flight so finished pages never pile up ahead of the consumer
+    ranges = page_ranges(page_count, max_workers * 4)
+    in_flight = max_workers * 2
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(_POOL_CONTEXT)) as pool:
+        pending = [pool.submit(extract_pdf_page_range, data, start, end, backend) for start, end in ranges[:in_flight]]
+        next_range = len(pending)
+        while pending:
+            pages = pending.pop(0).result()
+            if next_range < len(ranges):
+                start, end = ranges[next_range]
+                pending.append(pool.submit(extract_pdf_page_range, data, start, end, backend))
+                next_range += 1
+            yield from pages
+
+
+def extract_pdf_text(data: bytes, backend: str = DEFAULT_PDF_BACKEND, parallel: bool = True, max_workers: int = None) -> str:
+    return "".join(page + "\n" for page in iter_pdf_pages(data, backend, parallel, max_workers))
+
+
+def extract_docx_text(file) -> str:
+    docx = _require("docx", "python-docx")
+    doc = docx.Document(file)
+    parts = []
+    for para in doc.paragraphs:
+        parts.append(para.text + "\n")
+        for run in para.runs:
+            if "HYPERLINK" in run._element.xml:
+                matches = re.findall(r'https://www\\.mom\\.gov\\.sg[^\s"]+', run._element.xml)
+                parts.extend(f"\n{m}\n" for m in matches)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                parts.append(cell.text + "\n")
+    return "".join(parts)
+
+
+def open_pages(file, filetype: str, backend: str = DEFAULT_PDF_BACKEND, parallel: bool = True):
+    """Returns (page_count, page iterator); DOCX and TXT files are a single page."""
+    if filetype == "pdf":
+        data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+        page_count = pdf_page_count(data, backend)
+        return page_count, iter_pdf_pages(data, backend, parallel, page_count=page_count)
+    if filetype == "docx":
+        return 1, iter([extract_docx_text(file)])
+    if filetype == "txt":
+        return 1, iter([file.read().decode("utf-8")])
+    return 0, iter([])
+
+
+def extract_text_from_file(file, filetype: str, backend: str = DEFAULT_PDF_BACKEND, parallel: bool = True) -> str:
+    if filetype == "pdf":
+        _, pages = open_pages(file, filetype, backend, parallel)
+        return "".join(page + "\n" for page in pages)
+    return "".join(open_pages(file, filetype, backend, parallel)[1])
@@ -0,0 +1,124 @@
+# src/Helpers/extraction_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from Helpers.chunking import CHUNKER_VERSION, CLEANER_VERSION, TOKENIZER_MODEL
+from Helpers.extraction import EXTRACTOR_VERSION
+
+# Uploads are identified by the sha256 of their bytes, not their filename. The
+# file itself is kept once under that hash, and the result of extracting and
+# chunking it (the chunk spans into the chunk store, not the text) is cached
+# per (bytes, extractor, cleaner, chunker, chunk size) so a known document is
+# never extracted again, whatever it is called and whichever session sends it.
+
+DEFAULT_UPLOADS_PATH = os.path.join("data", "uploaded_files")
+DEFAULT_CACHE_PATH = os.path.join("data", "cache", "extractions.sqlite3")
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+def file_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def save_upload(data: bytes, filetype: str, root: str = DEFAULT_UPLOADS_PATH, digest: str = None) -> str:
+    """Stores the upload as <root>/<sha[:2]>/<sha>.<filetype> unless already there; returns the path."""
+    digest = digest or file_hash(data)
+    path = os.path.join(root, digest[:2], f"{digest}.{filetype}")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return path
+
+
+def extraction_key(digest: str, filetype: str, pdf_backend: str, chunk_tokens: int, overlap_tokens: int) -> str:
+    backend = pdf_backend if filetype == "pdf" else ""
+    parts = (digest, filetype, backend, EXTRACTOR_VERSION, CLEANER_VERSION, CHUNKER_VERSION, TOKENIZER_MODEL,
+             str(chunk_tokens), str(overlap_tokens))
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """On-disk map from extraction_key to the chunked document, with LRU eviction."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                doc_hash TEXT NOT NULL,
+                page_count INTEGER NOT NULL,
+                raw_preview TEXT NOT NULL,
+                chunks TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_last_used ON extractions (last_used)")
+
+    def get(self, key: str):
+        """Returns {"doc_hash", "page_count", "raw_preview", "chunks"} or None.
+
+        chunks are dicts with start/end (char offsets), span (bytes) and token_count.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_hash, page_count, raw_preview, chunks FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE extractions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        doc_hash, page_count, raw_preview, packed = row
+        chunks = [
+            {"start": start, "end": end, "span": (span_start, span_end), "token_count": tokens}
+            for start, end, span_start, span_end, tokens in json.loads(packed)
+        ]
+        return {"doc_hash": doc_hash, "page_count": page_count, "raw_preview": raw_preview, "chunks": chunks}
+
+    def put(self, key: str, doc_hash: str, page_count: int, raw_preview: str, chunks: list, spans: list):
+        packed = json.dumps([
+            [chunk["start"], chunk["end"], span[0], span[1], chunk["token_count"]]
+            for chunk, span in zip(chunks, spans)
+        ])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, doc_hash, page_count, raw_preview, chunks, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, doc_hash, page_count, raw_preview, packed, time.time()),
+            )
+            size = self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+            if size > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM extractions WHERE key IN "
+                    "(SELECT key FROM extractions ORDER BY last_used ASC LIMIT ?)",
+                    (size - self.max_entries,),
+                )
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -1,47 +1,170 @@
 # src/Helpers/filters.py
+import json
+import os
+import pathlib
+import re
 
-RELEVANT_KEYWORDS = [
+RELEVANT_CATEGORIES = {
     # Core MDW-related
-    "mdw", "maid", "helper", "domestic worker", "migrant",
-    "employment agency", "accredited agency", "agency license",
-    "work permit", "pass", "ipa", "in-principle approval",
-    "employer", "employment contract", "contract terms",
-    "rest day", "day off", "levy", "monthly levy",
-    "placement fee", "transfer helper", "new helper",
-    "replacement", "termination", "notice period",
-    "insurance", "medical insurance", "personal accident insurance",
-    "medical checkup", "six-monthly medical", "pregnancy test",
-    "security bond", "orientation programme", "settling-in programme",
-    "onboarding", "medical examination", "form submission",
-    "mdw portal", "mom portal", "employment history",
-    "employer eligibility", "hiring eligibility",
-    "living conditions", "housing", "accommodation",
-    "employer responsibilities", "employer obligations",
-    "salary", "wages", "remittance", "bank account",
-    "agency dispute", "complaint", "termination process",
-
+    "mdw": [
+        "mdw", "maid", "helper", "domestic worker", "migrant",
+        "employment agency", "accredited agency", "agency license",
+        "work permit", "pass", "ipa", "in-principle approval",
+        "employer", "employment contract", "contract terms",
+        "rest day", "day off", "levy", "monthly levy",
+        "placement fee", "transfer helper", "new helper",
+        "replacement", "termination", "notice period",
+        "insurance", "medical insurance", "personal accident insurance",
+        "medical checkup", "six-monthly medical", "pregnancy test",
+        "security bond", "orientation programme", "settling-in programme",
+        "onboarding", "medical examination", "form submission",
+        "mdw portal", "mom portal", "employment history",
+        "employer eligibility", "hiring eligibility",
+        "living conditions", "housing", "accommodation",
+        "employer responsibilities", "employer obligations",
+        "salary", "wages", "remittance", "bank account",
+        "agency dispute", "complaint", "termination process",
+    ],
     # Nanny/childcare-specific
-    "nanny", "childcare", "babysitter", "infant care", "toddler care",
-    "child safety", "child supervision", "child development",
-    "feeding schedule", "nap schedule", "toilet training",
-    "home-based childcare", "nanny duties", "childcare expectations",
-    "early childhood", "pediatric first aid", "CPR training",
-    "diaper changing", "milk preparation", "infant hygiene",
-    "learning activities", "playtime supervision", "storytelling",
-    "sleep routine", "discipline policy", "child emotional support",
-    "bonding with child", "parental instructions", "nanny checklist", "nannies", "confinement"
-]
-
-INAPPROPRIATE_KEYWORDS = [
-    "sex", "sexual", "nude", "naked", "intimacy", "intimate",
-    "harass", "harassment", "molest", "rape", "assault", "abuse",
-    "expose", "porn", "touch", "inappropriate", "kiss", "bed"
-]
+    "childcare": [
+        "nanny", "childcare", "babysitter", "infant care", "toddler care",
+        "child safety", "child supervision", "child development",
+        "feeding schedule", "nap schedule", "toilet training",
+        "home-based childcare", "nanny duties", "childcare expectations",
+        "early childhood", "pediatric first aid", "CPR training",
+        "diaper changing", "milk preparation", "infant hygiene",
+        "learning activities", "playtime supervision", "storytelling",
+        "sleep routine", "discipline policy", "child emotional support",
+        "bonding with child", "parental instructions", "nanny checklist", "nannies", "confinement",
+    ],
+}
+
+INAPPROPRIATE_CATEGORIES = {
+    "inappropriate": [
+        "sex", "sexual", "nude", "naked", "intimacy", "intimate",
+        "harass", "harassment", "molest", "rape", "assault", "abuse",
+        "expose", "porn", "touch", "inappropriate", "kiss", "bed",
+    ],
+}
+
+# Harmless phrases containing an inappropriate keyword; blanked before safety matching
+SAFE_PHRASES = ["in touch"]
+
+RELEVANT_KEYWORDS = [k for keywords in RELEVANT_CATEGORIES.values() for k in keywords]
+INAPPROPRIATE_KEYWORDS = [k for keywords in INAPPROPRIATE_CATEGORIES.values() for k in keywords]
+
+# JSON file with any of {"relevant": {category: [...]}, "inappropriate": {category: [...]},
+# "safe_phrases": [...]}; categories given there replace or extend the defaults above.
+KEYWORDS_CONFIG_ENV = "MDW_FILTER_KEYWORDS"
+DEFAULT_KEYWORDS_CONFIG = pathlib.Path(__file__).resolve().parents[2] / "config" / "filter_keywords.json"
+
+_WORD = re.compile(r"\w+(?:-\w+)*")
+# Keywords match whole words, plus common inflections of their last word
+# ("helpers", "harassed", "touching"); inflected forms are expanded up front.
+_SUFFIXES = ("", "s", "es", "d", "ed", "ing", "er", "ers")
+_IGNORE = object()
+# Word edges as _WORD sees them: a hyphen joins words only between word characters
+_WORD_START = r"(?<!\w)(?<!\w-)"
+_WORD_END = r"(?!-?\w)"
+_WORD_GAP = r"(?!-\w)\W+"
+
+
+def _words(text: str) -> tuple:
+    return tuple(_WORD.findall(text.lower()))
+
+
+_SUFFIX_GROUP = "(?:" + "|".join(sorted(filter(None, _SUFFIXES), key=len, reverse=True)) + ")?"
+
+
+def _trie_pattern(node: dict) -> str:
+    # Alternatives are factored on shared prefixes, so the regex tries one branch
+    # per character rather than every keyword; continuing a phrase is tried before
+    # ending it, which makes the longest keyword at a position win
+    branches = [(_WORD_GAP if char == " " else re.escape(char)) + _trie_pattern(child)
+                for char, child in node.items() if char]
+    if "" in node:
+        branches.append(_SUFFIX_GROUP)
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+
+class KeywordMatcher:
+    """Single-pass keyword matcher over whole words.
+
+    All keywords are compiled into one regex (a trie of their characters), so a
+    question is scanned once in C rather than word by word in Python; the
+    matched words are then looked up to find the keyword's category.
+    """
+
+    def __init__(self, categories: dict, ignore_phrases: list = ()):
+        self.categories = {name: list(keywords) for name, keywords in categories.items()}
+        self._table = {}
+        entries = [(keyword, name) for name, keywords in self.categories.items() for keyword in keywords]
+        entries += [(phrase, _IGNORE) for phrase in ignore_phrases]
+        for keyword, value in entries:
+            words = _words(keyword)
+            if not words:
+                continue
+            for suffix in _SUFFIXES:
+                key = words[:-1] + (words[-1] + suffix,)
+                if suffix == "" or key not in self._table:
+                    self._table[key] = value
+        # "medical insurance" wins over "insurance"; an ignored phrase consumes its
+        # words, as matches never overlap
+        trie = {}
+        for keyword, _ in entries:
+            node = trie
+            for char in " ".join(_words(keyword)):
+                node = node.setdefault(char, {})
+            node[""] = {}
+        trie.pop("", None)
+        self._regex = re.compile(f"{_WORD_START}{_trie_pattern(trie)}{_WORD_END}") if trie else None
+
+    def match(self, text: str):
+        """Returns the category of the first keyword found in text, or None."""
+        if self._regex is None:
+            return None
+        for found in self._regex.finditer(text.lower()):
+            category = self._table.get(_words(found.group()))
+            if category is not None and category is not _IGNORE:
+                return category
+        return None
+
+
+def load_keyword_config(path=None) -> dict:
+    path = path or os.getenv(KEYWORDS_CONFIG_ENV) or DEFAULT_KEYWORDS_CONFIG
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_matchers(config: dict = None):
+    config = load_keyword_config() if config is None else config
+    relevant = {**RELEVANT_CATEGORIES, **config.get("relevant", {})}
+    inappropriate = {**INAPPROPRIATE_CATEGORIES, **config.get("inappropriate", {})}
+    safe_phrases = config.get("safe_phrases", SAFE_PHRASES)
+    return KeywordMatcher(relevant), KeywordMatcher(inappropriate, safe_phrases)
+
+
+RELEVANCE_MATCHER, SAFETY_MATCHER = build_matchers()
+
+
+def reload_keyword_config(path=None):
+    global RELEVANCE_MATCHER, SAFETY_MATCHER
+    RELEVANCE_MATCHER, SAFETY_MATCHER = build_matchers(load_keyword_config(path))
+
+
+def relevance_category(question: str):
+    return RELEVANCE_MATCHER.match(question)
+
+
+def unsafe_category(question: str):
+    return SAFETY_MATCHER.match(question)
+
 
 def is_question_relevant(question: str) -> bool:
-    question = question.lower()
-    return any(keyword in question for keyword in RELEVANT_KEYWORDS)
+    return relevance_category(question) is not None
+
 
 def is_question_safe(question: str) -> bool:
-    question = question.lower()
-    return not any(keyword in question for keyword in INAPPROPRIATE_KEYWORDS)
+    return unsafe_category(question) is None
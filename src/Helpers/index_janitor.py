@@ -0,0 +1,304 @@
+# src/Helpers/index_janitor.py
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+
+from Helpers.indexer import CHROMA_ADD_BATCH, add_in_batches
+
+# Every document's chunks live in the shared collection under their document hash
+# (the `doc_hash` metadata field), which is the namespace queries are scoped to.
+# The registry records when each namespace was last indexed or queried; a
+# background janitor deletes namespaces idle past the TTL and, once enough of
+# the collection has been deleted, copies the live vectors into a fresh index
+# directory (a new "generation") and switches to it, so the HNSW graph and
+# SQLite file stop carrying dead entries. The old generation is dropped through
+# the client's own delete_collection and then removed as a whole directory, the
+# way installed snapshots are pruned; the index's files are never edited directly.
+# Given the chunk store, it also deletes the stored text of evicted documents
+# that no corpus or snapshot manifest reads and nobody has uploaded again
+# within the TTL.
+
+DEFAULT_REGISTRY_PATH = os.path.join("data", "cache", "namespaces.sqlite3")
+DEFAULT_NAMESPACE_TTL_SECONDS = 24 * 3600
+DEFAULT_JANITOR_INTERVAL_SECONDS = 15 * 60
+# Rebuild once vectors deleted since the last rebuild reach this share of live + deleted
+COMPACT_DELETED_FRACTION = 0.25
+
+# Each compaction writes a new generation directory under the janitor's index root
+_GENERATION = re.compile(r"^gen-\d+$")
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class NamespaceRegistry:
+    def __init__(self, path: str = DEFAULT_REGISTRY_PATH):
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS namespaces "
+            "(doc_hash TEXT PRIMARY KEY, chunks INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_namespaces_last_used ON namespaces (last_used)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def register(self, chunk_counts: dict):
+        """Records namespaces that now have vectors in the collection."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO namespaces (doc_hash, chunks, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT(doc_hash) DO UPDATE SET chunks = excluded.chunks, last_used = excluded.last_used",
+                [(key, count, now) for key, count in chunk_counts.items()],
+            )
+
+    def touch(self, keys):
+        # Only refreshes known namespaces; an evicted one must be re-indexed, not revived
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("UPDATE namespaces SET last_used = ? WHERE doc_hash = ?", [(now, k) for k in keys])
+
+    def registered(self, keys) -> set:
+        keys = list(keys)
+        if not keys:
+            return set()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT doc_hash FROM namespaces WHERE doc_hash IN ({','.join('?' * len(keys))})", keys
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def idle(self, ttl_seconds: float) -> list:
+        """Returns [(doc_hash, chunks)] for namespaces unused for longer than ttl_seconds."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT doc_hash, chunks FROM namespaces WHERE last_used < ?", (time.time() - ttl_seconds,)
+            ).fetchall()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM namespaces")
+
+    def forget(self, keys):
+        with self._lock:
+            self._conn.executemany("DELETE FROM namespaces WHERE doc_hash = ?", [(k,) for k in keys])
+
+    def get_meta(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_meta(self, key: str, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            namespaces, chunks = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(chunks), 0) FROM namespaces").fetchone()
+        return {"namespaces": namespaces, "chunks": chunks}
+
+
+class IndexJanitor:
+    """Evicts idle namespaces from the shared collection and compacts it in the background.
+
+    The collection lives in the active generation directory under index_root,
+    opened with make_client(path); nothing else should write under index_root.
+    `write_lock` must be held by anything that adds to the collection, so a
+    rebuild never misses vectors written while it copies. Embed before taking
+    it (indexer.embed_documents) and hold it only for the add.
+
+    referenced() returns the doc_hashes whose stored text must be kept
+    (snapshot.referenced_documents); store files are only removed when both
+    store and referenced are given.
+    """
+
+    def __init__(self, make_client, index_root: str, base_name: str, registry: NamespaceRegistry,
+                 ttl_seconds: float = DEFAULT_NAMESPACE_TTL_SECONDS,
+                 interval_seconds: float = DEFAULT_JANITOR_INTERVAL_SECONDS,
+                 compact_fraction: float = COMPACT_DELETED_FRACTION, store=None, referenced=None):
+        self.make_client = make_client
+        self.index_root = index_root
+        self.base_name = base_name
+        self.registry = registry
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self.compact_fraction = compact_fraction
+        self.store = store
+        self.referenced = referenced
+        self.write_lock = threading.RLock()
+        self.last_run = None
+        self.last_report = {}
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+        generation = self.registry.get_meta("generation")
+        if not generation or not os.path.isdir(os.path.join(index_root, generation)):
+            # A new (or lost) index holds no vectors, whatever the registry remembers;
+            # sessions re-index their documents (from the embedding cache) on the next rerun
+            self.registry.clear()
+            self.registry.set_meta("generation", self._new_generation())
+            self.registry.set_meta("deleted_since_compact", 0)
+
+    @staticmethod
+    def _new_generation() -> str:
+        return f"gen-{time.time_ns()}"
+
+    def generation(self) -> str:
+        return self.registry.get_meta("generation")
+
+    def _client(self, generation: str):
+        with self._clients_lock:
+            client = self._clients.get(generation)
+            if client is None:
+                client = self._clients[generation] = self.make_client(os.path.join(self.index_root, generation))
+            return client
+
+    def collection(self, generation: str = None):
+        return self._client(generation or self.generation()).get_or_create_collection(
+            name=self.base_name, embedding_function=None
+        )
+
+    def run_once(self) -> dict:
+        report = {"evicted_namespaces": 0, "evicted_chunks": 0, "removed_documents": 0, "compacted": False}
+        with self.write_lock:
+            if not self.registry.get_meta("adopted"):
+                self.adopt_untracked()
+            self._drop_retired()
+            idle = self.registry.idle(self.ttl_seconds)
+            if idle:
+                collection = self.collection()
+                for key, _ in idle:
+                    collection.delete(where={"doc_hash": key})
+                self.registry.forget([key for key, _ in idle])
+                report["evicted_namespaces"] = len(idle)
+                report["evicted_chunks"] = sum(chunks for _, chunks in idle)
+                report["removed_documents"] = self._remove_documents([key for key, _ in idle])
+
+            deleted = int(self.registry.get_meta("deleted_since_compact", 0)) + report["evicted_chunks"]
+            self.registry.set_meta("deleted_since_compact", deleted)
+            if deleted and deleted >= self.compact_fraction * (deleted + self.collection().count()):
+                self.compact()
+                report["compacted"] = True
+
+        report["disk_bytes"] = directory_size(self.index_root)
+        self.last_run = time.time()
+        self.last_report = report
+        return report
+
+    def _remove_documents(self, keys) -> int:
+        if self.store is None or self.referenced is None:
+            return 0
+        keep = self.referenced()
+        # A document uploaded again within the TTL has a fresh mtime (DocumentWriter.commit)
+        unused_since = time.time() - self.ttl_seconds
+        return sum(self.store.remove(key, unused_since) for key in keys if key not in keep)
+
+    def adopt_untracked(self):
+        """Registers namespaces written before the registry existed, so they can expire too."""
+        counts = {}
+        collection = self.collection()
+        for offset in range(0, collection.count(), CHROMA_ADD_BATCH):
+            page = collection.get(include=["metadatas"], limit=CHROMA_ADD_BATCH, offset=offset)
+            for meta in page["metadatas"]:
+                key = (meta or {}).get("doc_hash")
+                if key:
+                    counts[key] = counts.get(key, 0) + 1
+        known = self.registry.registered(counts)
+        self.registry.register({key: count for key, count in counts.items() if key not in known})
+        self.registry.set_meta("adopted", 1)
+
+    def compact(self):
+        """Copies live vectors into a new generation directory and makes it the active one."""
+        with self.write_lock:
+            current = self.generation()
+            old = self.collection(current)
+            generation = self._new_generation()
+            try:
+                # Built in place in a directory no other client has open, as snapshots are
+                new = self._client(generation).create_collection(
+                    name=self.base_name, embedding_function=None, metadata=old.metadata
+                )
+                total = old.count()
+                for offset in range(0, total, CHROMA_ADD_BATCH):
+                    page = old.get(
+                        include=["embeddings", "documents", "metadatas"], limit=CHROMA_ADD_BATCH, offset=offset
+                    )
+                    if page["ids"]:
+                        add_in_batches(new, page["ids"], page["documents"], page["embeddings"], page["metadatas"])
+            except BaseException:
+                self._remove_generation(generation)
+                raise
+            self.registry.set_meta("generation", generation)
+            self.registry.set_meta("deleted_since_compact", 0)
+            # Queries already holding the old collection finish against it; it is
+            # dropped on the next run
+            self.registry.set_meta("retired", current)
+
+    def _remove_generation(self, generation: str):
+        with self._clients_lock:
+            client = self._clients.pop(generation, None)
+        if client is not None:
+            try:
+                # Lets the client release the collection's segments before its files go
+                client.delete_collection(self.base_name)
+            except Exception:
+                pass  # never created, or already gone
+        shutil.rmtree(os.path.join(self.index_root, generation), ignore_errors=True)
+
+    def _drop_retired(self):
+        retired = self.registry.get_meta("retired")
+        if retired and retired != self.generation():
+            self._remove_generation(retired)
+            self.registry.set_meta("retired", "")
+        # Generations left behind by an interrupted compaction or an earlier process
+        if os.path.isdir(self.index_root):
+            keep = {self.generation(), self.registry.get_meta("retired")}
+            for name in os.listdir(self.index_root):
+                if _GENERATION.match(name) and name not in keep:
+                    self._remove_generation(name)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="index-janitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+
+    def stats(self) -> dict:
+        stats = self.registry.stats()
+        stats.update(
+            vectors=self.collection().count(),
+            disk_bytes=directory_size(self.index_root),
+            ttl_seconds=self.ttl_seconds,
+            last_run=self.last_run,
+            last_report=self.last_report,
+            last_error=self.last_error,
+        )
+        return stats
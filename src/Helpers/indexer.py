@@ -0,0 +1,131 @@
+# src/Helpers/indexer.py
+import hashlib
+
+from Helpers.chunk_store import read_chunk_text
+
+# Chroma rejects a single add() larger than its max batch size (~5k on SQLite)
+CHROMA_ADD_BATCH = 5000
+
+# Tracks which documents are already in the vector collection so that a change
+# to the uploaded set only adds the new documents and stops using the removed ones.
+# `indexed` maps a document hash to the list of chunk ids written for it; callers
+# keep it in session state between reruns.
+#
+# Chunk ids are derived from the document content, so the same document uploaded
+# twice (or by two users) maps onto the same vectors in the shared collection.
+# Removing a document therefore only untracks it; queries are scoped to the
+# session's tracked documents with `scope_filter`.
+
+
+def document_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_chunk_id(doc_hash: str, start: int, end: int) -> str:
+    return f"{doc_hash[:16]}-{start}-{end}"
+
+
+def chunk_position(chunk_id: str) -> tuple:
+    """(document key, start offset) from a make_chunk_id id; sorts chunks into document order."""
+    doc_key, start, _ = chunk_id.rsplit("-", 2)
+    return doc_key, int(start)
+
+
+def add_in_batches(collection, ids: list, documents: list, embeddings: list, metadatas: list):
+    for i in range(0, len(ids), CHROMA_ADD_BATCH):
+        j = i + CHROMA_ADD_BATCH
+        collection.add(ids=ids[i:j], documents=documents[i:j], embeddings=embeddings[i:j], metadatas=metadatas[i:j])
+
+
+def document_key(doc: dict) -> str:
+    return doc["doc_hash"]
+
+
+def diff_documents(docs: list, indexed: dict):
+    current = {document_key(doc): doc for doc in docs}
+    to_add = [doc for key, doc in current.items() if key not in indexed]
+    to_remove = [key for key in indexed if key not in current]
+    return to_add, to_remove
+
+
+def _missing_chunks(collection, docs: list) -> list:
+    chunks = {c["chunk_id"]: (doc, c) for doc in docs for c in doc["chunks"]}
+    if not chunks:
+        return []
+    # Vectors for ids that already exist are reused as-is
+    existing = set(collection.get(ids=list(chunks), include=[])["ids"])
+    return [(doc, c) for chunk_id, (doc, c) in chunks.items() if chunk_id not in existing]
+
+
+def embed_documents(collection, docs: list, embed_fn) -> dict:
+    """Embeds the chunks of docs not yet in the collection; returns {chunk_id: vector}.
+
+    This is the slow part of indexing (embedding API calls), so callers sharing
+    the janitor's write lock run it first and hold the lock only for write_documents.
+    """
+    missing = _missing_chunks(collection, docs)
+    if not missing:
+        return {}
+    vectors = embed_fn([read_chunk_text(c) for _, c in missing])
+    return {c["chunk_id"]: vector for (_, c), vector in zip(missing, vectors)}
+
+
+def write_documents(collection, docs: list, indexed: dict, embed_fn, vectors: dict = None) -> int:
+    """Adds chunks not already in the collection, using precomputed vectors where given.
+
+    Returns how many chunks were added. Chunks without a vector (e.g. evicted
+    after embed_documents checked) are embedded here.
+    """
+    vectors = vectors or {}
+    new = _missing_chunks(collection, docs)
+    if new:
+        unembedded = [c for _, c in new if c["chunk_id"] not in vectors]
+        if unembedded:
+            vectors = {**vectors, **dict(zip(
+                [c["chunk_id"] for c in unembedded], embed_fn([read_chunk_text(c) for c in unembedded])
+            ))}
+        ids = [c["chunk_id"] for _, c in new]
+        metadatas = [
+            {
+                "chunk_id": c["chunk_id"],
+                "source": c["source"],
+                "doc_hash": document_key(doc),
+                "token_count": c["token_count"],
+            }
+            for doc, c in new
+        ]
+        add_in_batches(collection, ids, [read_chunk_text(c) for _, c in new], [vectors[i] for i in ids], metadatas)
+
+    for doc in docs:
+        indexed[document_key(doc)] = [c["chunk_id"] for c in doc["chunks"]]
+    return len(new)
+
+
+def add_documents(collection, docs: list, indexed: dict, embed_fn) -> int:
+    """Adds chunks not already in the collection; returns how many were embedded."""
+    return write_documents(collection, docs, indexed, embed_fn, embed_documents(collection, docs, embed_fn))
+
+
+def remove_documents(indexed: dict, keys: list) -> int:
+    removed = sum(len(indexed.get(key, [])) for key in keys)
+    for key in keys:
+        indexed.pop(key, None)
+    return removed
+
+
+def sync_index(collection, docs: list, indexed: dict, embed_fn):
+    """Brings the tracked set in line with docs; returns (chunks embedded, chunks untracked)."""
+    to_add, to_remove = diff_documents(docs, indexed)
+    removed = remove_documents(indexed, to_remove)
+    added = add_documents(collection, to_add, indexed, embed_fn)
+    return added, removed
+
+
+def scope_filter(indexed: dict):
+    """Chroma `where` clause restricting a query to the tracked documents."""
+    keys = list(indexed)
+    if not keys:
+        return None
+    if len(keys) == 1:
+        return {"doc_hash": keys[0]}
+    return {"doc_hash": {"$in": keys}}
@@ -0,0 +1,212 @@
+# src/Helpers/ingest_jobs.py
+import io
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from Helpers import extraction
+from Helpers.chunking import DEFAULT_CHUNK_TOKENS, DEFAULT_OVERLAP_TOKENS
+from Helpers.extraction_cache import extraction_key, file_hash
+from Helpers.indexer import embed_documents, write_documents
+from Helpers.ingest_pipeline import STAGES, IngestionPipeline, build_document_entry
+from Helpers.lexical_index import BM25Index
+from Helpers.metrics import Trace
+
+# Uploads are processed off the Streamlit script thread. The page hands over the
+# file bytes and returns at once; a worker pool runs extract -> clean -> chunk ->
+# embed -> index, and every rerun (on any page) polls the session's jobs and
+# adopts finished documents into session state. Jobs belong to an owner id kept
+# in session state and hold no Streamlit objects.
+
+DEFAULT_INGEST_WORKERS = 2
+# Finished jobs nobody collected (the session went away) are dropped after this long
+JOB_RETENTION_SECONDS = 3600
+ACTIVE_STATES = ("queued", "running")
+
+
+class IngestJob:
+    """One uploaded file on its way into the session; status is queued, running, done or failed."""
+
+    def __init__(self, owner: str, filename: str, filetype: str, data: bytes, options: dict, digest: str = None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.filename = filename
+        self.filetype = filetype
+        self.file_hash = digest or file_hash(data)
+        self.options = options
+        self.cached = False
+        self.status = "queued"
+        self.page_count = 0
+        self.pipeline = None
+        self.entry = None
+        self.indexed = {}
+        self.raw_preview = ""
+        self.error = None
+        self.warning = None
+        self.created = time.time()
+        self.finished = None
+        self._data = data
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    @property
+    def progress(self) -> dict:
+        if self.pipeline is None:
+            return {stage: 0 for stage in STAGES}
+        return dict(self.pipeline.progress)
+
+
+def index_entry(entry: dict, embed_fn, janitor) -> dict:
+    """Writes one document's chunks to the shared collection; returns its `indexed` mapping."""
+    indexed = {}
+    # Embedding calls run outside the write lock; only the add is serialised
+    vectors = embed_documents(janitor.collection(), [entry], embed_fn)
+    with janitor.write_lock:
+        write_documents(janitor.collection(), [entry], indexed, embed_fn, vectors)
+        janitor.registry.register({key: len(ids) for key, ids in indexed.items()})
+    return indexed
+
+
+class IngestJobQueue:
+    """Process-wide pool of ingestion workers with per-owner job tracking."""
+
+    def __init__(self, max_workers: int = DEFAULT_INGEST_WORKERS, janitor=None, store=None, extraction_cache=None,
+                 retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.janitor = janitor
+        self.store = store
+        # Cached extractions are spans into the store, so the cache needs one
+        self.extraction_cache = extraction_cache if store is not None else None
+        self.retention_seconds = retention_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, owner: str, filename: str, filetype: str, data: bytes, embed_fn=None,
+               chunk_tokens: int = DEFAULT_CHUNK_TOKENS, overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+               pdf_backend: str = extraction.DEFAULT_PDF_BACKEND, parallel: bool = True, digest: str = None) -> IngestJob:
+        """Queues one file; with embed_fn the document is also embedded and written to the vector index.
+
+        digest is the sha256 of data, when the caller already has it.
+        """
+        options = {"chunk_tokens": chunk_tokens, "overlap_tokens": overlap_tokens,
+                   "pdf_backend": pdf_backend, "parallel": parallel}
+        job = IngestJob(owner, filename, filetype, data, options, digest)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._pool.submit(self._process, job, embed_fn)
+        return job
+
+    def jobs(self, owner: str) -> list:
+        with self._lock:
+            return sorted((job for job in self._jobs.values() if job.owner == owner), key=lambda job: job.created)
+
+    def pending(self, owner: str) -> list:
+        return [job for job in self.jobs(owner) if job.active]
+
+    def collect(self, owner: str) -> list:
+        """Removes and returns the owner's finished (done or failed) jobs."""
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.owner == owner and not job.active]
+            for job in finished:
+                del self._jobs[job.id]
+        return sorted(finished, key=lambda job: job.created)
+
+    def discard(self, owner: str):
+        """Forgets all of the owner's jobs; ones still running finish but are never collected."""
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.owner == owner]:
+                del self._jobs[job_id]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def _process(self, job: IngestJob, embed_fn):
+        options = job.options
+        trace = Trace("upload", filetype=job.filetype,
+                      pdf_backend=options["pdf_backend"] if job.filetype == "pdf" else None)
+        job.status = "running"
+        try:
+            with trace.activate():
+                cache_key = None
+                if self.extraction_cache is not None:
+                    cache_key = extraction_key(job.file_hash, job.filetype, options["pdf_backend"],
+                                               options["chunk_tokens"], options["overlap_tokens"])
+                    with trace.stage("extraction_cache"):
+                        entry = self._cached_entry(job, cache_key)
+                if not job.cached:
+                    entry = self._extract(job, embed_fn)
+                    if cache_key is not None:
+                        self.extraction_cache.put(cache_key, entry["doc_hash"], job.page_count, job.raw_preview,
+                                                  job.pipeline.chunks, [chunk["span"] for chunk in entry["chunks"]])
+                    job.pipeline.chunks = []  # the text now lives in the store (or in entry)
+                entry["file_sha256"] = job.file_hash
+
+                if job.pipeline is not None and job.pipeline.embed_error is not None:
+                    job.warning = f"Embedding during upload failed ({job.pipeline.embed_error}); it will be retried on the Q&A page."
+                elif embed_fn is not None and self.janitor is not None:
+                    # Vectors are embedding-cache hits by now, so this is just the Chroma write
+                    with trace.stage("index"):
+                        job.indexed = index_entry(entry, embed_fn, self.janitor)
+            job.entry = entry
+            job.status = "done"
+        except Exception as e:
+            job.error = e
+            job.status = "failed"
+        finally:
+            job._data = None
+            job.finished = time.time()
+            if job.pipeline is not None:
+                for stage, seconds in job.pipeline.stage_seconds.items():
+                    trace.add(stage, seconds)
+            trace.finish(status=job.status, cached=job.cached, pages=job.page_count,
+                         chunks=len(job.entry["chunks"]) if job.entry else 0)
+
+    def _cached_entry(self, job: IngestJob, cache_key: str):
+        cached = self.extraction_cache.get(cache_key)
+        if cached is None or not self.store.has(cached["doc_hash"]):
+            return None
+        job.cached = True
+        job.page_count = cached["page_count"]
+        job.raw_preview = cached["raw_preview"]
+        return build_document_entry(job.filename, cached["chunks"], cached["doc_hash"], self.store)
+
+    def _extract(self, job: IngestJob, embed_fn) -> dict:
+        options = job.options
+        job.page_count, pages = extraction.open_pages(
+            io.BytesIO(job._data), job.filetype, backend=options["pdf_backend"], parallel=options["parallel"]
+        )
+        job.pipeline = IngestionPipeline(
+            pages, options["chunk_tokens"], options["overlap_tokens"], embed_fn=embed_fn,
+            total_pages=job.page_count, store=self.store,
+        ).start()
+        chunks, doc_hash = job.pipeline.result()
+        job.raw_preview = job.pipeline.raw_preview
+        if not job.pipeline.has_text:
+            raise ValueError("No extractable text found")
+        if not chunks or all(not c["text"].strip() for c in chunks):
+            raise ValueError("No valid chunks")
+        return build_document_entry(job.filename, chunks, doc_hash, self.store)
+
+
+def session_owner(state) -> str:
+    return state.setdefault("ingest_owner", uuid.uuid4().hex)
+
+
+def adopt_finished_jobs(state, job_queue: IngestJobQueue) -> list:
+    """Moves this session's finished documents into state; returns the collected jobs (failed ones too)."""
+    finished = job_queue.collect(session_owner(state))
+    docs = state.setdefault("uploaded_docs", [])
+    for job in finished:
+        if job.status != "done" or any(doc["doc_hash"] == job.entry["doc_hash"] for doc in docs):
+            continue
+        docs.append(job.entry)
+        state.setdefault("lexical_index", BM25Index()).add_document(job.entry["doc_hash"], job.entry["chunks"])
+        state.setdefault("indexed_docs", {}).update(job.indexed)
+        state.setdefault("raw_previews", {})[job.filename] = job.raw_preview
+    return finished
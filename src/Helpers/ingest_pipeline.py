@@ -0,0 +1,217 @@
+# src/Helpers/ingest_pipeline.py
+import contextvars
+import hashlib
+import queue
+import threading
+import time
+
+from Helpers.chunking import DEFAULT_CHUNK_TOKENS, DEFAULT_OVERLAP_TOKENS, iter_clean, iter_token_chunks
+from Helpers.indexer import make_chunk_id
+
+# Pages flow extract -> clean -> chunk -> embed through bounded queues, each
+# stage on its own thread, so only a few pages are held in memory at a time and
+# embedding of early pages overlaps with extraction of later ones.
+
+STAGES = ("extract", "clean", "chunk", "embed")
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_EMBED_BATCH = 64
+RAW_PREVIEW_CHARS = 1500
+
+_DONE = object()
+
+
+class _Aborted(Exception):
+    pass
+
+
+class IngestionPipeline:
+    """Runs the upload stages for one file in background threads.
+
+    Progress counters are plain ints that the UI thread polls; the embed stage is
+    best-effort (its failure is recorded in `embed_error`, chunks are still kept).
+    `stage_seconds` is each stage's busy time, excluding time spent waiting on queues.
+    """
+
+    def __init__(self, pages, chunk_tokens: int = DEFAULT_CHUNK_TOKENS, overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+                 embed_fn=None, total_pages: int = None, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 embed_batch: int = DEFAULT_EMBED_BATCH, store=None):
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.embed_fn = embed_fn
+        self.total_pages = total_pages
+        self.embed_batch = embed_batch
+        self.progress = {stage: 0 for stage in STAGES}
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.chunks = []
+        self.raw_preview = ""
+        self.has_text = False
+        self.embed_error = None
+
+        self._pages = pages
+        self._hasher = hashlib.sha256()
+        # With a chunk store the cleaned text is also written out, filed under its hash by result()
+        self._writer = store.writer() if store is not None else None
+        self._error = None
+        self._abort = threading.Event()
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(3)]
+        self._waited = threading.local()
+        # Stages run in copies of the creator's context, so an active metrics trace sees their API calls
+        self._threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(self._run, name, stage, out_q), daemon=True)
+            for name, stage, out_q in (
+                ("extract", self._extract, self._queues[0]),
+                ("clean", self._clean, self._queues[1]),
+                ("chunk", self._chunk, self._queues[2]),
+                ("embed", self._embed, None),
+            )
+        ]
+
+    # --- queue plumbing ---
+    def _put(self, q, item):
+        started = time.perf_counter()
+        try:
+            while True:
+                if self._abort.is_set():
+                    raise _Aborted()
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            self._waited.seconds += time.perf_counter() - started
+
+    def _drain(self, q):
+        while True:
+            if self._abort.is_set():
+                raise _Aborted()
+            started = time.perf_counter()
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            finally:
+                self._waited.seconds += time.perf_counter() - started
+            if item is _DONE:
+                return
+            yield item
+
+    def _run(self, name, stage, out_q):
+        self._waited.seconds = 0.0
+        started = time.perf_counter()
+        try:
+            stage(out_q)
+            if out_q is not None:
+                self._put(out_q, _DONE)
+        except _Aborted:
+            pass
+        except BaseException as e:
+            self._error = self._error or e
+            self._abort.set()
+        finally:
+            self.stage_seconds[name] = time.perf_counter() - started - self._waited.seconds
+
+    # --- stages ---
+    def _extract(self, out_q):
+        for page in self._pages:
+            if len(self.raw_preview) < RAW_PREVIEW_CHARS:
+                self.raw_preview += (page + "\n")[:RAW_PREVIEW_CHARS - len(self.raw_preview)]
+            self.has_text = self.has_text or bool(page.strip())
+            self._put(out_q, page)
+            self.progress["extract"] += 1
+
+    def _clean(self, out_q):
+        def counted(pages):
+            for page in pages:
+                yield page
+                self.progress["clean"] += 1
+
+        for piece in iter_clean(counted(self._drain(self._queues[0]))):
+            self._put(out_q, piece)
+
+    def _chunk(self, out_q):
+        def hashed(pieces):
+            for i, piece in enumerate(pieces):
+                text = (" " if i else "") + piece
+                self._hasher.update(text.encode("utf-8"))
+                if self._writer is not None:
+                    self._writer.write(text)
+                yield piece
+
+        pieces = hashed(self._drain(self._queues[1]))
+        for chunk in iter_token_chunks(pieces, self.chunk_tokens, self.overlap_tokens):
+            self.chunks.append(chunk)
+            self._put(out_q, chunk["text"])
+            self.progress["chunk"] += 1
+
+    def _embed(self, _):
+        batch = []
+        for text in self._drain(self._queues[2]):
+            batch.append(text)
+            if len(batch) >= self.embed_batch:
+                self._embed_batch(batch)
+                batch = []
+        if batch:
+            self._embed_batch(batch)
+
+    def _embed_batch(self, texts):
+        if self.embed_fn is not None and self.embed_error is None:
+            try:
+                self.embed_fn(texts)
+            except Exception as e:
+                self.embed_error = e
+        self.progress["embed"] += len(texts)
+
+    # --- control ---
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        """Waits up to timeout seconds; returns True once every stage has finished."""
+        alive = [thread for thread in self._threads if thread.is_alive()]
+        if alive:
+            # The embed stage is always the last one to finish
+            alive[-1].join(timeout)
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def result(self):
+        """Returns (chunk dicts from iter_token_chunks, sha256 of the cleaned text); re-raises stage errors."""
+        self.wait()
+        if self._error is not None:
+            if self._writer is not None:
+                self._writer.discard()
+            raise self._error
+        doc_hash = self._hasher.hexdigest()
+        if self._writer is not None:
+            self._writer.commit(doc_hash)
+        return self.chunks, doc_hash
+
+
+def build_document_entry(filename: str, chunks: list, doc_hash: str, store=None) -> dict:
+    """The uploaded_docs entry for one ingested file.
+
+    With the store the document was written to, chunks keep only a byte span into
+    it instead of their text; chunk_store.read_chunk_text resolves spans through the
+    default store (CHUNK_STORE_PATH), so that is the one to pass.
+    """
+    if store is None:
+        texts = [{"text": chunk["text"]} for chunk in chunks]
+    else:
+        # Chunks from the extraction cache already carry their spans
+        spans = [chunk["span"] for chunk in chunks] if chunks and "span" in chunks[0] else store.spans(doc_hash, chunks)
+        texts = [{"doc_hash": doc_hash, "span": span} for span in spans]
+    return {
+        "filename": filename,
+        "doc_hash": doc_hash,
+        "chunks": [
+            {
+                "chunk_id": make_chunk_id(doc_hash, chunk["start"], chunk["end"]),
+                **text,
+                "token_count": chunk["token_count"],
+                "source": filename
+            } for chunk, text in zip(chunks, texts)
+        ],
+        "source": "upload"
+    }
@@ -0,0 +1,111 @@
+# src/Helpers/lexical_index.py
+import math
+import re
+from collections import Counter, defaultdict
+
+from Helpers.chunk_store import read_chunk_text
+
+# In-process BM25 over the session's chunks. Documents are added and removed
+# whole (keyed like the vector indexer, by document hash) as uploads change,
+# so the index is never rebuilt from scratch.
+
+_TOKEN = re.compile(r"\w+(?:-\w+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "show should that the their there this to was what when where which who why will with you your".split()
+)
+RRF_K = 60
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunks = {}
+        self._postings = defaultdict(dict)
+        self._lengths = {}
+        # Each chunk's distinct terms, so removing a document never reads its text
+        # back (the chunk store may already have deleted it)
+        self._terms = {}
+        self._total_length = 0
+        self._documents = {}
+
+    def __contains__(self, key) -> bool:
+        return key in self._documents
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def keys(self) -> list:
+        return list(self._documents)
+
+    def add_document(self, key: str, chunks: list):
+        if key in self._documents:
+            return
+        ids = []
+        for chunk in chunks:
+            chunk_id = chunk["chunk_id"]
+            if chunk_id in self._lengths:
+                continue
+            terms = Counter(tokenize(read_chunk_text(chunk)))
+            for term, tf in terms.items():
+                self._postings[term][chunk_id] = tf
+            self._terms[chunk_id] = tuple(terms)
+            length = sum(terms.values())
+            self._lengths[chunk_id] = length
+            self._total_length += length
+            self.chunks[chunk_id] = chunk
+            ids.append(chunk_id)
+        self._documents[key] = ids
+
+    def remove_document(self, key: str):
+        for chunk_id in self._documents.pop(key, []):
+            for term in self._terms.pop(chunk_id):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._lengths.pop(chunk_id)
+            del self.chunks[chunk_id]
+
+    def search(self, query: str, k: int = 10) -> list:
+        """Returns up to k (chunk_id, score) pairs, best first."""
+        n = len(self._lengths)
+        if n == 0:
+            return []
+        average = self._total_length / n or 1.0
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / average)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def sync_lexical_index(index: BM25Index, docs: list, key_fn):
+    """Adds documents missing from the index and drops ones no longer uploaded."""
+    current = {key_fn(doc): doc for doc in docs}
+    for key in index.keys():
+        if key not in current:
+            index.remove_document(key)
+    for key, doc in current.items():
+        if key not in index:
+            index.add_document(key, doc["chunks"])
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    """Fuses ranked id lists; returns (id, score) pairs, best first."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
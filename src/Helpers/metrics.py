@@ -0,0 +1,236 @@
+# src/Helpers/metrics.py
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Lightweight instrumentation shared by the upload and Q&A code paths.
+# A Trace times the stages of one upload or question; finishing it appends one
+# JSON line to the trace log and feeds the process-wide Prometheus registry,
+# which is written to a text file and can also be served over HTTP.
+
+TRACE_PATH = os.getenv("METRICS_TRACE_PATH", os.path.join("data", "metrics", "traces.jsonl"))
+PROMETHEUS_PATH = os.getenv("METRICS_PROMETHEUS_PATH", os.path.join("data", "metrics", "metrics.prom"))
+PROMETHEUS_WRITE_INTERVAL = 10.0
+TRACE_MAX_BYTES = 50 * 1024 * 1024
+METRIC_PREFIX = "mdwhire_"
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """Counters and latency histograms in the Prometheus text format."""
+
+    def __init__(self, prefix: str = METRIC_PREFIX, buckets: tuple = LATENCY_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+        self._last_write = 0.0
+
+    def inc(self, name: str, value: float = 1, description: str = "", **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._help.setdefault(name, ("counter", description))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, description: str = "", **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._help.setdefault(name, ("histogram", description))
+            counts, total, n = self._histograms.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+            self._histograms[key] = (counts, total + seconds, n + 1)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (kind, description) in sorted(self._help.items()):
+                full = self.prefix + name
+                if description:
+                    lines.append(f"# HELP {full} {description}")
+                lines.append(f"# TYPE {full} {kind}")
+                if kind == "counter":
+                    for (counter, labels), value in sorted(self._counters.items()):
+                        if counter == name:
+                            lines.append(f"{full}{_format_labels(labels)} {value}")
+                    continue
+                for (histogram, labels), (counts, total, count) in sorted(self._histograms.items()):
+                    if histogram != name:
+                        continue
+                    for bound, in_bucket in zip(self.buckets, counts):
+                        lines.append(f"{full}_bucket{_format_labels(labels, (('le', repr(bound)),))} {in_bucket}")
+                    lines.append(f"{full}_bucket{_format_labels(labels, (('le', '+Inf'),))} {count}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {total}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str = PROMETHEUS_PATH):
+        """Writes the text exposition atomically, for node_exporter's textfile collector or scraping."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+        self._last_write = time.monotonic()
+
+    def maybe_write(self, path: str = PROMETHEUS_PATH, interval: float = PROMETHEUS_WRITE_INTERVAL):
+        if path and time.monotonic() - self._last_write >= interval:
+            self.write(path)
+
+
+class TraceLog:
+    """Append-only JSONL log, rotated to `<path>.1` when it grows past max_bytes."""
+
+    def __init__(self, path: str = TRACE_PATH, max_bytes: int = TRACE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def append(self, record: dict):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+METRICS = MetricsRegistry()
+TRACE_LOG = TraceLog(TRACE_PATH) if TRACE_PATH else None
+_ACTIVE = contextvars.ContextVar("active_trace", default=None)
+
+
+class Trace:
+    """Per-request stage timings, token usage and counters.
+
+    Stages may be recorded more than once (e.g. count_tokens per chunk); their times add up.
+    Counters only go to the trace log; process-wide counters are kept in METRICS directly.
+    """
+
+    def __init__(self, pipeline: str, **attrs):
+        self.pipeline = pipeline
+        self.id = uuid.uuid4().hex
+        self.attrs = attrs
+        self.stages = {}
+        self.tokens = {}
+        self.counts = {}
+        self._started = time.perf_counter()
+        self._wall = time.time()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this the trace that module-level count() calls add to, in this context."""
+        token = _ACTIVE.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE.reset(token)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def record_usage(self, model: str, prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0):
+        """Adds a completion's token usage; cached_tokens is the part of prompt_tokens served from the prefix cache."""
+        self.tokens["model"] = model
+        self.tokens["prompt"] = self.tokens.get("prompt", 0) + (prompt_tokens or 0)
+        self.tokens["completion"] = self.tokens.get("completion", 0) + (completion_tokens or 0)
+        self.tokens["cached"] = self.tokens.get("cached", 0) + (cached_tokens or 0)
+
+    def finish(self, log: TraceLog = None, registry: MetricsRegistry = None, **attrs) -> dict:
+        log = TRACE_LOG if log is None else log
+        registry = METRICS if registry is None else registry
+        self.attrs.update(attrs)
+        total = time.perf_counter() - self._started
+        record = {
+            "ts": self._wall,
+            "trace_id": self.id,
+            "pipeline": self.pipeline,
+            "total_seconds": round(total, 6),
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "tokens": self.tokens,
+            "counts": self.counts,
+            **self.attrs,
+        }
+
+        registry.observe("request_seconds", total, "End-to-end time per upload or question", pipeline=self.pipeline)
+        for name, seconds in self.stages.items():
+            registry.observe("stage_seconds", seconds, "Time spent per pipeline stage", pipeline=self.pipeline, stage=name)
+        if self.tokens:
+            for kind in ("prompt", "completion", "cached"):
+                registry.inc("completion_tokens_total", self.tokens.get(kind, 0),
+                             "Chat completion token usage; cached is the part of prompt read from the provider's prefix cache",
+                             model=self.tokens["model"], kind=kind)
+        try:
+            if log is not None:
+                log.append(record)
+            registry.maybe_write()
+        except OSError:
+            pass  # instrumentation never fails a request
+        return record
+
+
+def count(name: str, value: int = 1):
+    """Adds to a counter on the active trace, if any (e.g. from deep inside the embedding pipeline)."""
+    trace = _ACTIVE.get()
+    if trace is not None:
+        trace.count(name, value)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0"):
+    """Serves the registry for Prometheus scraping on a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -1,40 +1,53 @@
 # src/Helpers/prompt_builder.py
 
-def build_prompt_from_context(question: str, context: str) -> str:
-    return f"""
+# Bump whenever a template below changes; cached answers are keyed on it
+PROMPT_VERSION = "2"
+
+# Providers reuse the longest prompt prefix they have recently seen (OpenAI
+# from 1024 tokens, in 128-token steps), billing it at a discount and skipping
+# its prefill. Messages therefore run from most to least stable: the fixed
+# instructions as the system message, then the retrieved document content
+# (the same chunks come back for follow-ups on the same uploads), and the
+# question last. The templates are built once; a request only substitutes
+# the context and question.
+
+SYSTEM_PROMPT = """
 You are a helpful assistant specializing in Singapore's MOM policies for hiring Migrant Domestic Workers (MDWs), confinement nannies, and elderly caregivers.
 
-The user asked:
-{question}
-
-Use ONLY the following extracted document content to answer:
-{context}
-
-Instructions:
-- First, try to answer strictly using the document content above.
+Each user message holds extracted document content followed by the user's question. Use ONLY that document content to answer:
+- First, try to answer strictly using the document content.
 - If clarity is missing, you MAY supplement with general MOM knowledge—but DO NOT contradict the content.
 - Assume the eService may apply to both MDWs and confinement nannies unless specified.
 - Include any URLs found (e.g. https://www.mom.gov.sg/...).
 - If no relevant info is found, say: "I couldn't find a direct reference in the uploaded documents. Based on MOM policies, here's what you should know..."
-""".strip()
 
+When the message says no relevant documents were retrieved:
+- Please answer based on general MOM knowledge.
+- If unsure, say: "I don't have enough information. Please refer to https://www.mom.gov.sg for more."
+""".strip()
 
-def build_fallback_prompt(question: str) -> str:
-    return f"""
-You are a helpful assistant specializing in Singapore's MOM policies for hiring MDWs, confinement nannies, and elderly caregivers.
+CONTEXT_TEMPLATE = """
+Extracted document content:
+{context}
 
 The user asked:
 {question}
+""".strip()
 
-However, no relevant documents were retrieved.
+FALLBACK_TEMPLATE = """
+No relevant documents were retrieved.
 
-Instructions:
-- Please answer based on general MOM knowledge.
-- If unsure, say: "I don't have enough information. Please refer to https://www.mom.gov.sg for more."
+The user asked:
+{question}
 """.strip()
 
-def build_prompt(question: str, context: str = None) -> str:
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
+def build_messages(question: str, context: str = None) -> list:
+    """Chat messages for the question: the shared system message, then context and question."""
     if context:
-        return build_prompt_from_context(question, context)
+        content = CONTEXT_TEMPLATE.format(context=context, question=question)
     else:
-        return build_fallback_prompt(question)
+        content = FALLBACK_TEMPLATE.format(question=question)
+    return [dict(_SYSTEM_MESSAGE), {"role": "user", "content": content}]
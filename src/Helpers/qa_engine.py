@@ -0,0 +1,416 @@
+# src/Helpers/qa_engine.py
+import contextlib
+import contextvars
+import hashlib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Helpers import chunking
+from Helpers.answer_cache import normalise_question
+from Helpers.chunk_store import get_chunk_store, read_chunk_text
+from Helpers.context_packer import DEFAULT_TOKEN_BUDGET, pack_context, similarity_from_distance
+from Helpers.metrics import Trace
+from Helpers.filters import is_question_safe, relevance_category
+from Helpers.indexer import (
+    chunk_position,
+    diff_documents,
+    document_key,
+    embed_documents,
+    remove_documents,
+    scope_filter,
+    write_documents,
+)
+from Helpers.lexical_index import BM25Index, reciprocal_rank_fusion, sync_lexical_index
+from Helpers.prompt_builder import PROMPT_VERSION, build_messages
+
+# Document indexing and question answering for the Q&A page, free of Streamlit
+# calls so the same code runs headless (benchmarks, scripts). `state` is any
+# mutable mapping: st.session_state in the app, a plain dict elsewhere. Clients,
+# caches and the vector index are passed in rather than looked up.
+
+MODEL_COMPLETION = "gpt-4o-mini"
+N_RESULTS = 10
+CONTEXT_TOKEN_BUDGET = DEFAULT_TOKEN_BUDGET
+QUERY_EMBEDDING_TIMEOUT = 3.0
+RETRIEVAL_MODES = ["hybrid", "vector", "lexical"]
+
+
+def count_tokens(text, model=MODEL_COMPLETION):
+    return chunking.count_tokens(text, model)
+
+
+def _record_usage(timing, usage):
+    if timing is not None and usage is not None:
+        timing["prompt_tokens"] = usage.prompt_tokens
+        timing["completion_tokens"] = usage.completion_tokens
+        # Prompt tokens served from the provider's prefix cache (absent on older APIs)
+        details = getattr(usage, "prompt_tokens_details", None)
+        timing["cached_tokens"] = getattr(details, "cached_tokens", None) or 0
+
+
+def get_completion(client, messages, model=MODEL_COMPLETION, timing=None):
+    started = time.perf_counter()
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0,
+    )
+    if timing is not None:
+        timing["total"] = time.perf_counter() - started
+    _record_usage(timing, response.usage)
+    return response.choices[0].message.content
+
+
+def stream_completion(client, messages, model=MODEL_COMPLETION, timing=None):
+    """Yields answer text as it is generated; fills timing with ttft, total seconds and token usage."""
+    started = time.perf_counter()
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0,
+        stream=True,
+        # The final chunk then carries the token usage (with no choices)
+        stream_options={"include_usage": True},
+    )
+    for event in stream:
+        delta = event.choices[0].delta.content if event.choices else None
+        if delta:
+            if timing is not None and "ttft" not in timing:
+                timing["ttft"] = time.perf_counter() - started
+            yield delta
+        _record_usage(timing, getattr(event, "usage", None))
+    if timing is not None:
+        timing["total"] = time.perf_counter() - started
+
+
+def compute_chunks_hash(chunks):
+    # Chunk ids are derived from each document's content hash and the chunk's offsets
+    id_data = "\n".join([chunk["chunk_id"] for chunk in chunks])
+    return hashlib.md5(id_data.encode("utf-8")).hexdigest()
+
+
+# ------------------------------
+# Document indexing
+# ------------------------------
+def needs_indexing(state, janitor) -> bool:
+    """Refreshes the session's chunk list and lexical index; True when the vector index must be synced."""
+    # Every rerun keeps this session's documents alive; ones the janitor evicted
+    # while the session was idle are re-indexed, unless their stored text was
+    # deleted too (state["expired_docs"] lists those; they must be uploaded again)
+    indexed = state.setdefault("indexed_docs", {})
+    janitor.registry.touch(indexed)
+    evicted = set(indexed) - janitor.registry.registered(indexed)
+    if evicted:
+        remove_documents(indexed, list(evicted))
+        state["embedding_built"] = False
+        store = get_chunk_store()
+        expired = {
+            document_key(doc): doc["filename"] for doc in state["uploaded_docs"]
+            if document_key(doc) in evicted and not all("text" in chunk for chunk in doc["chunks"])
+            and not store.has(doc["doc_hash"])
+        }
+        if expired:
+            state["uploaded_docs"] = [doc for doc in state["uploaded_docs"] if document_key(doc) not in expired]
+            state.setdefault("expired_docs", []).extend(expired.values())
+
+    all_chunks = []
+    for doc in state["uploaded_docs"]:
+        all_chunks.extend(doc["chunks"])
+    state["all_chunks"] = all_chunks
+
+    # The lexical index is normally filled at upload time; this only catches up
+    lexical_index = state.setdefault("lexical_index", BM25Index())
+    sync_lexical_index(lexical_index, state["uploaded_docs"], document_key)
+
+    return not (state.get("doc_chunks_hash") == compute_chunks_hash(all_chunks) and state.get("embedding_built"))
+
+
+def index_documents(state, embed_fn, janitor):
+    indexed = state.setdefault("indexed_docs", {})
+    trace = Trace("index", documents=len(state["uploaded_docs"]), chunks=len(state["all_chunks"]))
+    # Only chunks not yet in the shared collection are embedded (cache misses only),
+    # before taking the process-wide write lock so other sessions never wait on the API
+    with trace.activate():
+        with trace.stage("sync_index"):
+            to_add, to_remove = diff_documents(state["uploaded_docs"], indexed)
+            remove_documents(indexed, to_remove)
+            vectors = embed_documents(janitor.collection(), to_add, embed_fn)
+            with janitor.write_lock:
+                write_documents(janitor.collection(), to_add, indexed, embed_fn, vectors)
+                janitor.registry.register({key: len(ids) for key, ids in indexed.items()})
+    state["embedding_built"] = True
+    state["doc_chunks_hash"] = compute_chunks_hash(state["all_chunks"])
+    trace.finish()
+
+
+# ------------------------------
+# Retrieval
+# ------------------------------
+def embed_query(embed_fn, question, timeout=QUERY_EMBEDDING_TIMEOUT, cache=None):
+    """Returns the question's embedding, or None when the embedding API fails or is too slow.
+
+    With a QueryEmbeddingCache, cached questions skip the API and new ones are added.
+    """
+    if cache is not None:
+        vector = cache.get(question)
+        if vector is not None:
+            return vector
+    pool = ThreadPoolExecutor(max_workers=1)
+    future = pool.submit(contextvars.copy_context().run, embed_fn, [question])
+    pool.shutdown(wait=False)
+    try:
+        vector = future.result(timeout=timeout)[0]
+    except Exception:
+        return None
+    if cache is not None:
+        cache.put(question, vector)
+    return vector
+
+
+def retrieve_chunks(state, janitor, question, query_embedding, n_results=N_RESULTS, trace=None, corpus=None):
+    """Returns [(chunk_id, text, token_count, similarity)] for the best chunks, fusing vector and BM25 rankings.
+
+    similarity is the cosine similarity to the question, None for chunks only
+    the keyword search found. These are candidates for pack_context. Falls back to lexical-only when there is no query embedding. With a trace,
+    the vector query, lexical search and token counting are timed separately.
+    With a corpus, its collection and BM25 index are ranked alongside the uploads.
+    """
+    trace = trace or Trace("retrieve")
+    mode = state.get("retrieval_mode", "hybrid")
+    rankings, found = [], {}
+
+    # Without uploads the scope filter would match the whole shared collection
+    collections = [(janitor.collection(), scope_filter(state["indexed_docs"]))] if state.get("indexed_docs") else []
+    lexical_indexes = [state["lexical_index"]] if "lexical_index" in state else []
+    if corpus is not None:
+        collections.append((corpus.collection(), None))
+        lexical_indexes.append(corpus.lexical_index)
+
+    if mode != "lexical" and query_embedding is not None:
+        for collection, where in collections:
+            with trace.stage("vector_query"):
+                results = collection.query(query_embeddings=[query_embedding], n_results=n_results, where=where)
+            ids = results["ids"][0] if results["ids"] else []
+            for chunk_id, text, meta, distance in zip(
+                ids, results["documents"][0], results["metadatas"][0], results["distances"][0]
+            ):
+                found[chunk_id] = (text, (meta or {}).get("token_count"), similarity_from_distance(distance))
+            rankings.append(ids)
+
+    if mode != "vector" or query_embedding is None:
+        for lexical_index in lexical_indexes:
+            with trace.stage("lexical_query"):
+                ids = [chunk_id for chunk_id, _ in lexical_index.search(question, n_results)]
+            for chunk_id in ids:
+                chunk = lexical_index.chunks[chunk_id]
+                found.setdefault(chunk_id, (read_chunk_text(chunk), chunk.get("token_count"), None))
+            rankings.append(ids)
+
+    retrieved = [(chunk_id, *found[chunk_id]) for chunk_id, _ in reciprocal_rank_fusion(rankings)[:n_results]]
+    # Older documents carry no stored token counts; only those are tokenized here
+    untokenized = [text for _, text, tokens, _ in retrieved if tokens is None]
+    if untokenized:
+        with trace.stage("count_tokens"):
+            counted = iter([count_tokens(text) for text in untokenized])
+        retrieved = [
+            (chunk_id, text, tokens if tokens is not None else next(counted), similarity)
+            for chunk_id, text, tokens, similarity in retrieved
+        ]
+    trace.count("retrieved_chunks", len(retrieved))
+    return retrieved
+
+
+def format_context(retrieved) -> str:
+    """Prompt context from [(chunk_id, text, ...)], in document order rather than rank order.
+
+    The same chunks then always give the same text, and so the same cacheable
+    prompt prefix, whichever question retrieved them.
+    """
+    ordered = sorted(retrieved, key=lambda chunk: chunk_position(chunk[0]))
+    return "\n\n".join(chunk[1] for chunk in ordered).strip()
+
+
+def _known_chunks(state, corpus=None) -> dict:
+    chunks = dict(corpus.lexical_index.chunks) if corpus is not None else {}
+    chunks.update(state["lexical_index"].chunks if "lexical_index" in state else {})
+    return chunks
+
+
+def chunk_texts(state, chunk_ids, corpus=None):
+    """Texts of the session's (or corpus) chunks with these ids, skipping ones no longer available."""
+    chunks = _known_chunks(state, corpus)
+    return [read_chunk_text(chunks[chunk_id]) for chunk_id in chunk_ids if chunk_id in chunks]
+
+
+def _retrieval_key(state, corpus=None) -> tuple:
+    return (
+        state.get("doc_chunks_hash", ""),
+        state.get("retrieval_mode", "hybrid"),
+        corpus.version if corpus is not None else None,
+    )
+
+
+def _answer_retrieval(state) -> str:
+    # The settings an answer's context depends on, for the answer cache scope
+    return f'{state.get("retrieval_mode", "hybrid")}|{state.get("context_token_budget", CONTEXT_TOKEN_BUDGET)}'
+
+
+def precompute_retrievals(state, janitor, questions, query_cache, corpus=None) -> int:
+    """Runs retrieval for questions (quick-start, FAQ) into state["precomputed_retrievals"].
+
+    Only recomputed when the indexed documents, retrieval mode or corpus change;
+    returns how many questions were retrieved. Questions whose embedding is not
+    in query_cache are skipped (except in lexical mode), so this never calls the
+    embedding API.
+    """
+    key = _retrieval_key(state, corpus)
+    precomputed = state.get("precomputed_retrievals")
+    if precomputed and precomputed["key"] == key:
+        return 0
+    lexical = key[1] == "lexical"
+    results = {}
+    unique = {}
+    for question in questions:
+        unique.setdefault(normalise_question(question), question)
+    for normalised, question in unique.items():
+        query_embedding = None if lexical else query_cache.get(question)
+        if query_embedding is None and not lexical:
+            continue
+        retrieved = retrieve_chunks(state, janitor, question, query_embedding, corpus=corpus)
+        # No texts; they are read back from the chunk store when used
+        results[normalised] = [(chunk_id, tokens, similarity) for chunk_id, _, tokens, similarity in retrieved]
+    state["precomputed_retrievals"] = {"key": key, "results": results}
+    return len(results)
+
+
+def precomputed_retrieval(state, question, corpus=None):
+    """[(chunk_id, text, token_count, similarity)] precomputed for question in the current scope, or None."""
+    precomputed = state.get("precomputed_retrievals")
+    if not precomputed or precomputed["key"] != _retrieval_key(state, corpus):
+        return None
+    retrieved = precomputed["results"].get(normalise_question(question))
+    if retrieved is None:
+        return None
+    chunks = _known_chunks(state, corpus)
+    if any(chunk_id not in chunks for chunk_id, _, _ in retrieved):
+        return None
+    return [(chunk_id, read_chunk_text(chunks[chunk_id]), tokens, similarity) for chunk_id, tokens, similarity in retrieved]
+
+
+# ------------------------------
+# Answering
+# ------------------------------
+def answer_question(state, question, client, embed_fn, answer_cache, janitor,
+                    render_stream=None, searching=contextlib.nullcontext, corpus=None, query_cache=None):
+    """Answers question into state["last_answer"]; returns {"status", "cache", "stages", "tokens", "trace_id"}.
+
+    status is "unsafe", "irrelevant" or "answered"; stages maps each step to
+    seconds and tokens holds the completion's token usage. Every call is
+    written to the metrics trace log. When streaming, render_stream(chunks)
+    consumes the token generator and returns the full text (the default just joins it).
+    With a corpus, its documents are searched along with the session's uploads.
+    With a query_cache, repeated questions skip the embedding call, and questions
+    with a precompute_retrievals() result skip retrieval as well. The retrieved
+    candidates are packed into state["context_token_budget"] tokens (default
+    CONTEXT_TOKEN_BUDGET) by pack_context.
+    """
+    trace = Trace("question", retrieval_mode=state.get("retrieval_mode", "hybrid"))
+    with trace.activate():
+        status, cache_kind = _answer(state, question, client, embed_fn, answer_cache, janitor,
+                                     render_stream, searching, trace, corpus, query_cache)
+    trace.finish(status=status, cache=cache_kind)
+    state["last_answer_trace"] = {"stages": dict(trace.stages), "tokens": dict(trace.tokens), "counts": dict(trace.counts)}
+    return {"status": status, "cache": cache_kind, "stages": trace.stages, "tokens": trace.tokens, "trace_id": trace.id}
+
+
+def _answer(state, question, client, embed_fn, answer_cache, janitor, render_stream, searching, trace, corpus,
+            query_cache):
+    with trace.stage("filter"):
+        if "question_relevance" not in state or state.get("last_checked_question") != question:
+            # Category name ("mdw", "childcare", ...) or None when off-topic
+            state["question_relevance"] = relevance_category(question)
+            state["question_safe"] = is_question_safe(question)
+            state["last_checked_question"] = question
+
+    if not state["question_safe"]:
+        return "unsafe", None
+    if not state["question_relevance"]:
+        return "irrelevant", None
+
+    # Cached answers are scoped to the uploads and, when searched, the corpus build,
+    # and to the retrieval settings that chose their context
+    doc_hash = state.get("doc_chunks_hash", "") + (corpus.version if corpus is not None else "")
+    retrieval = _answer_retrieval(state)
+    with trace.stage("cache_lookup"):
+        cached = answer_cache.get_exact(question, doc_hash, MODEL_COMPLETION, PROMPT_VERSION, retrieval)
+    cache_kind = "exact" if cached else None
+
+    # The query embedding serves both the near-duplicate lookup and retrieval
+    query_embedding = None
+    precomputed = precomputed_retrieval(state, question, corpus) if cached is None else None
+    if precomputed is not None:
+        # Quick-start and FAQ questions: no embedding call, at most an LRU lookup for the answer cache
+        query_embedding = query_cache.get(question) if query_cache is not None else None
+        trace.count("precomputed_retrievals")
+    elif cached is None and state.get("retrieval_mode", "hybrid") != "lexical":
+        with trace.stage("embed_query"):
+            query_embedding = embed_query(embed_fn, question, cache=query_cache)
+    if cached is None and query_embedding is not None:
+        with trace.stage("similar_lookup"):
+            cached = answer_cache.get_similar(query_embedding, doc_hash, MODEL_COMPLETION, PROMPT_VERSION, retrieval)
+        cache_kind = "similar" if cached else None
+
+    if cached is not None:
+        state["last_answer"] = (
+            question, cached["answer"], cached["urls"], cached["token_count"], cached["retrieved_chunks"]
+        )
+        state["last_answer_cache"] = cache_kind
+        state["last_answer_timing"] = None
+        return "answered", cache_kind
+
+    with searching():
+        if precomputed is not None:
+            retrieved = precomputed
+        else:
+            retrieved = retrieve_chunks(state, janitor, question, query_embedding, trace=trace, corpus=corpus)
+        with trace.stage("pack_context"):
+            retrieved, dropped = pack_context(retrieved, state.get("context_token_budget", CONTEXT_TOKEN_BUDGET))
+        for reason, dropped_count in dropped.items():
+            trace.count(f"dropped_{reason}", dropped_count)
+        # Only ids are kept in state and the answer cache; chunk_texts() loads the text for display
+        retrieved_chunks = [chunk_id for chunk_id, _, _, _ in retrieved]
+        context = format_context(retrieved)
+        token_count = sum(tokens for _, _, tokens, _ in retrieved)
+
+    with trace.stage("prompt"):
+        urls_found = re.findall(r"https?://www\\.mom\\.gov\\.sg[\\w\\-\\./\\?#%&=]*", context)
+        messages = build_messages(question, context if retrieved_chunks else None)
+
+    timing = {"streamed": state.get("stream_answers", True)}
+    with trace.stage("completion"):
+        if timing["streamed"]:
+            answer = (render_stream or "".join)(stream_completion(client, messages, timing=timing))
+        else:
+            answer = get_completion(client, messages, timing=timing)
+    if "ttft" in timing:
+        trace.add("first_token", timing["ttft"])
+    trace.record_usage(
+        MODEL_COMPLETION, timing.get("prompt_tokens"), timing.get("completion_tokens"), timing.get("cached_tokens")
+    )
+    trace.count("context_tokens", token_count)
+    state["last_answer_timing"] = timing
+
+    state["last_answer"] = (question, answer, urls_found, token_count, retrieved_chunks)
+    state["last_answer_cache"] = None
+    with trace.stage("cache_store"):
+        answer_cache.put(
+            question,
+            doc_hash,
+            MODEL_COMPLETION,
+            PROMPT_VERSION,
+            {"answer": answer, "urls": urls_found, "token_count": token_count, "retrieved_chunks": retrieved_chunks},
+            query_embedding=query_embedding,
+            retrieval=retrieval,
+        )
+    return "answered", None
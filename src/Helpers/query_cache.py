@@ -0,0 +1,86 @@
+# src/Helpers/query_cache.py
+import collections
+import os
+import threading
+
+from Helpers import metrics
+from Helpers.answer_cache import normalise_question
+
+# Questions asked again and again (the quick-start buttons, a configured FAQ
+# list) should not pay for an embedding round-trip or a vector query each time.
+# QueryEmbeddingCache is a process-wide LRU of question vectors, warmed when the
+# app starts; qa_engine.precompute_retrievals keeps each session's top-k for
+# those questions, recomputed whenever the indexed document set changes. Keys
+# use the answer cache's normalisation, so both caches agree on what counts as
+# the same question; the embedded text is still the question as written.
+
+DEFAULT_FAQ_PATH = os.path.join("data", "faq_questions.txt")
+DEFAULT_MAX_QUERIES = 2048
+
+
+def read_questions(path: str = DEFAULT_FAQ_PATH) -> list:
+    """One question per line; blank lines and lines starting with # are skipped."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        lines = (" ".join(line.split()) for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+class QueryEmbeddingCache:
+    """Thread-safe in-memory LRU from (model, question) to its embedding."""
+
+    def __init__(self, model: str, max_entries: int = DEFAULT_MAX_QUERIES):
+        self.model = model
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, question: str):
+        key = normalise_question(question)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.count("query_embedding_cache_hits" if vector is not None else "query_embedding_cache_misses")
+        return vector
+
+    def put(self, question: str, vector):
+        key = normalise_question(question)
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, question: str) -> bool:
+        with self._lock:
+            return normalise_question(question) in self._entries
+
+    def warm(self, questions: list, embed_fn) -> int:
+        """Embeds the questions not cached yet in one call; returns how many were embedded."""
+        missing = {}
+        for question in questions:
+            key = normalise_question(question)
+            if key and key not in missing and question not in self:
+                missing[key] = question
+        if missing:
+            for question, vector in zip(missing.values(), embed_fn(list(missing.values()))):
+                self.put(question, vector)
+        return len(missing)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,213 @@
+# src/Helpers/resources.py
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from Helpers import settings
+from Helpers.answer_cache import AnswerCache
+from Helpers.chunk_store import get_chunk_store
+from Helpers.corpus import CORPUS_COLLECTION_NAME, Corpus
+from Helpers.embedding_cache import EmbeddingCache
+from Helpers.embedding_pipeline import TokenRateLimiter
+from Helpers.extraction_cache import ExtractionCache
+from Helpers.index_janitor import IndexJanitor, NamespaceRegistry
+from Helpers.ingest_jobs import IngestJobQueue
+from Helpers.metrics import start_metrics_server
+from Helpers.query_cache import QueryEmbeddingCache, read_questions
+from Helpers.settings import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_PATH,
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_TTL_SECONDS,
+    CHUNK_COLLECTION_NAME,
+    CORPUS_MANIFEST_PATH,
+    CORPUS_SNAPSHOT,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_TOKENS_PER_MINUTE,
+    EXTRACTION_CACHE_PATH,
+    FAQ_QUESTIONS_PATH,
+    INGEST_WORKERS,
+    JANITOR_INTERVAL_SECONDS,
+    METRICS_PORT,
+    MODEL_EMBEDDING,
+    NAMESPACE_REGISTRY_PATH,
+    NAMESPACE_TTL_SECONDS,
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+    SESSION_INDEX_ROOT,
+    SNAPSHOT_ROOT,
+    VECTOR_INDEX_PATH,
+    make_openai_client,
+    make_vector_client,
+)
+from Helpers.snapshot import KEEP_SNAPSHOTS, current_snapshot, install_snapshot, referenced_documents, snapshot_paths
+
+# Process-wide resources shared by every Streamlit session (and the pages that
+# need them) via st.cache_resource. The settings and the uncached factories
+# live in settings.py, which the CLIs import without Streamlit.
+
+log = logging.getLogger(__name__)
+
+
+@st.cache_resource
+def get_openai_client(api_key: str):
+    """One client (and keep-alive connection pool) per API key per process; it is thread-safe."""
+    return make_openai_client(api_key)
+
+
+def resolve_openai_api_key() -> str:
+    api_key = st.session_state.get("openai_api_key", "").strip()
+    if not api_key:
+        api_key = st.secrets.get("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY", "")).strip()
+        if api_key:
+            st.session_state["openai_api_key"] = api_key
+    return api_key
+
+
+@st.cache_resource
+def get_vector_client(path: str = VECTOR_INDEX_PATH):
+    # Opening the index (SQLite and HNSW segments, or the mapped matrix) happens once per process
+    return make_vector_client(path)
+
+
+@st.cache_resource
+def get_index_janitor():
+    # Started once per process; evicts idle document namespaces (and their stored
+    # text, unless the corpus uses it) and compacts the collection
+    janitor = IndexJanitor(
+        make_vector_client,
+        SESSION_INDEX_ROOT,
+        CHUNK_COLLECTION_NAME,
+        NamespaceRegistry(NAMESPACE_REGISTRY_PATH),
+        ttl_seconds=NAMESPACE_TTL_SECONDS,
+        interval_seconds=JANITOR_INTERVAL_SECONDS,
+        store=get_chunk_store(),
+        referenced=lambda: referenced_documents(CORPUS_MANIFEST_PATH, SNAPSHOT_ROOT),
+    )
+    return janitor.start()
+
+
+@st.cache_resource
+def get_ingest_queue():
+    # Shared by every session; each session only sees its own jobs
+    return IngestJobQueue(
+        INGEST_WORKERS,
+        janitor=get_index_janitor(),
+        store=get_chunk_store(),
+        extraction_cache=get_extraction_cache(),
+    )
+
+
+def get_corpus():
+    """The current shared corpus, or None when nothing was ingested.
+
+    Checks the snapshot pointer on every call, so installing a snapshot swaps
+    the corpus in on the next rerun. Without snapshots the corpus built by
+    src/ingest.py is loaded once per process.
+    """
+    install_shipped_snapshot()
+    return load_corpus(current_snapshot(SNAPSHOT_ROOT))
+
+
+@st.cache_resource
+def install_shipped_snapshot():
+    # Loading vectors from disk replaces re-embedding the corpus on a fresh replica
+    if CORPUS_SNAPSHOT:
+        return install_snapshot(CORPUS_SNAPSHOT, make_vector_client, SNAPSHOT_ROOT, MODEL_EMBEDDING)
+    return None
+
+
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_corpus(version):
+    if version is None:
+        corpus = Corpus(get_vector_client(), CORPUS_MANIFEST_PATH, CORPUS_COLLECTION_NAME)
+    else:
+        paths = snapshot_paths(SNAPSHOT_ROOT, version)
+        corpus = Corpus(get_vector_client(paths["index"]), paths["manifest"], CORPUS_COLLECTION_NAME)
+    return corpus if len(corpus) else None
+
+
+@st.cache_resource
+def get_extraction_cache():
+    # Keyed by the uploaded bytes, so a known document is never extracted twice in this deployment
+    return ExtractionCache(EXTRACTION_CACHE_PATH)
+
+
+def get_chunk_collection():
+    # The active collection changes after a compaction, so look it up on every use.
+    # Vectors are always supplied by make_embedder, so it needs no embedding function.
+    return get_index_janitor().collection()
+
+
+@st.cache_resource
+def get_embedding_cache():
+    # Shared by every session in this process so re-uploads never re-embed
+    return EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+
+
+@st.cache_resource
+def get_query_embedding_cache():
+    # In memory and shared by every session: repeated questions never re-embed
+    return QueryEmbeddingCache(MODEL_EMBEDDING, max_entries=QUERY_EMBEDDING_CACHE_MAX_ENTRIES)
+
+
+@st.cache_resource
+def get_faq_questions() -> list:
+    return read_questions(FAQ_QUESTIONS_PATH)
+
+
+def _warm_query_embeddings(query_cache: QueryEmbeddingCache, questions: tuple, embed) -> int:
+    try:
+        return query_cache.warm(list(questions), embed)
+    except Exception:
+        log.exception("Warming the embeddings of %d quick-start/FAQ questions failed", len(questions))
+        raise
+
+
+@st.cache_resource
+def warm_query_embeddings(questions: tuple, _client):
+    """Embeds questions into the query cache once per process, on a background thread.
+
+    Returns the Future (of how many were embedded); pages check done() instead of
+    waiting, and a failure is logged once rather than retried on every rerun.
+    """
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-warmup")
+    future = pool.submit(_warm_query_embeddings, get_query_embedding_cache(), questions, make_embedder(_client))
+    pool.shutdown(wait=False)
+    return future
+
+
+@st.cache_resource
+def get_embedding_rate_limiter():
+    # One bucket per process: every session draws from the same TPM quota
+    return TokenRateLimiter(EMBEDDING_TOKENS_PER_MINUTE)
+
+
+def make_embedder(client, model: str = MODEL_EMBEDDING, cache: EmbeddingCache = None, limiter: TokenRateLimiter = None):
+    """settings.make_embedder with the cache and limiter defaulting to the process-wide ones."""
+    cache = get_embedding_cache() if cache is None else cache
+    limiter = get_embedding_rate_limiter() if limiter is None else limiter
+    return settings.make_embedder(client, cache, limiter, model)
+
+
+@st.cache_resource
+def get_answer_cache():
+    return AnswerCache(
+        ANSWER_CACHE_PATH,
+        ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES,
+        similarity_threshold=ANSWER_CACHE_SIMILARITY,
+    )
+
+
+@st.cache_resource
+def get_metrics_server():
+    """Starts the Prometheus endpoint once per process when METRICS_PORT is set."""
+    if not METRICS_PORT:
+        return None
+    try:
+        return start_metrics_server(METRICS_PORT)
+    except OSError:
+        return None  # another worker already serves this port
@@ -0,0 +1,118 @@
+# src/Helpers/settings.py
+import os
+import sys
+
+import httpx
+import openai
+
+from Helpers.corpus import DEFAULT_MANIFEST_PATH
+from Helpers.embedding_cache import EmbeddingCache, embed_with_cache
+from Helpers.embedding_pipeline import TokenRateLimiter, embed_concurrently, openai_embed_batch
+from Helpers.query_cache import DEFAULT_FAQ_PATH
+from Helpers.snapshot import DEFAULT_SNAPSHOT_ROOT
+from Helpers.vector_backend import DEFAULT_VECTOR_BACKEND, NumpyClient
+
+# Deployment settings (overridable through the environment) and the plain
+# factories built from them. Nothing here imports Streamlit, so the batch CLIs
+# (src/ingest.py, src/snapshot.py) and benchmarks use this module directly;
+# resources.py wraps the factories in st.cache_resource for the app.
+
+MODEL_EMBEDDING = "text-embedding-3-small"
+# "chroma" (PersistentClient: SQLite + HNSW) or "numpy" (in-process matrix, see vector_backend.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", DEFAULT_VECTOR_BACKEND)
+# Storage precision of the numpy backend: float32 or float16
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")
+CHROMA_PATH = ".chroma"
+NUMPY_INDEX_PATH = ".vectors"
+VECTOR_INDEX_PATH = NUMPY_INDEX_PATH if VECTOR_BACKEND == "numpy" else CHROMA_PATH
+# Uploaded documents' vectors; the janitor keeps one generation directory per compaction here
+SESSION_INDEX_ROOT = os.getenv("SESSION_INDEX_ROOT", f"{VECTOR_INDEX_PATH}-sessions")
+CHUNK_COLLECTION_NAME = "doc_chunks"
+
+EMBEDDING_CACHE_PATH = os.path.join("data", "cache", "embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000
+EMBEDDING_BATCH_SIZE = 256
+EMBEDDING_MAX_WORKERS = 4
+EMBEDDING_TOKENS_PER_MINUTE = 1_000_000
+EXTRACTION_CACHE_PATH = os.path.join("data", "cache", "extractions.sqlite3")
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = 2048
+# Extra questions (one per line) warmed and precomputed like the quick-start buttons
+FAQ_QUESTIONS_PATH = os.getenv("FAQ_QUESTIONS_PATH", DEFAULT_FAQ_PATH)
+ANSWER_CACHE_PATH = os.path.join("data", "cache", "answers.sqlite3")
+ANSWER_CACHE_TTL_SECONDS = 7 * 24 * 3600
+ANSWER_CACHE_MAX_ENTRIES = 5_000
+ANSWER_CACHE_SIMILARITY = 0.95
+NAMESPACE_REGISTRY_PATH = os.path.join("data", "cache", "namespaces.sqlite3")
+NAMESPACE_TTL_SECONDS = float(os.getenv("NAMESPACE_TTL_SECONDS", 24 * 3600))
+JANITOR_INTERVAL_SECONDS = float(os.getenv("JANITOR_INTERVAL_SECONDS", 15 * 60))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+# Written by src/ingest.py; the app only reads it
+CORPUS_MANIFEST_PATH = os.getenv("CORPUS_MANIFEST_PATH", DEFAULT_MANIFEST_PATH)
+# Installed corpus snapshots (src/snapshot.py); once one is current it replaces the manifest above
+SNAPSHOT_ROOT = os.getenv("SNAPSHOT_ROOT", DEFAULT_SNAPSHOT_ROOT)
+# A snapshot shipped with the deployment, installed when the process starts
+CORPUS_SNAPSHOT = os.getenv("CORPUS_SNAPSHOT", "")
+
+# HTTP pool and timeouts for the OpenAI client, overridable per deployment
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "32"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+# Port for the Prometheus /metrics endpoint; unset means metrics are only written to data/metrics
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+
+def make_openai_client(api_key: str, base_url: str = None, max_connections: int = OPENAI_MAX_CONNECTIONS,
+                       max_keepalive: int = OPENAI_MAX_KEEPALIVE, timeout: float = OPENAI_TIMEOUT,
+                       connect_timeout: float = OPENAI_CONNECT_TIMEOUT):
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+    )
+    return openai.OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=OPENAI_MAX_RETRIES)
+
+
+def import_chromadb():
+    # Chroma needs a newer SQLite than some hosts ship; swap in pysqlite3 before
+    # chromadb is imported for the first time in this process
+    if "chromadb" not in sys.modules:
+        try:
+            import pysqlite3
+            sys.modules["sqlite3"] = pysqlite3
+        except ImportError:
+            pass
+    import chromadb
+    return chromadb
+
+
+def make_vector_client(path: str = VECTOR_INDEX_PATH):
+    """Client for the configured backend; the numpy one never imports chromadb."""
+    if VECTOR_BACKEND == "numpy":
+        return NumpyClient(path, dtype=VECTOR_DTYPE)
+    if VECTOR_BACKEND == "chroma":
+        return import_chromadb().PersistentClient(path=path)
+    raise ValueError(f"Unknown VECTOR_BACKEND {VECTOR_BACKEND!r}")
+
+
+def make_embedder(client, cache: EmbeddingCache, limiter: TokenRateLimiter, model: str = MODEL_EMBEDDING):
+    """Returns embed(texts) -> vectors: cache hits first, misses through the concurrent pipeline.
+
+    The returned function makes no Streamlit calls, so it is safe to use from worker threads.
+    """
+    embed_batch = openai_embed_batch(client, model)
+
+    def embed_missing(texts):
+        return embed_concurrently(
+            texts,
+            embed_batch,
+            max_workers=EMBEDDING_MAX_WORKERS,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            limiter=limiter,
+        )
+
+    def embed(texts):
+        return embed_with_cache(texts, model, embed_missing, cache)
+
+    return embed
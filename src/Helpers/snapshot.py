@@ -0,0 +1,271 @@
+# src/Helpers/snapshot.py
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+import numpy as np
+
+from Helpers.chunk_store import get_chunk_store
+from Helpers.corpus import CORPUS_COLLECTION_NAME, Corpus, read_manifest
+from Helpers.indexer import CHROMA_ADD_BATCH, add_in_batches, document_key
+
+# A snapshot is a versioned, self-contained copy of the shared corpus that a
+# new replica can load without calling the embedding API:
+#
+#   snapshot.json    version, embedding model, shape and a sha256 per file
+#   manifest.jsonl   the corpus manifest (one line per document)
+#   embeddings.npy   float16 matrix, one row per chunk in manifest order
+#   documents/       the cleaned text of every document, as in the chunk store
+#
+# Installing one verifies every checksum, copies the documents into the chunk
+# store and builds a vector index of its own under <root>/<version>
+# (snapshot.json is copied last and marks it complete). Only then is the
+# CURRENT pointer replaced, so the app switches over in one step and sessions
+# still holding the previous corpus finish against it.
+
+SNAPSHOT_FORMAT = 1
+DEFAULT_SNAPSHOT_ROOT = os.path.join("data", "snapshots")
+CURRENT_POINTER = "CURRENT"
+KEEP_SNAPSHOTS = 2
+# Versions name a directory under the snapshot root, so they must be one plain path component
+_VERSION = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _snapshot_files(path: str) -> list:
+    names = [name for name in ("manifest.jsonl", "embeddings.npy") if os.path.exists(os.path.join(path, name))]
+    for directory, _, files in os.walk(os.path.join(path, "documents")):
+        names += sorted(os.path.relpath(os.path.join(directory, name), path).replace(os.sep, "/") for name in files)
+    return names
+
+
+def check_version(version) -> str:
+    if not isinstance(version, str) or not _VERSION.match(version) or version in (".", ".."):
+        raise SnapshotError(f"Invalid snapshot version {version!r}: use letters, digits, '.', '_' and '-'")
+    return version
+
+
+def corpus_rows(corpus: Corpus) -> list:
+    """(doc, chunk) pairs in the order of the embedding matrix rows."""
+    return [(doc, chunk) for doc in corpus.documents for chunk in doc["chunks"]]
+
+
+def export_snapshot(corpus: Corpus, out_dir: str, embedding_model: str, version: str = None) -> dict:
+    """Writes corpus to out_dir (which must not exist yet); returns the snapshot.json contents."""
+    if os.path.exists(out_dir):
+        raise SnapshotError(f"{out_dir} already exists")
+    if version is not None:
+        check_version(version)
+    rows = corpus_rows(corpus)
+    if not rows:
+        raise SnapshotError("The corpus is empty")
+
+    collection = corpus.collection()
+    ids = [chunk["chunk_id"] for _, chunk in rows]
+    found = {}
+    for i in range(0, len(ids), CHROMA_ADD_BATCH):
+        page = collection.get(ids=ids[i:i + CHROMA_ADD_BATCH], include=["embeddings"])
+        found.update(zip(page["ids"], page["embeddings"]))
+    missing = [chunk_id for chunk_id in ids if chunk_id not in found]
+    if missing:
+        raise SnapshotError(f"{len(missing)} chunks have no vector in the collection, e.g. {missing[0]}")
+
+    tmp = f"{out_dir}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(os.path.join(tmp, "documents"))
+    try:
+        embeddings = np.lib.format.open_memmap(
+            os.path.join(tmp, "embeddings.npy"), mode="w+", dtype=np.float16, shape=(len(ids), len(found[ids[0]]))
+        )
+        for row, chunk_id in enumerate(ids):
+            embeddings[row] = found[chunk_id]
+        embeddings.flush()
+        del embeddings
+
+        store = get_chunk_store()
+        with open(os.path.join(tmp, "manifest.jsonl"), "w", encoding="utf-8") as f:
+            for record in corpus.records:
+                f.write(json.dumps(record) + "\n")
+                shutil.copyfile(store.path(record["doc_hash"]), os.path.join(tmp, "documents", f"{record['doc_hash']}.txt"))
+
+        info = {
+            "format": SNAPSHOT_FORMAT,
+            "version": version or f"{time.strftime('%Y%m%d-%H%M%S')}-{corpus.version[:8]}",
+            "created": time.time(),
+            "corpus_version": corpus.version,
+            "embedding_model": embedding_model,
+            "collection_metadata": collection.metadata,
+            "documents": len(corpus),
+            "chunks": len(ids),
+            "dimensions": len(found[ids[0]]),
+            "dtype": "float16",
+            "files": {name: _sha256(os.path.join(tmp, name)) for name in _snapshot_files(tmp)},
+        }
+        with open(os.path.join(tmp, "snapshot.json"), "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=2)
+        os.replace(tmp, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return info
+
+
+def verify_snapshot(path: str, embedding_model: str = None) -> dict:
+    """Checks the format, version, every file's checksum and the matrix shape; returns snapshot.json."""
+    try:
+        with open(os.path.join(path, "snapshot.json"), encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise SnapshotError(f"Unreadable snapshot.json in {path}: {e}")
+    if info.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Unsupported snapshot format {info.get('format')}")
+    # The checksums do not cover the version, and it becomes a directory that installs replace
+    check_version(info.get("version"))
+    if embedding_model and info["embedding_model"] != embedding_model:
+        raise SnapshotError(f"Snapshot was embedded with {info['embedding_model']}, the app queries with {embedding_model}")
+
+    present = set(_snapshot_files(path))
+    expected = set(info["files"])
+    if present != expected:
+        raise SnapshotError(f"Snapshot files differ from its listing: {sorted(present ^ expected)[:5]}")
+    for name, checksum in info["files"].items():
+        if _sha256(os.path.join(path, name)) != checksum:
+            raise SnapshotError(f"Checksum mismatch for {name}")
+
+    embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+    if embeddings.shape != (info["chunks"], info["dimensions"]):
+        raise SnapshotError(f"embeddings.npy has shape {embeddings.shape}, expected {(info['chunks'], info['dimensions'])}")
+    return info
+
+
+def current_snapshot(root: str = DEFAULT_SNAPSHOT_ROOT):
+    """Version named by the CURRENT pointer, or None before any snapshot was installed."""
+    try:
+        with open(os.path.join(root, CURRENT_POINTER), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def referenced_documents(manifest_path: str, root: str = DEFAULT_SNAPSHOT_ROOT) -> set:
+    """doc_hashes the corpus manifest or any installed snapshot still reads from the chunk store."""
+    manifests = [manifest_path]
+    if os.path.isdir(root):
+        manifests += [os.path.join(root, name, "manifest.jsonl") for name in os.listdir(root)]
+    return {record["doc_hash"] for path in manifests for record in read_manifest(path)}
+
+
+def snapshot_paths(root: str, version: str) -> dict:
+    directory = os.path.join(root, check_version(version))
+    if os.path.dirname(os.path.realpath(directory)) != os.path.realpath(root):
+        raise SnapshotError(f"Snapshot version {version!r} resolves outside {root}")
+    return {
+        "directory": directory,
+        "manifest": os.path.join(directory, "manifest.jsonl"),
+        "embeddings": os.path.join(directory, "embeddings.npy"),
+        "index": os.path.join(directory, "index"),
+    }
+
+
+def install_snapshot(source: str, make_client, root: str = DEFAULT_SNAPSHOT_ROOT, embedding_model: str = None) -> dict:
+    """Verifies source, builds its collection under root and makes it CURRENT; returns snapshot.json.
+
+    make_client(path) opens a vector client (see settings.make_vector_client). Installing
+    a version that is already built only re-verifies it and points CURRENT at it.
+    """
+    info = verify_snapshot(source, embedding_model)
+    directory = snapshot_paths(root, info["version"])["directory"]
+    if not os.path.exists(os.path.join(directory, "snapshot.json")):
+        _build(source, info, directory, make_client)
+    _set_current(root, info["version"])
+    _prune(root, info["version"])
+    return info
+
+
+def _build(source: str, info: dict, directory: str, make_client):
+    store = get_chunk_store()
+    for name in info["files"]:
+        if name.startswith("documents/"):
+            doc_hash = os.path.splitext(os.path.basename(name))[0]
+            if not store.has(doc_hash):
+                os.makedirs(os.path.dirname(store.path(doc_hash)), exist_ok=True)
+                tmp = f"{store.path(doc_hash)}.{uuid.uuid4().hex}.tmp"
+                shutil.copyfile(os.path.join(source, name), tmp)
+                os.replace(tmp, store.path(doc_hash))
+
+    # Left over from an interrupted install: snapshot.json is only written once the build is complete
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    try:
+        for name in ("manifest.jsonl", "embeddings.npy"):
+            shutil.copyfile(os.path.join(source, name), os.path.join(directory, name))
+        # A fresh index directory no other process has open, so building it
+        # never races the app's client on the live index. Chroma keeps clients
+        # open by path, so it is built in place rather than moved afterwards.
+        client = make_client(os.path.join(directory, "index"))
+        collection = client.create_collection(
+            name=CORPUS_COLLECTION_NAME, embedding_function=None, metadata=info.get("collection_metadata")
+        )
+        corpus = Corpus(None, os.path.join(directory, "manifest.jsonl"))
+        rows = corpus_rows(corpus)
+        if len(rows) != info["chunks"]:
+            raise SnapshotError(f"Manifest lists {len(rows)} chunks, snapshot.json {info['chunks']}")
+        embeddings = np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+        for i in range(0, len(rows), CHROMA_ADD_BATCH):
+            batch = rows[i:i + CHROMA_ADD_BATCH]
+            add_in_batches(
+                collection,
+                [chunk["chunk_id"] for _, chunk in batch],
+                [store.read(chunk["doc_hash"], *chunk["span"]) for _, chunk in batch],
+                embeddings[i:i + len(batch)].astype(np.float32).tolist(),
+                [
+                    {
+                        "chunk_id": chunk["chunk_id"],
+                        "source": chunk["source"],
+                        "doc_hash": document_key(doc),
+                        "token_count": chunk["token_count"],
+                    }
+                    for doc, chunk in batch
+                ],
+            )
+        del embeddings
+        tmp = os.path.join(directory, f"snapshot.json.{uuid.uuid4().hex}.tmp")
+        shutil.copyfile(os.path.join(source, "snapshot.json"), tmp)
+        os.replace(tmp, os.path.join(directory, "snapshot.json"))
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+
+def _set_current(root: str, version: str):
+    tmp = os.path.join(root, f"{CURRENT_POINTER}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, CURRENT_POINTER))
+
+
+def _prune(root: str, current: str):
+    # Keeps the current snapshot and the one before it, which sessions may still be querying
+    installed = sorted(
+        (name for name in os.listdir(root) if os.path.exists(os.path.join(root, name, "snapshot.json"))),
+        key=lambda name: os.path.getmtime(os.path.join(root, name)),
+        reverse=True,
+    )
+    for name in [name for name in installed if name != current][KEEP_SNAPSHOTS - 1:]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
@@ -0,0 +1,338 @@
+# src/Helpers/vector_backend.py
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+# Retrieval backends. Everything that stores or searches vectors (indexer,
+# qa_engine, ingest_jobs, the janitor, corpus snapshots) only uses this subset
+# of Chroma's client and collection API, so any object providing it can stand
+# in for Chroma:
+#
+#   client.get_or_create_collection(name, embedding_function=None, metadata=None)
+#   client.create_collection(name, embedding_function=None, metadata=None)
+#   client.delete_collection(name)
+#   collection.name, collection.metadata, collection.count()
+#   collection.add(ids, documents, embeddings, metadatas)
+#   collection.get(ids=None, where=None, limit=None, offset=None, include=[...])
+#   collection.query(query_embeddings, n_results, where=None)
+#   collection.delete(ids=None, where=None)
+#
+# where clauses are the ones scope_filter() builds: {"field": value} or
+# {"field": {"$in": [...]}}.
+#
+# NumpyClient keeps each collection as one contiguous matrix of normalised
+# vectors and answers queries with a dot product and argpartition top-k; a
+# query scoped to a few documents only touches their rows. With a path, rows
+# are appended to disk as they are added (deletes are logged by row number)
+# and the matrix is memory-mapped on load, so a read-mostly collection costs
+# no private memory until it changes.
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+DEFAULT_VECTOR_BACKEND = "chroma"
+VECTOR_DTYPES = ("float32", "float16")
+# float16 rows are widened to float32 this many at a time while scoring. The
+# widening dominates a full scan (about 10x float32 at 100k x 1536), so float16
+# suits large read-mostly collections queried with a document scope.
+SCORE_BLOCK_ROWS = 1024
+INITIAL_CAPACITY = 1024
+
+
+def _read_jsonl(path: str):
+    """Records of a JSONL file and each one's end offset; a torn last line is left out."""
+    records, ends, valid = [], [], 0
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    break
+                records.append(record)
+                valid += len(line)
+                ends.append(valid)
+    return records, ends
+
+
+def _truncate(path: str, size: int):
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        with open(path, "r+b") as f:
+            f.truncate(size)
+
+
+def _matches(metadata: dict, where: dict) -> bool:
+    for field, condition in where.items():
+        value = (metadata or {}).get(field)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class NumpyCollection:
+    """In-memory vector collection; see the module comment for the API it mirrors."""
+
+    # Metadata field queries are most often scoped by; its rows are indexed
+    SCOPE_FIELD = "doc_hash"
+
+    def __init__(self, name: str, metadata: dict = None, dtype: str = "float32", path: str = None):
+        self.name = name
+        self.metadata = metadata
+        self.dtype = np.dtype(dtype)
+        self.path = path
+        self._lock = threading.RLock()
+        self._matrix = None
+        self._size = 0
+        self._ids, self._documents, self._metadatas = [], [], []
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows = {}
+        self._scopes = {}
+        if path:
+            self._load()
+
+    # -- storage --------------------------------------------------------------
+    def _files(self) -> dict:
+        return {name: os.path.join(self.path, name) for name in ("meta.json", "vectors.bin", "rows.jsonl", "deleted.jsonl")}
+
+    def _load(self):
+        files = self._files()
+        if not os.path.exists(files["meta.json"]):
+            os.makedirs(self.path, exist_ok=True)
+            with open(files["meta.json"], "w", encoding="utf-8") as f:
+                json.dump({"name": self.name, "metadata": self.metadata, "dtype": self.dtype.name}, f)
+            return
+        with open(files["meta.json"], encoding="utf-8") as f:
+            meta = json.load(f)
+        self.metadata, self.dtype = meta["metadata"], np.dtype(meta["dtype"])
+        rows, row_ends = _read_jsonl(files["rows.jsonl"])
+        deleted, deleted_ends = _read_jsonl(files["deleted.jsonl"])
+        dimensions = meta.get("dimensions")
+        row_bytes = dimensions * self.dtype.itemsize if dimensions else 0
+        if rows and os.path.exists(files["vectors.bin"]):
+            rows = rows[:os.path.getsize(files["vectors.bin"]) // row_bytes]
+        else:
+            rows = []
+        # An interrupted add or delete leaves a torn line or vectors without
+        # rows; cut them off so later appends stay aligned row for row
+        _truncate(files["rows.jsonl"], row_ends[len(rows) - 1] if rows else 0)
+        _truncate(files["vectors.bin"], len(rows) * row_bytes)
+        _truncate(files["deleted.jsonl"], deleted_ends[-1] if deleted else 0)
+        if any(row >= len(rows) for row in deleted):
+            # Rows cut off above are appended again later under the same numbers
+            deleted = [row for row in deleted if row < len(rows)]
+            with open(files["deleted.jsonl"], "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(row) + "\n" for row in deleted)
+        if not rows:
+            return
+        self._matrix = np.memmap(files["vectors.bin"], dtype=self.dtype, mode="r", shape=(len(rows), dimensions))
+        self._size = len(rows)
+        self._alive = np.ones(len(rows), dtype=bool)
+        # Deletes are logged by row, so an id deleted and added again keeps its newer row
+        self._alive[deleted] = False
+        for row, (chunk_id, document, metadata) in enumerate(rows):
+            self._index_row(row, chunk_id, document, metadata, alive=bool(self._alive[row]))
+
+    def _index_row(self, row: int, chunk_id: str, document: str, metadata: dict, alive: bool = True):
+        self._ids.append(chunk_id)
+        self._documents.append(document)
+        self._metadatas.append(metadata)
+        if not alive:
+            return
+        self._rows[chunk_id] = row
+        key = (metadata or {}).get(self.SCOPE_FIELD)
+        if key is not None:
+            self._scopes.setdefault(key, []).append(row)
+
+    def _reserve(self, rows: int, dimensions: int):
+        needed = self._size + rows
+        if self._matrix is not None and needed <= len(self._matrix) and self._matrix.flags.writeable:
+            return
+        capacity = max(INITIAL_CAPACITY, needed, 2 * (len(self._matrix) if self._matrix is not None else 0))
+        grown = np.empty((capacity, dimensions), dtype=self.dtype)
+        alive = np.zeros(capacity, dtype=bool)
+        if self._size:
+            # Also how a memory-mapped matrix becomes private on its first change
+            grown[:self._size] = self._matrix[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+        self._matrix, self._alive = grown, alive
+
+    # -- API ------------------------------------------------------------------
+    def count(self) -> int:
+        return len(self._rows)
+
+    def add(self, ids: list, documents: list = None, embeddings=None, metadatas: list = None):
+        if not len(ids):
+            return
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        with self._lock:
+            # Like Chroma, ids already present are left as they are
+            new = [i for i, chunk_id in enumerate(ids) if chunk_id not in self._rows]
+            new = list({ids[i]: i for i in new}.values())
+            if not new:
+                return
+            self._reserve(len(new), vectors.shape[1])
+            start = self._size
+            self._matrix[start:start + len(new)] = vectors[new]
+            self._alive[start:start + len(new)] = True
+            for offset, i in enumerate(new):
+                self._index_row(start + offset, ids[i], documents[i], metadatas[i])
+            self._size += len(new)
+            if self.path:
+                self._append(start, new, ids, documents, metadatas, vectors.shape[1])
+
+    def _append(self, start: int, new: list, ids: list, documents: list, metadatas: list, dimensions: int):
+        files = self._files()
+        if start == 0:
+            with open(files["meta.json"], "w", encoding="utf-8") as f:
+                json.dump({"name": self.name, "metadata": self.metadata, "dtype": self.dtype.name,
+                           "dimensions": dimensions}, f)
+        # Vectors first: rows.jsonl decides how many rows exist on the next load
+        with open(files["vectors.bin"], "ab") as f:
+            f.write(np.ascontiguousarray(self._matrix[start:start + len(new)]).tobytes())
+        with open(files["rows.jsonl"], "a", encoding="utf-8") as f:
+            f.writelines(json.dumps([ids[i], documents[i], metadatas[i]]) + "\n" for i in new)
+
+    def _select(self, ids: list = None, where: dict = None) -> np.ndarray:
+        if ids is not None:
+            rows = [self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows]
+        elif where and set(where) == {self.SCOPE_FIELD}:
+            condition = where[self.SCOPE_FIELD]
+            keys = condition["$in"] if isinstance(condition, dict) and "$in" in condition else [
+                condition["$eq"] if isinstance(condition, dict) else condition
+            ]
+            rows = [row for key in keys for row in self._scopes.get(key, ())]
+        else:
+            rows = np.flatnonzero(self._alive[:self._size])
+            if where:
+                rows = [row for row in rows if _matches(self._metadatas[row], where)]
+        return np.asarray(rows, dtype=np.int64)
+
+    def get(self, ids: list = None, where: dict = None, limit: int = None, offset: int = None,
+            include: list = ("metadatas", "documents")) -> dict:
+        with self._lock:
+            rows = self._select(ids, where)
+            rows = rows[offset or 0:][:limit] if limit is not None else rows[offset or 0:]
+            result = {"ids": [self._ids[row] for row in rows]}
+            if "embeddings" in include:
+                result["embeddings"] = np.array(self._matrix[rows], dtype=np.float32)
+            if "documents" in include:
+                result["documents"] = [self._documents[row] for row in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [self._metadatas[row] for row in rows]
+        return result
+
+    def query(self, query_embeddings, n_results: int = 10, where: dict = None) -> dict:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            rows = self._select(where=where) if where is not None else np.flatnonzero(self._alive[:self._size])
+            if not len(rows):
+                for key in results:
+                    results[key] = [[] for _ in queries]
+                return results
+            # Sorted and unique, so rows covering the whole matrix are exactly
+            # 0..size-1 and scores map back through rows either way
+            rows = np.unique(rows)
+            # Rows are only ever appended (or copied into a larger matrix), so
+            # this view stays valid after the lock is released
+            matrix = self._matrix[:self._size] if len(rows) == self._size else self._matrix[rows]
+        # Scored outside the lock; numpy releases the GIL, so queries run in parallel
+        scores = self._scores(matrix, queries)
+        k = min(n_results, len(rows))
+        for query_scores in scores:
+            top = np.argpartition(-query_scores, k - 1)[:k]
+            top = top[np.argsort(-query_scores[top])]
+            picked = rows[top]
+            results["ids"].append([self._ids[row] for row in picked])
+            results["documents"].append([self._documents[row] for row in picked])
+            results["metadatas"].append([self._metadatas[row] for row in picked])
+            # Squared L2 on unit vectors, the scale of Chroma's default l2 space
+            results["distances"].append((2.0 - 2.0 * query_scores[top]).tolist())
+        return results
+
+    def _scores(self, matrix: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        if matrix.dtype == np.float32:
+            return queries @ matrix.T
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores
+
+    def delete(self, ids: list = None, where: dict = None):
+        with self._lock:
+            self._drop(self._select(ids, where).tolist(), persist=bool(self.path))
+
+    def _drop(self, rows: list, persist: bool):
+        if not rows:
+            return
+        dropped = set(rows)
+        for row in rows:
+            self._alive[row] = False
+            del self._rows[self._ids[row]]
+        for key in {(self._metadatas[row] or {}).get(self.SCOPE_FIELD) for row in rows} - {None}:
+            remaining = [row for row in self._scopes[key] if row not in dropped]
+            if remaining:
+                self._scopes[key] = remaining
+            else:
+                del self._scopes[key]
+        if persist:
+            with open(self._files()["deleted.jsonl"], "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(int(row)) + "\n" for row in rows)
+
+
+class NumpyClient:
+    """Chroma-compatible client over NumpyCollections, persisted under path when given."""
+
+    def __init__(self, path: str = None, dtype: str = "float32"):
+        self.path = path
+        self.dtype = dtype
+        self._collections = {}
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for name in sorted(os.listdir(path)):
+                if os.path.exists(os.path.join(path, name, "meta.json")):
+                    self._collections[name] = NumpyCollection(name, dtype=dtype, path=os.path.join(path, name))
+
+    def _create(self, name: str, metadata: dict = None) -> NumpyCollection:
+        collection_path = os.path.join(self.path, name) if self.path else None
+        collection = NumpyCollection(name, metadata, self.dtype, collection_path)
+        self._collections[name] = collection
+        return collection
+
+    def get_or_create_collection(self, name: str, embedding_function=None, metadata: dict = None):
+        with self._lock:
+            return self._collections.get(name) or self._create(name, metadata)
+
+    def create_collection(self, name: str, embedding_function=None, metadata: dict = None):
+        with self._lock:
+            if name in self._collections:
+                raise ValueError(f"Collection {name} already exists")
+            return self._create(name, metadata)
+
+    def get_collection(self, name: str, embedding_function=None):
+        with self._lock:
+            if name not in self._collections:
+                raise ValueError(f"Collection {name} does not exist")
+            return self._collections[name]
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            if self._collections.pop(name, None) is None:
+                raise ValueError(f"Collection {name} does not exist")
+            if self.path:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
@@ -0,0 +1,202 @@
+# src/ingest.py
+#
+# Bulk-ingests a directory tree of PDF/DOCX/TXT files into the shared corpus
+# that every Q&A session can search without uploading anything. Extraction,
+# cleaning and chunking (the upload pipeline) run on a process pool; the main
+# process embeds each finished document (through the embedding cache) and adds
+# it to the corpus vector collection, then checkpoints it in the manifest.
+# Re-running skips documents already in the manifest, so an interrupted run
+# resumes where it stopped.
+#
+#   OPENAI_API_KEY=... python src/ingest.py data/mom_documents --workers 8
+#
+# Neither vector backend's on-disk index is safe to share between processes:
+# run this while the app is stopped (or restart it afterwards).
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Helpers import extraction
+from Helpers.chunk_store import get_chunk_store
+from Helpers.chunking import DEFAULT_CHUNK_TOKENS, DEFAULT_OVERLAP_TOKENS
+from Helpers.corpus import (
+    CORPUS_COLLECTION_NAME,
+    DEFAULT_CORPUS_ROOT,
+    DEFAULT_MANIFEST_PATH,
+    append_manifest,
+    manifest_record,
+    read_manifest,
+)
+from Helpers.embedding_cache import EmbeddingCache
+from Helpers.embedding_pipeline import TokenRateLimiter
+from Helpers.extraction_cache import ExtractionCache, extraction_key
+from Helpers.indexer import add_documents
+from Helpers.ingest_pipeline import IngestionPipeline, build_document_entry
+from Helpers.settings import (
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_TOKENS_PER_MINUTE,
+    EXTRACTION_CACHE_PATH,
+    VECTOR_INDEX_PATH,
+    make_embedder,
+    make_openai_client,
+    make_vector_client,
+)
+
+FILETYPES = ("pdf", "docx", "txt")
+
+
+def find_documents(root: str) -> list:
+    found = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            filetype = name.lower().rsplit(".", 1)[-1]
+            if filetype in FILETYPES:
+                found.append((os.path.join(directory, name), filetype))
+    return sorted(found)
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_document(path: str, filetype: str, key: str, options: dict) -> dict:
+    """Runs in a worker process: extracts, cleans and chunks one file into the chunk store.
+
+    Returns chunk offsets, spans and token counts, never the text.
+    """
+    started = time.perf_counter()
+    store = get_chunk_store()
+    cache = ExtractionCache(options["extraction_cache"])
+    cached = cache.get(key)
+    if cached is not None and store.has(cached["doc_hash"]):
+        return {**cached, "cached": True, "seconds": time.perf_counter() - started}
+
+    with open(path, "rb") as f:
+        data = f.read()
+    # Files are already spread across processes; don't nest a PDF page pool
+    page_count, pages = extraction.open_pages(io.BytesIO(data), filetype, backend=options["pdf_backend"], parallel=False)
+    pipeline = IngestionPipeline(
+        pages, options["chunk_tokens"], options["overlap_tokens"], total_pages=page_count, store=store
+    ).start()
+    chunks, doc_hash = pipeline.result()
+    if not chunks or all(not chunk["text"].strip() for chunk in chunks):
+        raise ValueError("No valid chunks")
+    spans = store.spans(doc_hash, chunks)
+    cache.put(key, doc_hash, page_count, pipeline.raw_preview, chunks, spans)
+    return {
+        "doc_hash": doc_hash,
+        "page_count": page_count,
+        "chunks": [
+            {"start": chunk["start"], "end": chunk["end"], "span": span, "token_count": chunk["token_count"]}
+            for chunk, span in zip(chunks, spans)
+        ],
+        "cached": False,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a directory of PDF/DOCX/TXT files into the shared corpus")
+    parser.add_argument("root", nargs="?", default=DEFAULT_CORPUS_ROOT, help="directory to scan recursively")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-tokens", type=int, default=DEFAULT_CHUNK_TOKENS)
+    parser.add_argument("--overlap-tokens", type=int, default=DEFAULT_OVERLAP_TOKENS)
+    parser.add_argument("--pdf-backend", choices=extraction.PDF_BACKENDS, default=extraction.DEFAULT_PDF_BACKEND)
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH, help="corpus manifest and resume checkpoint")
+    parser.add_argument("--index-path", default=VECTOR_INDEX_PATH, help="vector index of the configured VECTOR_BACKEND")
+    parser.add_argument("--collection", default=CORPUS_COLLECTION_NAME)
+    args = parser.parse_args()
+
+    api_key = os.getenv("OPENAI_API_KEY", "").strip()
+    if not api_key:
+        sys.exit("OPENAI_API_KEY is not set")
+    options = {
+        "chunk_tokens": args.chunk_tokens,
+        "overlap_tokens": args.overlap_tokens,
+        "pdf_backend": args.pdf_backend,
+        "extraction_cache": EXTRACTION_CACHE_PATH,
+    }
+
+    documents = find_documents(args.root)
+    done = read_manifest(args.manifest)
+    done_keys = {record["extraction_key"] for record in done}
+    done_hashes = {record["doc_hash"] for record in done}
+    pending = []
+    for path, filetype in documents:
+        digest = hash_file(path)
+        key = extraction_key(digest, filetype, args.pdf_backend, args.chunk_tokens, args.overlap_tokens)
+        if key not in done_keys:
+            pending.append((path, filetype, digest, key))
+    print(f"{len(documents)} documents found, {len(documents) - len(pending)} already in the corpus", flush=True)
+
+    collection = make_vector_client(args.index_path).get_or_create_collection(
+        name=args.collection, embedding_function=None
+    )
+    embed = make_embedder(
+        make_openai_client(api_key),
+        cache=EmbeddingCache(EMBEDDING_CACHE_PATH),
+        limiter=TokenRateLimiter(EMBEDDING_TOKENS_PER_MINUTE),
+    )
+
+    summary = {"documents": 0, "cached": 0, "duplicates": 0, "failed": 0, "pages": 0, "chunks": 0, "embedded": 0,
+               "extract_seconds": 0.0, "index_seconds": 0.0}
+    started = time.perf_counter()
+    # Spawned, not forked: by now this process has Chroma and HTTP client threads, and
+    # a child forked while one of them holds a lock can deadlock (as in extraction.py)
+    with ProcessPoolExecutor(max(1, args.workers), mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {
+            pool.submit(extract_document, path, filetype, key, options): (path, digest, key)
+            for path, filetype, digest, key in pending
+        }
+        # Workers keep extracting while the main process embeds and indexes finished documents
+        for future in as_completed(futures):
+            path, digest, key = futures[future]
+            relative = os.path.relpath(path, args.root)
+            try:
+                result = future.result()
+            except Exception as e:
+                summary["failed"] += 1
+                print(f"FAILED {relative}: {e}", flush=True)
+                continue
+            summary["extract_seconds"] += result["seconds"]
+            summary["cached"] += result["cached"]
+            if result["doc_hash"] in done_hashes:
+                # Same content under another path
+                summary["duplicates"] += 1
+            else:
+                index_started = time.perf_counter()
+                entry = build_document_entry(relative, result["chunks"], result["doc_hash"], get_chunk_store())
+                summary["embedded"] += add_documents(collection, [entry], {}, embed)
+                summary["index_seconds"] += time.perf_counter() - index_started
+                done_hashes.add(result["doc_hash"])
+                summary["pages"] += result["page_count"]
+                summary["chunks"] += len(result["chunks"])
+            append_manifest(args.manifest, manifest_record(
+                relative, digest, key, result["doc_hash"], result["page_count"], result["chunks"]
+            ))
+            summary["documents"] += 1
+            print(f"{summary['documents']}/{len(pending)} {relative}: {len(result['chunks'])} chunks", flush=True)
+
+    elapsed = time.perf_counter() - started
+    summary.update(
+        seconds=round(elapsed, 2),
+        pages_per_second=round(summary["pages"] / elapsed, 2) if elapsed else 0.0,
+        chunks_per_second=round(summary["chunks"] / elapsed, 2) if elapsed else 0.0,
+        extract_seconds=round(summary["extract_seconds"], 2),
+        index_seconds=round(summary["index_seconds"], 2),
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
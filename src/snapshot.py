@@ -0,0 +1,63 @@
+# src/snapshot.py
+#
+# Exports the shared corpus (built by src/ingest.py) as a versioned snapshot
+# and installs snapshots on other replicas, so a new replica loads the index
+# from disk instead of re-embedding every document.
+#
+#   python src/snapshot.py export dist/corpus-snapshot
+#   python src/snapshot.py verify dist/corpus-snapshot
+#   python src/snapshot.py install dist/corpus-snapshot
+#
+# install is safe while the app is serving: the snapshot gets its own index
+# directory and the app switches to it on the next rerun. Setting
+# CORPUS_SNAPSHOT=<dir> makes the app install it at startup instead.
+import argparse
+import json
+import sys
+import time
+
+from Helpers.corpus import CORPUS_COLLECTION_NAME, Corpus
+from Helpers.settings import (
+    CORPUS_MANIFEST_PATH,
+    MODEL_EMBEDDING,
+    SNAPSHOT_ROOT,
+    VECTOR_INDEX_PATH,
+    make_vector_client,
+)
+from Helpers.snapshot import SnapshotError, export_snapshot, install_snapshot, verify_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, verify and install corpus index snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write the current corpus to a new snapshot directory")
+    export.add_argument("out_dir")
+    export.add_argument("--version", help="snapshot version (default: timestamp and corpus hash)")
+    export.add_argument("--manifest", default=CORPUS_MANIFEST_PATH)
+    export.add_argument("--index-path", default=VECTOR_INDEX_PATH)
+    export.add_argument("--collection", default=CORPUS_COLLECTION_NAME)
+    verify = commands.add_parser("verify", help="check a snapshot's checksums and shape")
+    verify.add_argument("snapshot")
+    install = commands.add_parser("install", help="verify a snapshot, build its index and make it current")
+    install.add_argument("snapshot")
+    install.add_argument("--root", default=SNAPSHOT_ROOT, help="where installed snapshots are kept")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            client = make_vector_client(args.index_path)
+            info = export_snapshot(Corpus(client, args.manifest, args.collection), args.out_dir, MODEL_EMBEDDING,
+                                   version=args.version)
+        elif args.command == "verify":
+            info = verify_snapshot(args.snapshot, MODEL_EMBEDDING)
+        else:
+            info = install_snapshot(args.snapshot, make_vector_client, args.root, MODEL_EMBEDDING)
+    except SnapshotError as e:
+        sys.exit(f"{args.command} failed: {e}")
+    summary = {key: info[key] for key in ("version", "documents", "chunks", "dimensions", "embedding_model")}
+    print(json.dumps({"command": args.command, **summary, "seconds": round(time.perf_counter() - started, 2)}))
+
+
+if __name__ == "__main__":
+    main()
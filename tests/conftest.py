@@ -0,0 +1,12 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+# Add src folder to sys path to import helpers, as the pages do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# Traces and metrics of the code under test go to a scratch directory, not data/metrics
+_METRICS_DIR = tempfile.mkdtemp(prefix="test-metrics-")
+os.environ.setdefault("METRICS_TRACE_PATH", os.path.join(_METRICS_DIR, "traces.jsonl"))
+os.environ.setdefault("METRICS_PROMETHEUS_PATH", os.path.join(_METRICS_DIR, "metrics.prom"))
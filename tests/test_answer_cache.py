@@ -0,0 +1,15 @@
+# tests/test_answer_cache.py
+from Helpers.answer_cache import AnswerCache
+
+PAYLOAD = {"answer": "Apply on the MOM portal.", "urls": [], "token_count": 10, "retrieved_chunks": ["a-0"]}
+
+
+def test_answers_are_scoped_to_retrieval_settings(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"))
+    cache.put("How do I apply?", "docs", "model", "2", PAYLOAD, query_embedding=[1.0, 0.0], retrieval="hybrid|1200")
+
+    assert cache.get_exact("how do I apply", "docs", "model", "2", "hybrid|1200") == PAYLOAD
+    assert cache.get_exact("How do I apply?", "docs", "model", "2", "lexical|1200") is None
+    assert cache.get_exact("How do I apply?", "docs", "model", "2", "hybrid|2400") is None
+    assert cache.get_similar([1.0, 0.0], "docs", "model", "2", "hybrid|1200") == PAYLOAD
+    assert cache.get_similar([1.0, 0.0], "docs", "model", "2", "hybrid|2400") is None
@@ -0,0 +1,44 @@
+# tests/test_chunk_store.py
+import threading
+import time
+
+from Helpers.chunk_store import ChunkStore
+
+
+class SlowStore(ChunkStore):
+    def _map(self, doc_hash: str):
+        mapped = super()._map(doc_hash)
+        # Gives other threads the chance to evict the map before it is read
+        time.sleep(0.0001)
+        return mapped
+
+
+def store_document(store: ChunkStore, doc_hash: str, text: str):
+    writer = store.writer()
+    writer.write(text)
+    writer.commit(doc_hash)
+
+
+def test_reads_survive_eviction_by_other_threads(tmp_path):
+    # One open map at a time, so nearly every read evicts the map another thread is using
+    store = SlowStore(str(tmp_path), max_open=1)
+    texts = {f"{i:02d}" * 32: str(i) * 20_000 for i in range(4)}
+    for doc_hash, text in texts.items():
+        store_document(store, doc_hash, text)
+    errors = []
+
+    def read_all():
+        try:
+            for _ in range(50):
+                for doc_hash, text in texts.items():
+                    assert store.read(doc_hash, 0, len(text)) == text
+                    assert store.spans(doc_hash, [{"start": 1, "end": 5}]) == [(1, 5)]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,53 @@
+# tests/test_context_packer.py
+from Helpers.context_packer import overlap, pack_context, shingles, similarity_from_distance
+
+LEVY = "The monthly levy for a migrant domestic worker is payable through GIRO by the 17th of each month."
+BOND = "A security bond of five thousand dollars is required for each non-Malaysian helper before arrival."
+REST = "Your helper must get at least one rest day every week, or compensation in lieu of the day off."
+CLINIC = "The six-monthly medical examination must be done by a Singapore-registered doctor at a clinic."
+
+
+def ids(kept):
+    return [chunk_id for chunk_id, _, _, _ in kept]
+
+
+def test_candidates_far_below_the_best_match_are_cut():
+    candidates = [("a", LEVY, 50, 0.82), ("b", BOND, 50, 0.70), ("c", REST, 50, 0.60), ("d", CLINIC, 50, 0.1)]
+    kept, dropped = pack_context(candidates, token_budget=1000)
+    assert ids(kept) == ["a", "b"]
+    assert dropped == {"below_cutoff": 2, "duplicate": 0, "over_budget": 0}
+
+
+def test_weak_top_match_is_kept_and_keyword_matches_skip_the_cutoff():
+    candidates = [("a", LEVY, 50, 0.15), ("b", BOND, 50, 0.1), ("c", REST, 50, None)]
+    kept, dropped = pack_context(candidates, token_budget=1000)
+    assert ids(kept) == ["a", "c"]
+    assert dropped["below_cutoff"] == 1
+
+
+def test_near_duplicates_are_dropped_but_overlapping_neighbours_kept():
+    reissued = f"Revised edition. {LEVY}"
+    neighbour = f"{LEVY.split(' is ')[1]} {BOND}"
+    candidates = [("a", LEVY, 50, 0.8), ("b", reissued, 52, 0.8), ("c", neighbour, 60, 0.79)]
+    kept, dropped = pack_context(candidates, token_budget=1000)
+    assert ids(kept) == ["a", "c"]
+    assert dropped["duplicate"] == 1
+
+
+def test_budget_skips_chunks_that_do_not_fit():
+    candidates = [("a", LEVY, 400, 0.8), ("b", BOND, 500, 0.79), ("c", REST, 200, 0.78), ("d", CLINIC, 100, 0.77)]
+    kept, dropped = pack_context(candidates, token_budget=700)
+    assert ids(kept) == ["a", "c", "d"]
+    assert sum(tokens for _, _, tokens, _ in kept) <= 700
+    assert dropped["over_budget"] == 1
+    # The best match is kept even when it alone exceeds the budget
+    assert ids(pack_context(candidates, token_budget=100)[0]) == ["a"]
+
+
+def test_helpers():
+    assert similarity_from_distance(0.0) == 1.0
+    assert similarity_from_distance(2.0) == 0.0
+    assert shingles("one two") == {("one", "two")}
+    assert overlap(shingles(LEVY), shingles(f"Note: {LEVY}")) == 1.0
+    assert overlap(shingles(LEVY), set()) == 0.0
+    assert pack_context([]) == ([], {"below_cutoff": 0, "duplicate": 0, "over_budget": 0})
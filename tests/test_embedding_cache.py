@@ -0,0 +1,37 @@
+# tests/test_embedding_cache.py
+import sqlite3
+
+import pytest
+
+from Helpers.embedding_cache import EmbeddingCache
+
+
+def test_put_many_recovers_after_a_busy_database(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path)
+    cache._conn.execute("PRAGMA busy_timeout = 0")
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    with pytest.raises(sqlite3.OperationalError):
+        cache.put_many("model", ["a"], [[1.0, 2.0]])
+    assert not cache._conn.in_transaction
+
+    other.execute("ROLLBACK")
+    cache.put_many("model", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    assert cache.get_many("model", ["a", "b", "c"]) == [[1.0, 2.0], [3.0, 4.0], None]
+
+
+def test_put_many_rolls_back_a_failed_batch(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    cache.put_many("model", ["a"], [[1.0]])
+    cache._conn.execute(
+        # Rejects the second row of the batch (2.0 as a float32 blob)
+        "CREATE TRIGGER reject_two BEFORE INSERT ON embeddings WHEN NEW.vector = X'00000040' "
+        "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    )
+
+    with pytest.raises(sqlite3.IntegrityError):
+        cache.put_many("model", ["b", "c"], [[3.0], [2.0]])
+    assert not cache._conn.in_transaction
+    assert cache.get_many("model", ["a", "b", "c"]) == [[1.0], None, None]
@@ -0,0 +1,80 @@
+# tests/test_extraction_cache.py
+import time
+
+import pytest
+
+from Helpers import extraction_cache
+from Helpers.chunk_store import ChunkStore
+from Helpers.extraction_cache import ExtractionCache, extraction_key, file_hash
+from Helpers.ingest_jobs import IngestJobQueue
+
+DIGEST = file_hash(b"policy")
+KEY = extraction_key(DIGEST, "pdf", "pdfium", 200, 30)
+
+
+def test_key_depends_on_the_bytes_not_the_name():
+    assert extraction_key(file_hash(b"policy"), "pdf", "pdfium", 200, 30) == KEY
+    assert extraction_key(file_hash(b"policy v2"), "pdf", "pdfium", 200, 30) != KEY
+
+
+@pytest.mark.parametrize("args", [
+    ("docx", "pdfium", 200, 30),
+    ("pdf", "pypdf", 200, 30),
+    ("pdf", "pdfium", 300, 30),
+    ("pdf", "pdfium", 200, 0),
+])
+def test_key_changes_with_extraction_settings(args):
+    assert extraction_key(DIGEST, *args) != KEY
+
+
+def test_pdf_backend_only_matters_for_pdfs():
+    assert extraction_key(DIGEST, "txt", "pypdf", 200, 30) == extraction_key(DIGEST, "txt", "pdfium", 200, 30)
+
+
+@pytest.mark.parametrize("version", ["EXTRACTOR_VERSION", "CLEANER_VERSION", "CHUNKER_VERSION", "TOKENIZER_MODEL"])
+def test_key_changes_with_pipeline_versions(monkeypatch, version):
+    monkeypatch.setattr(extraction_cache, version, "bumped")
+    assert extraction_key(DIGEST, "pdf", "pdfium", 200, 30) != KEY
+
+
+def test_entries_round_trip_and_evict_least_recently_used(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "extractions.sqlite3"), max_entries=2)
+    chunks = [{"start": 0, "end": 5, "token_count": 2}, {"start": 5, "end": 9, "token_count": 1}]
+    cache.put("a", "hash-a", 3, "preview", chunks, [(0, 5), (5, 11)])
+    time.sleep(0.01)
+    cache.put("b", "hash-b", 1, "", chunks[:1], [(0, 5)])
+    time.sleep(0.01)
+
+    assert cache.get("a") == {
+        "doc_hash": "hash-a",
+        "page_count": 3,
+        "raw_preview": "preview",
+        "chunks": [
+            {"start": 0, "end": 5, "span": (0, 5), "token_count": 2},
+            {"start": 5, "end": 9, "span": (5, 11), "token_count": 1},
+        ],
+    }
+    time.sleep(0.01)
+    cache.put("c", "hash-c", 1, "", chunks[:1], [(0, 5)])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_known_uploads_skip_extraction(tmp_path):
+    job_queue = IngestJobQueue(
+        store=ChunkStore(str(tmp_path / "chunk_store")),
+        extraction_cache=ExtractionCache(str(tmp_path / "extractions.sqlite3")),
+    )
+    data = ("The monthly levy is payable through GIRO by the seventeenth of each month. " * 30).encode("utf-8")
+    first = job_queue.submit("owner", "levy.txt", "txt", data)
+    while first.active:
+        time.sleep(0.01)
+    again = job_queue.submit("owner", "renamed.txt", "txt", data)
+    resized = job_queue.submit("owner", "levy.txt", "txt", data, chunk_tokens=50)
+    while again.active or resized.active:
+        time.sleep(0.01)
+
+    assert (first.cached, again.cached, resized.cached) == (False, True, False)
+    assert again.entry["doc_hash"] == first.entry["doc_hash"]
+    assert [chunk["chunk_id"] for chunk in again.entry["chunks"]] == [chunk["chunk_id"] for chunk in first.entry["chunks"]]
+    assert len(resized.entry["chunks"]) > len(first.entry["chunks"])
@@ -0,0 +1,56 @@
+# tests/test_filters.py
+import json
+
+import pytest
+
+from Helpers import filters
+from Helpers.filters import KeywordMatcher, is_question_relevant, is_question_safe, relevance_category
+
+
+@pytest.fixture
+def restore_matchers(monkeypatch):
+    monkeypatch.setattr(filters, "RELEVANCE_MATCHER", filters.RELEVANCE_MATCHER)
+    monkeypatch.setattr(filters, "SAFETY_MATCHER", filters.SAFETY_MATCHER)
+
+
+def test_keywords_match_whole_words_only():
+    assert not is_question_relevant("Where do I renew my passport?")
+    assert is_question_relevant("Does my helper need a pass?")
+    assert is_question_safe("Can the helper clean the bedroom?")
+    assert not is_question_safe("Can the helper share my bed?")
+
+
+def test_inflections_and_phrases_match():
+    assert relevance_category("Are helpers allowed two rest-days?") == "mdw"
+    assert relevance_category("Which nannies know CPR training?") == "childcare"
+    assert relevance_category("Is the   six-monthly medical due?") == "mdw"
+    assert not is_question_safe("My helper was harassed")
+
+
+def test_safe_phrases_are_ignored():
+    assert is_question_safe("How do I get in touch with the agency?")
+    assert not is_question_safe("Do not touch the helper")
+    assert not is_question_safe("Get in touch, then touch her")
+
+
+def test_longest_keyword_wins():
+    matcher = KeywordMatcher({"short": ["insurance"], "long": ["medical insurance"]})
+    assert matcher.match("Is medical insurance required?") == "long"
+    assert matcher.match("Is insurance required?") == "short"
+
+
+def test_config_file_overrides_the_defaults(tmp_path, monkeypatch, restore_matchers):
+    config = tmp_path / "filter_keywords.json"
+    config.write_text(json.dumps({
+        "relevant": {"childcare": ["playgroup"]},
+        "inappropriate": {"extra": ["gamble"]},
+        "safe_phrases": [],
+    }))
+    monkeypatch.setenv(filters.KEYWORDS_CONFIG_ENV, str(config))
+    filters.reload_keyword_config()
+
+    assert relevance_category("Which playgroup is nearby?") == "childcare"
+    assert not is_question_relevant("Is there a nanny checklist?")  # category replaced
+    assert is_question_relevant("What is the monthly levy?")  # other categories kept
+    assert filters.unsafe_category("Can my helper gamble?") == "extra"
+    assert not is_question_safe("How do I get in touch with the agency?")
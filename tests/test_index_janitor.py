@@ -0,0 +1,133 @@
+# tests/test_index_janitor.py
+import os
+import shutil
+import time
+
+from Helpers.chunk_store import ChunkStore
+from Helpers.corpus import append_manifest
+from Helpers.index_janitor import IndexJanitor, NamespaceRegistry
+from Helpers.indexer import add_in_batches, make_chunk_id
+from Helpers.snapshot import referenced_documents
+from Helpers.vector_backend import NumpyClient
+
+KEEP, CORPUS, SNAPSHOT, OLD = ("a" * 64, "b" * 64, "c" * 64, "d" * 64)
+
+
+def make_janitor(tmp_path, **kwargs) -> IndexJanitor:
+    return IndexJanitor(
+        lambda path: NumpyClient(path), str(tmp_path / "index"), "doc_chunks",
+        NamespaceRegistry(str(tmp_path / "namespaces.sqlite3")), **kwargs
+    )
+
+
+def index_document(janitor: IndexJanitor, doc_hash: str, chunks: int = 4):
+    ids = [make_chunk_id(doc_hash, i, i + 1) for i in range(chunks)]
+    add_in_batches(
+        janitor.collection(), ids, [f"chunk {i}" for i in ids],
+        [[float(i), 1.0] for i in range(chunks)], [{"doc_hash": doc_hash} for _ in ids],
+    )
+    janitor.registry.register({doc_hash: chunks})
+
+
+def store_document(store: ChunkStore, doc_hash: str, mtime: float = None):
+    writer = store.writer()
+    writer.write("text")
+    path = writer.commit(doc_hash)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_evicted_documents_lose_their_stored_text_unless_referenced(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunk_store"))
+    manifest, snapshots = str(tmp_path / "manifest.jsonl"), str(tmp_path / "snapshots")
+    append_manifest(manifest, {"doc_hash": CORPUS})
+    append_manifest(os.path.join(snapshots, "v1", "manifest.jsonl"), {"doc_hash": SNAPSHOT})
+    janitor = make_janitor(
+        tmp_path, ttl_seconds=0.05, store=store, referenced=lambda: referenced_documents(manifest, snapshots)
+    )
+    long_ago = time.time() - 3600
+    for doc_hash in (KEEP, CORPUS, SNAPSHOT, OLD):
+        index_document(janitor, doc_hash)
+        store_document(store, doc_hash, long_ago)
+    assert store.read(OLD, 0, 4) == "text"  # leaves a map open for remove() to close
+
+    time.sleep(0.1)
+    janitor.registry.touch([KEEP])
+    report = janitor.run_once()
+
+    assert report["evicted_namespaces"] == 3
+    assert report["removed_documents"] == 1
+    assert [store.has(doc_hash) for doc_hash in (KEEP, CORPUS, SNAPSHOT, OLD)] == [True, True, True, False]
+
+
+def test_documents_uploaded_again_within_the_ttl_are_kept(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunk_store"))
+    janitor = make_janitor(tmp_path, ttl_seconds=0.05, store=store, referenced=set)
+    index_document(janitor, OLD)
+    store_document(store, OLD, time.time() - 3600)
+
+    time.sleep(0.1)
+    store_document(store, OLD)  # same content committed again by another session
+    report = janitor.run_once()
+
+    assert report["evicted_namespaces"] == 1
+    assert report["removed_documents"] == 0
+    assert store.has(OLD)
+
+
+def test_idle_namespaces_are_evicted_and_active_ones_kept(tmp_path):
+    janitor = make_janitor(tmp_path, ttl_seconds=0.05, compact_fraction=1.0)
+    index_document(janitor, KEEP)
+    index_document(janitor, OLD)
+
+    time.sleep(0.1)
+    janitor.registry.touch([KEEP])
+    report = janitor.run_once()
+
+    assert (report["evicted_namespaces"], report["evicted_chunks"], report["compacted"]) == (1, 4, False)
+    assert janitor.registry.registered([KEEP, OLD]) == {KEEP}
+    assert janitor.collection().get(where={"doc_hash": OLD})["ids"] == []
+    assert len(janitor.collection().get(where={"doc_hash": KEEP})["ids"]) == 4
+    # An evicted namespace is not revived by a touch; it must be indexed again
+    janitor.registry.touch([OLD])
+    assert janitor.registry.registered([OLD]) == set()
+
+
+def test_compaction_switches_to_a_new_generation(tmp_path):
+    janitor = make_janitor(tmp_path, ttl_seconds=0.05)
+    index_document(janitor, KEEP, chunks=3)
+    index_document(janitor, OLD, chunks=3)
+    old_generation, old_collection = janitor.generation(), janitor.collection()
+
+    time.sleep(0.1)
+    janitor.registry.touch([KEEP])
+    assert janitor.run_once()["compacted"]
+
+    generation = janitor.generation()
+    assert generation != old_generation
+    assert janitor.collection().count() == 3
+    assert sorted(janitor.collection().get()["ids"]) == sorted(old_collection.get(where={"doc_hash": KEEP})["ids"])
+    # Queries still holding the retired collection finish against it until the next run
+    assert os.path.isdir(tmp_path / "index" / old_generation)
+    assert old_collection.count() == 3
+
+    assert not janitor.run_once()["compacted"]
+    assert os.listdir(tmp_path / "index") == [generation]
+
+    # A restarted process picks up the active generation and what it holds
+    restarted = make_janitor(tmp_path)
+    assert restarted.generation() == generation
+    assert restarted.collection().count() == 3
+    assert restarted.registry.registered([KEEP]) == {KEEP}
+
+
+def test_a_lost_index_clears_the_registry(tmp_path):
+    janitor = make_janitor(tmp_path)
+    index_document(janitor, KEEP)
+    lost = janitor.generation()
+    shutil.rmtree(tmp_path / "index")
+
+    restarted = make_janitor(tmp_path)
+
+    assert restarted.generation() != lost
+    assert restarted.registry.registered([KEEP]) == set()
@@ -0,0 +1,55 @@
+# tests/test_indexer.py
+from Helpers.indexer import chunk_position, document_hash, make_chunk_id, scope_filter, sync_index
+from Helpers.vector_backend import NumpyClient
+
+
+def make_document(text: str, size: int = 10) -> dict:
+    doc_hash = document_hash(text)
+    chunks = [
+        {
+            "chunk_id": make_chunk_id(doc_hash, start, min(start + size, len(text))),
+            "text": text[start:start + size],
+            "source": "policy.txt",
+            "token_count": 3,
+        }
+        for start in range(0, len(text), size)
+    ]
+    return {"doc_hash": doc_hash, "filename": "policy.txt", "chunks": chunks}
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_chunk_ids_round_trip_to_document_order():
+    doc_hash = document_hash("some text")
+    ids = [make_chunk_id(doc_hash, start, start + 5) for start in (120, 5, 40, 0)]
+
+    assert chunk_position(ids[0]) == (doc_hash[:16], 120)
+    assert sorted(ids, key=chunk_position) == [ids[3], ids[1], ids[2], ids[0]]
+    assert make_chunk_id(doc_hash, 0, 5) == make_chunk_id(document_hash("some text"), 0, 5)
+
+
+def test_readding_a_document_reuses_its_vectors():
+    collection = NumpyClient(None).get_or_create_collection("doc_chunks")
+    embed = CountingEmbedder()
+    text = "The monthly levy is payable through GIRO by the 17th."
+    first, second = {}, {}
+
+    assert sync_index(collection, [make_document(text)], first, embed) == (6, 0)
+    # Another session uploading the same content maps onto the same ids
+    assert sync_index(collection, [make_document(text)], second, embed) == (0, 0)
+    assert len(embed.texts) == 6
+    assert collection.count() == 6
+    assert first == second
+
+    # Untracking only narrows the session's scope; the shared vectors stay
+    assert sync_index(collection, [], second, embed) == (0, 6)
+    assert second == {} and scope_filter(second) is None
+    assert collection.count() == 6
+    assert scope_filter(first) == {"doc_hash": document_hash(text)}
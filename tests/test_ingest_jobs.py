@@ -0,0 +1,52 @@
+# tests/test_ingest_jobs.py
+import time
+
+from Helpers.ingest_jobs import IngestJobQueue, adopt_finished_jobs, session_owner
+
+POLICY = (
+    "Employers must buy medical insurance for the helper before she arrives. "
+    "The security bond of five thousand dollars is required for each helper. "
+) * 20
+
+
+def wait_for(job_queue: IngestJobQueue, owner: str, timeout: float = 10.0):
+    deadline = time.time() + timeout
+    while job_queue.pending(owner):
+        assert time.time() < deadline, "ingestion did not finish"
+        time.sleep(0.01)
+
+
+def test_jobs_run_in_the_background_and_are_adopted_once():
+    job_queue = IngestJobQueue(max_workers=2)
+    state, other = {}, {}
+    owner = session_owner(state)
+    job = job_queue.submit(owner, "policy.txt", "txt", POLICY.encode("utf-8"))
+    copy = job_queue.submit(owner, "copy.txt", "txt", POLICY.encode("utf-8"))
+    empty = job_queue.submit(owner, "empty.txt", "txt", b"   ")
+    wait_for(job_queue, owner)
+
+    # Another session sees none of these jobs
+    assert job_queue.jobs(session_owner(other)) == []
+    assert adopt_finished_jobs(other, job_queue) == []
+
+    assert (job.status, copy.status, empty.status) == ("done", "done", "failed")
+    assert str(empty.error) == "No extractable text found"
+    assert job.progress["chunk"] > 0 and job._data is None
+
+    assert adopt_finished_jobs(state, job_queue) == [job, copy, empty]
+    # The same content uploaded twice is only added to the session once
+    assert [doc["filename"] for doc in state["uploaded_docs"]] == ["policy.txt"]
+    assert state["uploaded_docs"][0]["file_sha256"] == job.file_hash
+    assert len(state["lexical_index"]) == len(job.entry["chunks"])
+    assert state["lexical_index"].search("security bond")
+    assert job_queue.jobs(owner) == [] and adopt_finished_jobs(state, job_queue) == []
+
+
+def test_discarded_jobs_are_never_collected():
+    job_queue = IngestJobQueue(max_workers=1)
+    owner = session_owner({})
+    job_queue.submit(owner, "policy.txt", "txt", POLICY.encode("utf-8"))
+    job_queue.discard(owner)
+
+    assert job_queue.jobs(owner) == []
+    assert job_queue.collect(owner) == []
@@ -0,0 +1,125 @@
+# tests/test_snapshot.py
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from Helpers import chunk_store, snapshot
+from Helpers.chunk_store import ChunkStore
+from Helpers.corpus import CORPUS_COLLECTION_NAME
+from Helpers.snapshot import (
+    CURRENT_POINTER,
+    SNAPSHOT_FORMAT,
+    SnapshotError,
+    _sha256,
+    _snapshot_files,
+    current_snapshot,
+    install_snapshot,
+    snapshot_paths,
+    verify_snapshot,
+)
+from Helpers.vector_backend import NumpyClient
+
+MODEL = "text-embedding-3-small"
+DOC_HASH = "ab" * 32
+TEXT = "Employers must buy medical insurance for their helper."
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Installing copies documents into, and indexes them from, the process-wide chunk store
+    store = ChunkStore(str(tmp_path / "chunk_store"))
+    monkeypatch.setattr(chunk_store, "get_chunk_store", lambda root=None: store)
+    monkeypatch.setattr(snapshot, "get_chunk_store", lambda root=None: store)
+    return store
+
+
+def write_snapshot(path, version: str = "v1") -> str:
+    os.makedirs(os.path.join(path, "documents"))
+    with open(os.path.join(path, "manifest.jsonl"), "w", encoding="utf-8") as f:
+        record = {"path": "policy.txt", "doc_hash": DOC_HASH, "chunks": [[0, len(TEXT), 0, len(TEXT), 9]]}
+        f.write(json.dumps(record) + "\n")
+    with open(os.path.join(path, "documents", f"{DOC_HASH}.txt"), "w", encoding="utf-8") as f:
+        f.write(TEXT)
+    np.save(os.path.join(path, "embeddings.npy"), np.zeros((1, 4), dtype=np.float16))
+    info = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "embedding_model": MODEL,
+        "chunks": 1,
+        "dimensions": 4,
+        "files": {name: _sha256(os.path.join(path, name)) for name in _snapshot_files(str(path))},
+    }
+    with open(os.path.join(path, "snapshot.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    return str(path)
+
+
+def test_verify_accepts_an_untouched_snapshot(tmp_path):
+    assert verify_snapshot(write_snapshot(tmp_path / "snap"), MODEL)["version"] == "v1"
+
+
+def test_verify_rejects_tampered_files(tmp_path):
+    source = write_snapshot(tmp_path / "snap")
+    with open(os.path.join(source, "documents", f"{DOC_HASH}.txt"), "a", encoding="utf-8") as f:
+        f.write(" Or not.")
+    with pytest.raises(SnapshotError, match="Checksum mismatch"):
+        verify_snapshot(source, MODEL)
+
+    os.remove(os.path.join(source, "embeddings.npy"))
+    with pytest.raises(SnapshotError, match="differ from its listing"):
+        verify_snapshot(source, MODEL)
+
+
+def test_verify_rejects_another_embedding_model(tmp_path):
+    with pytest.raises(SnapshotError, match="embedded with"):
+        verify_snapshot(write_snapshot(tmp_path / "snap"), "text-embedding-3-large")
+
+
+@pytest.mark.parametrize("version", ["", ".", "..", "../..", "a/b", "/tmp", None, 3])
+def test_bad_versions_never_touch_the_root(tmp_path, version):
+    root = tmp_path / "snapshots"
+    (root / "v0").mkdir(parents=True)
+    (root / "v0" / "snapshot.json").write_text("{}")
+    (root / CURRENT_POINTER).write_text("v0")
+    (tmp_path / "outside").mkdir()
+
+    source = write_snapshot(tmp_path / "snap", version)
+    with pytest.raises(SnapshotError, match="Invalid snapshot version"):
+        install_snapshot(source, lambda path: pytest.fail("no index should be built"), str(root), MODEL)
+    assert sorted(os.listdir(root)) == [CURRENT_POINTER, "v0"]
+    assert (tmp_path / "outside").exists()
+
+
+def test_snapshot_paths_stay_under_the_root(tmp_path):
+    assert snapshot_paths(str(tmp_path), "20250101-120000-abcd1234")["directory"] == str(tmp_path / "20250101-120000-abcd1234")
+    with pytest.raises(SnapshotError):
+        snapshot_paths(str(tmp_path), "..")
+
+
+def test_install_builds_switches_and_prunes(tmp_path, store):
+    root = str(tmp_path / "snapshots")
+    for version in ("v1", "v2", "v3"):
+        assert install_snapshot(write_snapshot(tmp_path / version, version), NumpyClient, root, MODEL)["version"] == version
+        time.sleep(0.01)  # pruning goes by install time
+
+    assert current_snapshot(root) == "v3"
+    assert sorted(os.listdir(root)) == [CURRENT_POINTER, "v2", "v3"]
+    assert store.read(DOC_HASH, 0, len(TEXT)) == TEXT
+    collection = NumpyClient(snapshot_paths(root, "v3")["index"]).get_or_create_collection(CORPUS_COLLECTION_NAME)
+    assert collection.get()["documents"] == [TEXT]
+
+
+def test_install_rejects_a_tampered_snapshot_and_keeps_the_current_one(tmp_path, store):
+    root = str(tmp_path / "snapshots")
+    install_snapshot(write_snapshot(tmp_path / "v1", "v1"), NumpyClient, root, MODEL)
+    source = write_snapshot(tmp_path / "v2", "v2")
+    with open(os.path.join(source, "manifest.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps({"path": "injected.txt", "doc_hash": "cd" * 32, "chunks": []}) + "\n")
+
+    with pytest.raises(SnapshotError, match="Checksum mismatch"):
+        install_snapshot(source, lambda path: pytest.fail("no index should be built"), root, MODEL)
+    assert current_snapshot(root) == "v1"
+    assert sorted(os.listdir(root)) == [CURRENT_POINTER, "v1"]
@@ -0,0 +1,72 @@
+# tests/test_vector_backend.py
+import numpy as np
+
+from Helpers.vector_backend import NumpyClient
+
+DIMENSIONS = 8
+
+
+def unit(i: int) -> list:
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    vector[i] = 1.0
+    return vector.tolist()
+
+
+def add(collection, chunk_id: str, axis: int, doc_hash: str):
+    collection.add(ids=[chunk_id], documents=[chunk_id], embeddings=[unit(axis)], metadatas=[{"doc_hash": doc_hash}])
+
+
+def nearest(collection, axis: int, where=None) -> str:
+    return collection.query(query_embeddings=[unit(axis)], n_results=1, where=where)["ids"][0][0]
+
+
+def test_scope_covering_every_row_in_another_order():
+    collection = NumpyClient().get_or_create_collection("doc_chunks")
+    add(collection, "a1", 0, "A")
+    add(collection, "b1", 1, "B")
+    assert nearest(collection, 1, where={"doc_hash": {"$in": ["B", "A"]}}) == "b1"
+    assert nearest(collection, 0, where={"doc_hash": {"$in": ["B", "A"]}}) == "a1"
+
+
+def test_delete_and_add_again_survives_reload(tmp_path):
+    collection = NumpyClient(str(tmp_path)).get_or_create_collection("doc_chunks")
+    add(collection, "a1", 0, "A")
+    add(collection, "b1", 1, "B")
+    collection.delete(where={"doc_hash": "A"})
+    add(collection, "a1", 2, "A")
+
+    reloaded = NumpyClient(str(tmp_path)).get_collection("doc_chunks")
+    assert reloaded.count() == 2
+    assert reloaded.get(ids=["a1"])["ids"] == ["a1"]
+    assert nearest(reloaded, 2) == "a1"
+    found = reloaded.query(query_embeddings=[unit(0)], n_results=2)["ids"][0]
+    assert sorted(found) == ["a1", "b1"]
+    assert nearest(reloaded, 2, where={"doc_hash": "A"}) == "a1"
+
+    # Already present after the reload, so not appended again
+    add(reloaded, "a1", 2, "A")
+    assert NumpyClient(str(tmp_path)).get_collection("doc_chunks").count() == 2
+
+
+def test_interrupted_writes_are_cut_off_on_load(tmp_path):
+    collection = NumpyClient(str(tmp_path)).get_or_create_collection("doc_chunks")
+    add(collection, "a1", 0, "A")
+    add(collection, "b1", 1, "B")
+    collection.delete(ids=["b1"])
+    files = collection._files()
+    # A crash between the two writes of an add, and in the middle of a delete
+    with open(files["vectors.bin"], "ab") as f:
+        f.write(np.asarray([unit(3)], dtype=np.float32).tobytes())
+    with open(files["rows.jsonl"], "a", encoding="utf-8") as f:
+        f.write('["c1", "c1", {"doc_h')
+    with open(files["deleted.jsonl"], "a", encoding="utf-8") as f:
+        f.write("1")
+
+    reloaded = NumpyClient(str(tmp_path)).get_collection("doc_chunks")
+    assert reloaded.count() == 1
+    add(reloaded, "c1", 4, "C")
+    add(reloaded, "d1", 5, "D")
+
+    again = NumpyClient(str(tmp_path)).get_collection("doc_chunks")
+    assert again.count() == 3
+    assert [nearest(again, axis) for axis in (0, 4, 5)] == ["a1", "c1", "d1"]